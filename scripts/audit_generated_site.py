@@ -4,33 +4,48 @@ This script inspects the built output directory for missing pages, broken links,
 switcher integration, routes consistency, asset references, and template
 similarities. Results are written to both Markdown and JSON reports for humans
 and machines.
+
+Every HTML page is parsed once, in worker processes for large outputs, into a
+small ``PageFacts`` record; all checks read those records instead of parsing
+the page again. The JSON report carries per-check timings.
 """
 
 from __future__ import annotations
 
 import argparse
 import datetime as dt
-import difflib
 import importlib
 import importlib.util
 import json
 import os
 import subprocess
 import sys
+import time
 from collections import Counter, defaultdict
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, Optional, Sequence
+from typing import Callable, Iterable, Optional, Sequence
 from urllib.parse import urlparse
 
 bs4_spec = importlib.util.find_spec("bs4")
 BeautifulSoup = None if bs4_spec is None else importlib.import_module("bs4").BeautifulSoup  # type: ignore
 
 yaml_spec = importlib.util.find_spec("yaml")
-yaml = None if yaml_spec is None else importlib.import_module("yaml")  # type: ignore
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from sitegen.config_loader import load_experiences_data  # noqa: E402
+from sitegen.legacy_pipeline import map_paths  # noqa: E402
+from sitegen.template_similarity import TagSketch, near_duplicates, sketch_tags  # noqa: E402
+from sitegen.util_fs import TreeSnapshot  # noqa: E402
 
 
 SEVERITY_ORDER = ["BLOCKER", "MAJOR", "MINOR", "INFO"]
+# Jaccard similarity of 3-tag shingles; one changed tag in a 60-tag page scores ~0.9.
+TEMPLATE_SIMILARITY_THRESHOLD = 0.9
 
 
 def _git_sha() -> Optional[str]:
@@ -57,28 +72,45 @@ def _is_external_href(href: str) -> bool:
     return bool(parsed.scheme and parsed.scheme not in ("", "file"))
 
 
-def _resolve_local_path(base: Path, href: str, out_root: Path) -> tuple[Optional[Path], Optional[str]]:
-    parsed = urlparse(href)
-    fragment = parsed.fragment or None
-    if parsed.scheme or parsed.netloc:
-        return None, fragment
-    if href.startswith("#"):
-        return base, fragment
-    if href.startswith("/"):
-        target = out_root / href.lstrip("/")
-    else:
-        target = (base.parent / parsed.path).resolve()
-    if target.is_dir():
-        index_candidate = target / "index.html"
-        if index_candidate.exists():
-            target = index_candidate
-    elif not target.suffix and target.exists():
-        pass
-    elif not target.suffix:
-        html_candidate = Path(str(target) + ".html")
-        if html_candidate.exists():
-            target = html_candidate
-    return target if target.exists() else None, fragment
+class HrefResolver:
+    """Resolve local hrefs against a one-time snapshot of the output tree.
+
+    Results are cached per (base directory, href path), so a nav link shared by
+    many pages is resolved once instead of re-stat'ing its candidates on each
+    page.
+    """
+
+    def __init__(self, out_root: Path, *, cache_size: int = 1 << 16) -> None:
+        self.out_root = out_root
+        self.snapshot = TreeSnapshot(out_root)
+        self._resolve_path = lru_cache(maxsize=cache_size)(self._resolve_uncached)
+
+    def resolve(self, base: Path, href: str) -> tuple[Optional[Path], Optional[str]]:
+        parsed = urlparse(href)
+        fragment = parsed.fragment or None
+        if parsed.scheme or parsed.netloc:
+            return None, fragment
+        if href.startswith("#"):
+            return base, fragment
+        # Root-relative paths do not depend on the page, so they share one entry.
+        base_dir = "" if parsed.path.startswith("/") else str(base.parent)
+        return self._resolve_path(base_dir, parsed.path), fragment
+
+    def _resolve_uncached(self, base_dir: str, path: str) -> Optional[Path]:
+        if path.startswith("/"):
+            target = os.path.join(self.out_root, path.lstrip("/"))
+        else:
+            target = os.path.join(base_dir, path)
+        target = os.path.normpath(os.path.abspath(target))
+        if self.snapshot.is_dir(target):
+            index_candidate = os.path.join(target, "index.html")
+            if self.snapshot.is_file(index_candidate):
+                target = index_candidate
+        elif not os.path.splitext(target)[1] and not self.snapshot.exists(target):
+            html_candidate = target + ".html"
+            if self.snapshot.is_file(html_candidate):
+                target = html_candidate
+        return Path(target) if self.snapshot.exists(target) else None
 
 
 def _path_label(path: Path, root: Path) -> str:
@@ -93,9 +125,9 @@ def _load_json(path: Path) -> dict:
 
 
 def _load_yaml(path: Path) -> list[dict]:
-    if not yaml:
+    if yaml_spec is None:
         raise RuntimeError("PyYAML is required to load experiences.yaml")
-    return yaml.safe_load(path.read_text(encoding="utf-8"))
+    return load_experiences_data(path)
 
 
 def _load_content_items(content_dir: Path) -> list[dict]:
@@ -139,6 +171,60 @@ def _dom_signature(soup: "BeautifulSoup") -> tuple[list[str], set[str], set[str]
     return tags, classes, ids, tag_counter
 
 
+@dataclass
+class PageFacts:
+    """What the checks need from one HTML page, extracted in a single parse."""
+
+    path: Path
+    ids: set[str]
+    anchors: list[str]
+    assets: list[str]
+    has_button: bool
+    has_css: bool
+    has_js: bool
+    # None when <body> is missing or has no data-routes-href.
+    routes_href: Optional[str]
+    title: str
+    meta_contents: list[str]
+    # <meta http-equiv="refresh"> stubs that forward old URLs to the real page.
+    redirect: bool
+    signature: tuple[list[str], set[str], set[str], Counter]
+    sketch: TagSketch
+
+
+def extract_page_facts(path: Path) -> Optional[PageFacts]:
+    """Parse ``path`` once and keep only the facts used by the checks (None if unparsable)."""
+
+    soup = _soup_from_html(path)
+    if not soup:
+        return None
+    body = soup.body
+    signature = _dom_signature(soup)
+    return PageFacts(
+        path=path,
+        ids={tag["id"] for tag in soup.find_all(True) if "id" in tag.attrs},
+        anchors=[a_tag.get("href", "") for a_tag in soup.find_all("a", href=True)],
+        assets=[
+            tag.get("href") or tag.get("src")
+            for tag in list(soup.find_all("link", href=True)) + list(soup.find_all("script", src=True))
+        ],
+        has_button=bool(
+            soup.find(attrs={"data-action": "switch-experience"})
+            or soup.find(string=lambda s: s and "体験を切り替える" in s)
+        ),
+        has_css=any("switcher" in (link.get("href") or "") for link in soup.find_all("link", href=True)),
+        has_js=any("switcher" in (script.get("src") or "") for script in soup.find_all("script", src=True)),
+        routes_href=body.get("data-routes-href") if body and body.has_attr("data-routes-href") else None,
+        title=(soup.title.string or "").strip() if soup.title else "",
+        meta_contents=[meta.get("content") for meta in soup.find_all("meta") if meta.get("content")],
+        redirect=any(
+            (meta.get("http-equiv") or "").lower() == "refresh" for meta in soup.find_all("meta")
+        ),
+        signature=signature,
+        sketch=sketch_tags(signature[0]),
+    )
+
+
 @dataclass
 class Finding:
     severity: str
@@ -158,18 +244,23 @@ class Auditor:
         experiences_path: Optional[Path],
         content_dir: Path,
         report_dir: Path,
+        workers: Optional[int] = None,
     ) -> None:
         self.out_dir = out_dir
         self.routes_path = routes_path
         self.experiences_path = experiences_path
         self.content_dir = content_dir
         self.report_dir = report_dir
+        self.workers = workers
         self.findings: list[Finding] = []
         self.finding_counter = 1
         self.meta: dict = {}
         self.experiences: list[dict] = []
         self.content_items: list[dict] = []
         self.routes_payload: Optional[dict] = None
+        self.pages: dict[Path, Optional[PageFacts]] = {}
+        self.resolver: Optional[HrefResolver] = None
+        self.timings: dict[str, float] = {}
         self.parser = "beautifulsoup4" if BeautifulSoup else "html.parser (limited)"
 
     def add_finding(
@@ -220,6 +311,16 @@ class Auditor:
             "parser": self.parser,
         }
 
+    def snapshot_tree(self) -> None:
+        """List the output tree once; link and asset checks resolve against it."""
+
+        self.resolver = HrefResolver(self.out_dir)
+
+    def _resolve(self, base: Path, href: str) -> tuple[Optional[Path], Optional[str]]:
+        if self.resolver is None:
+            self.snapshot_tree()
+        return self.resolver.resolve(base, href)
+
     def _generated_experiences(self) -> list[dict]:
         return [exp for exp in self.experiences if exp.get("kind") == "generated"]
 
@@ -289,9 +390,7 @@ class Auditor:
                 route_path = payload.get(key)
                 if not route_path:
                     continue
-                resolved, _ = _resolve_local_path(
-                    self.out_dir / "dummy", route_path, self.out_dir
-                )
+                resolved, _ = self._resolve(self.out_dir / "dummy", route_path)
                 if not resolved:
                     self.add_finding(
                         severity="BLOCKER",
@@ -325,10 +424,8 @@ class Auditor:
                         )
             content_routes = payload.get("content", {}) or {}
             for slug, route_path in content_routes.items():
-                resolved, _ = _resolve_local_path(
-                    self.out_dir / "dummy", route_path, self.out_dir
-                )
-                if not resolved or not resolved.exists():
+                resolved, _ = self._resolve(self.out_dir / "dummy", route_path)
+                if not resolved:
                     self.add_finding(
                         severity="BLOCKER",
                         type_="ROUTES_MISMATCH",
@@ -374,26 +471,29 @@ class Auditor:
                 targets.append(home)
             if lst.exists():
                 targets.append(lst)
-            items = [item for item in self.content_items if item.get("experience") == exp["key"]]
-            if items:
-                slug = items[0].get("contentId")
-                detail = base / "posts" / slug / "index.html"
-                if detail.exists():
-                    targets.append(detail)
-        return targets
-
-    def _collect_ids(self, soup: "BeautifulSoup") -> set[str]:
-        ids: set[str] = set()
-        for tag in soup.find_all(True):
-            if "id" in tag.attrs:
-                ids.add(tag["id"])
-        return ids
+            targets.extend(
+                path for path in sorted(base.rglob("*.html")) if path not in (home, lst)
+            )
+        return list(dict.fromkeys(targets))
+
+    def parse_pages(self) -> None:
+        """Parse every audited page once; checks read the cached facts."""
+
+        targets = [path for path in self._html_targets() if path not in self.pages]
+        facts, report = map_paths(extract_page_facts, targets, label="audit-parse", workers=self.workers)
+        self.pages.update(zip(targets, facts))
+        self.meta["crawl"] = {"pages": len(self.pages), "workers": report.workers}
+
+    def _page(self, path: Path) -> Optional[PageFacts]:
+        if path not in self.pages:
+            self.pages[path] = extract_page_facts(path)
+        return self.pages[path]
 
     def crawl_links(self) -> None:
         targets = self._html_targets()
         for html_path in targets:
-            soup = _soup_from_html(html_path)
-            if not soup:
+            page = self._page(html_path)
+            if not page:
                 self.add_finding(
                     severity="MAJOR",
                     type_="PARSE_ERROR",
@@ -402,16 +502,15 @@ class Auditor:
                     suggested_next_step="Verify HTML is well-formed or rerun with beautifulsoup4 installed.",
                 )
                 continue
-            ids = self._collect_ids(soup)
-            for a_tag in soup.find_all("a", href=True):
-                href = a_tag.get("href", "")
+            ids = page.ids
+            for href in page.anchors:
                 if not href or href.startswith("javascript:"):
                     continue
                 parsed = urlparse(href)
                 fragment = parsed.fragment
                 if _is_external_href(href):
                     continue
-                target, frag = _resolve_local_path(html_path, href, self.out_dir)
+                target, frag = self._resolve(html_path, href)
                 if href.startswith("#"):
                     if fragment and fragment not in ids:
                         self.add_finding(
@@ -426,7 +525,7 @@ class Auditor:
                             suggested_next_step="Add the target id or update the anchor href.",
                         )
                     continue
-                if target is None or not target.exists():
+                if target is None:
                     self.add_finding(
                         severity="BLOCKER",
                         type_="BROKEN_LINK",
@@ -454,22 +553,10 @@ class Auditor:
     def check_switcher(self) -> None:
         targets = self._html_targets()
         for html_path in targets:
-            soup = _soup_from_html(html_path)
-            if not soup:
+            page = self._page(html_path)
+            if not page or page.redirect:
                 continue
-            body = soup.body
-            has_button = bool(
-                soup.find(attrs={"data-action": "switch-experience"})
-                or soup.find(string=lambda s: s and "体験を切り替える" in s)
-            )
-            has_css = any(
-                "switcher" in (link.get("href") or "")
-                for link in soup.find_all("link", href=True)
-            )
-            has_js = any(
-                "switcher" in (script.get("src") or "")
-                for script in soup.find_all("script", src=True)
-            )
+            has_button, has_css, has_js = page.has_button, page.has_css, page.has_js
             if not (has_button and has_css and has_js):
                 self.add_finding(
                     severity="MAJOR",
@@ -483,10 +570,10 @@ class Auditor:
                     },
                     suggested_next_step="Ensure legacy pages are patched and switcher assets are included.",
                 )
-            if body and body.has_attr("data-routes-href"):
-                routes_href = body.get("data-routes-href")
-                target, _ = _resolve_local_path(html_path, routes_href, self.out_dir)
-                if not target or not target.exists():
+            if page.routes_href is not None:
+                routes_href = page.routes_href
+                target, _ = self._resolve(html_path, routes_href)
+                if not target:
                     self.add_finding(
                         severity="BLOCKER",
                         type_="SWITCHER_CONFIG_INVALID",
@@ -508,46 +595,76 @@ class Auditor:
                 )
 
     def check_template_similarity(self) -> None:
-        homes: dict[str, tuple[list[str], set[str], set[str], Counter]] = {}
-        for exp in self._generated_experiences():
+        """Report experience pairs whose pages share a near-identical DOM structure.
+
+        Every crawled page of every generated experience takes part. Pages with
+        the same structure are collapsed first, then MinHash/LSH candidates are
+        confirmed with exact shingle Jaccard; each experience pair is reported
+        once, with its most similar pages.
+        """
+
+        if not self.pages:
+            self.parse_pages()
+        targets = self._html_targets()
+        generated = self._generated_experiences()
+        order = {exp["key"]: position for position, exp in enumerate(generated)}
+        # sketch -> experience -> first page with that structure (home pages come first).
+        structures: dict[TagSketch, dict[str, PageFacts]] = {}
+        for exp in generated:
             output_dir = exp.get("output_dir")
-            home_path = self.out_dir / output_dir / "index.html"
-            soup = _soup_from_html(home_path)
-            if soup:
-                homes[exp["key"]] = _dom_signature(soup)
-        keys = list(homes.keys())
-        for i, key_a in enumerate(keys):
-            for key_b in keys[i + 1 :]:
-                sig_a = homes[key_a]
-                sig_b = homes[key_b]
-                ratio = difflib.SequenceMatcher(
-                    None, sig_a[0], sig_b[0]
-                ).ratio()
-                if ratio >= 0.95:
-                    self.add_finding(
-                        severity="MAJOR",
-                        type_="TEMPLATES_NOT_DIFFERENT_ENOUGH",
-                        title=f"{key_a} and {key_b} home pages are structurally identical",
-                        evidence={
-                            "similarity": ratio,
-                            "tagsA": len(sig_a[0]),
-                            "tagsB": len(sig_b[0]),
-                            "classOverlap": len(sig_a[1].intersection(sig_b[1])),
-                            "idOverlap": len(sig_a[2].intersection(sig_b[2])),
-                            "tagCountsA": sig_a[3],
-                            "tagCountsB": sig_b[3],
-                        },
-                        suggested_next_step="Differentiate templates to match each experience concept (layout, component mix, or class structure).",
-                    )
+            if not output_dir:
+                continue
+            base = self.out_dir / output_dir
+            for path in targets:
+                if not path.is_relative_to(base):
+                    continue
+                page = self._page(path)
+                if page and not page.redirect:
+                    structures.setdefault(page.sketch, {}).setdefault(exp["key"], page)
+        sketches = list(structures)
+        matches = [(index, index, 1.0) for index in range(len(sketches))]
+        matches += near_duplicates(sketches, TEMPLATE_SIMILARITY_THRESHOLD)
+
+        best: dict[tuple[str, str], tuple[float, PageFacts, PageFacts]] = {}
+        for first, second, similarity in matches:
+            for key_a, page_a in structures[sketches[first]].items():
+                for key_b, page_b in structures[sketches[second]].items():
+                    if key_a == key_b:
+                        continue
+                    if order[key_a] > order[key_b]:
+                        key_a, key_b, page_a, page_b = key_b, key_a, page_b, page_a
+                    if similarity > best.get((key_a, key_b), (-1.0,))[0]:
+                        best[(key_a, key_b)] = (similarity, page_a, page_b)
+
+        for key_a, key_b in sorted(best, key=lambda pair: (order[pair[0]], order[pair[1]])):
+            similarity, page_a, page_b = best[(key_a, key_b)]
+            sig_a = page_a.signature
+            sig_b = page_b.signature
+            self.add_finding(
+                severity="MAJOR",
+                type_="TEMPLATES_NOT_DIFFERENT_ENOUGH",
+                title=f"{key_a} and {key_b} pages are structurally identical",
+                evidence={
+                    "similarity": similarity,
+                    "pages": [_path_label(page_a.path, self.out_dir), _path_label(page_b.path, self.out_dir)],
+                    "tagsA": len(sig_a[0]),
+                    "tagsB": len(sig_b[0]),
+                    "classOverlap": len(sig_a[1].intersection(sig_b[1])),
+                    "idOverlap": len(sig_a[2].intersection(sig_b[2])),
+                    "tagCountsA": sig_a[3],
+                    "tagCountsB": sig_b[3],
+                },
+                suggested_next_step="Differentiate templates to match each experience concept (layout, component mix, or class structure).",
+            )
 
     def check_missing_sections(self) -> None:
         required_ids = {"about", "episodes", "characters"}
         for exp in self._generated_experiences():
             home_path = self.out_dir / exp.get("output_dir", "") / "index.html"
-            soup = _soup_from_html(home_path)
-            if not soup:
+            page = self._page(home_path)
+            if not page:
                 continue
-            ids = self._collect_ids(soup)
+            ids = page.ids
             missing = sorted(required_ids - ids)
             if missing:
                 self.add_finding(
@@ -577,15 +694,11 @@ class Auditor:
                 continue
             for rel, page_type in (("index.html", "home"), ("list/index.html", "list")):
                 path = self.out_dir / output_dir / rel
-                soup = _soup_from_html(path)
-                if not soup:
+                page = self._page(path)
+                if not page:
                     continue
-                title_text = (soup.title.string or "").strip() if soup.title else ""
-                head_texts = [title_text]
-                for meta in soup.find_all("meta"):
-                    content_val = meta.get("content")
-                    if content_val:
-                        head_texts.append(content_val)
+                title_text = page.title
+                head_texts = [title_text, *page.meta_contents]
                 combined = " ".join(head_texts).lower()
                 expected = expected_labels.get(exp["key"], "")
                 hits = [alt for alt in alternative_labels.get(exp["key"], set()) if alt in combined]
@@ -619,18 +732,14 @@ class Auditor:
     def check_assets(self) -> None:
         targets = self._html_targets()
         for html_path in targets:
-            soup = _soup_from_html(html_path)
-            if not soup:
+            page = self._page(html_path)
+            if not page:
                 continue
-            asset_tags = list(soup.find_all("link", href=True)) + list(
-                soup.find_all("script", src=True)
-            )
-            for tag in asset_tags:
-                href = tag.get("href") or tag.get("src")
+            for href in page.assets:
                 if not href or _is_external_href(href):
                     continue
-                target, _ = _resolve_local_path(html_path, href, self.out_dir)
-                if not target or not target.exists():
+                target, _ = self._resolve(html_path, href)
+                if not target:
                     self.add_finding(
                         severity="BLOCKER",
                         type_="BROKEN_ASSET_REF",
@@ -689,6 +798,7 @@ class Auditor:
         payload = {
             "meta": self.meta,
             "summary": summary,
+            "timings": self.timings,
             "findings": [
                 {
                     "id": f.id,
@@ -724,6 +834,9 @@ class Auditor:
         ]
         for level in SEVERITY_ORDER:
             md_lines.append(f"| {level} | {summary.get(level, 0)} |")
+        md_lines.extend(["", "## Timings", "", "| Check | Seconds |", "| --- | ---: |"])
+        for name, seconds in self.timings.items():
+            md_lines.append(f"| {name} | {seconds:.3f} |")
         md_lines.extend(
             [
                 "",
@@ -748,18 +861,28 @@ class Auditor:
         md_path.write_text("\n".join(md_lines), encoding="utf-8")
         return json_path, md_path
 
+    def _timed(self, name: str, check: Callable[[], None]) -> None:
+        start = time.perf_counter()
+        check()
+        self.timings[name] = round(time.perf_counter() - start, 6)
+
     def run(self, command: str) -> tuple[Path, Path]:
         self.collect_meta(command)
         self.load_inputs()
-        self.check_generated_outputs()
-        self.check_routes()
-        self.check_content_assignment()
-        self.crawl_links()
-        self.check_switcher()
-        self.check_template_similarity()
-        self.check_missing_sections()
-        self.check_assets()
-        self.check_branding()
+        for check in (
+            self.snapshot_tree,
+            self.check_generated_outputs,
+            self.check_routes,
+            self.check_content_assignment,
+            self.parse_pages,
+            self.crawl_links,
+            self.check_switcher,
+            self.check_template_similarity,
+            self.check_missing_sections,
+            self.check_assets,
+            self.check_branding,
+        ):
+            self._timed(check.__name__, check)
         json_path, md_path = self.write_reports()
         self.print_top_findings()
         return json_path, md_path
@@ -790,6 +913,11 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
         default="reports",
         help="Directory to write audit reports.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for parsing pages (default: serial below 32 pages, else CPU count).",
+    )
     return parser.parse_args(argv)
 
 
@@ -807,6 +935,7 @@ def main(argv: Sequence[str] | None = None) -> int:
         experiences_path=experiences_path,
         content_dir=content_dir,
         report_dir=report_dir,
+        workers=args.workers,
     )
     json_path, md_path = auditor.run(
         command="python scripts/audit_generated_site.py "
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmark sitegen.dom_model.dom_to_html against the plain html.escape renderer."""
+
+from __future__ import annotations
+
+import argparse
+import html
+import sys
+import timeit
+from pathlib import Path
+from typing import List, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from sitegen.dom_model import DomContent, DomNode, dom_to_html  # noqa: E402
+
+
+def _reference_dom_to_html(dom: Sequence[DomNode]) -> str:
+    """Renderer as it was before the escape/attribute fast paths."""
+
+    def _attrs(attrs: dict) -> str:
+        if not attrs:
+            return ""
+        return " " + " ".join(f'{k}="{html.escape(v, quote=True)}"' for k, v in attrs.items())
+
+    def _children(children: Sequence[DomContent]) -> str:
+        return "".join(
+            _reference_dom_to_html([c]) if isinstance(c, DomNode) else html.escape(str(c))
+            for c in children
+        )
+
+    parts: List[str] = []
+    for node in dom:
+        attrs = _attrs(node.attrs)
+        if node.self_closing:
+            parts.append(f"<{node.tag}{attrs}/>")
+            continue
+        parts.append(f"<{node.tag}{attrs}>")
+        if node.raw_html is not None:
+            parts.append(node.raw_html)
+        elif node.text is not None:
+            parts.append(html.escape(node.text))
+        if node.children:
+            parts.append(_children(node.children))
+        parts.append(f"</{node.tag}>")
+    return "".join(parts)
+
+
+def _paragraph_heavy_dom(paragraphs: int) -> List[DomNode]:
+    dom: List[DomNode] = []
+    for index in range(paragraphs):
+        if index % 20 == 0:
+            dom.append(DomNode(tag="h2", attrs={"class": "mw-heading level-2"}, text=f"第{index // 20 + 1}章"))
+        children: List[DomContent] = ["凪は窓の外を見ていた。", "雨が止むまで、もう少しだけ。"]
+        if index % 10 == 0:
+            children.append(
+                DomNode(tag="a", attrs={"class": "mw-link", "href": f"../ep{index:02d}/"}, text="次へ")
+            )
+        if index % 50 == 0:
+            children.append("A & B <em>")
+        dom.append(DomNode(tag="p", attrs={"class": "mw-paragraph"}, children=children))
+    return dom
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    dom = _paragraph_heavy_dom(args.paragraphs)
+    if dom_to_html(dom) != _reference_dom_to_html(dom):
+        print("Output mismatch between dom_to_html and the reference renderer", file=sys.stderr)
+        return 1
+
+    reference = min(timeit.repeat(lambda: _reference_dom_to_html(dom), number=1, repeat=args.repeat))
+    current = min(timeit.repeat(lambda: dom_to_html(dom), number=1, repeat=args.repeat))
+    print(f"paragraphs={args.paragraphs}")
+    print(f"reference: {reference * 1000:.2f} ms")
+    print(f"dom_to_html: {current * 1000:.2f} ms")
+    print(f"speedup: {reference / current:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
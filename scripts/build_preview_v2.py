@@ -1,18 +1,38 @@
 #!/usr/bin/env python3
-"""Build nagi-s2 / nagi-s3 micro stores and HTML previews for v2 flow."""
+"""Build nagi-s2 / nagi-s3 micro stores and HTML previews for v2 flow.
+
+Each season runs markdown -> micro -> compile -> render in one process, and the
+seasons are built concurrently.
+"""
 
 from __future__ import annotations
 
 import argparse
+import os
 import shutil
-import subprocess
 import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+REPO_ROOT_STR = str(REPO_ROOT)
+if REPO_ROOT_STR not in sys.path:
+    sys.path.insert(0, REPO_ROOT_STR)
+
+from scripts.markdown_to_micro_v2 import build_micro_store  # noqa: E402
+from sitegen.build import BuildContext, build_site_from_micro_v2  # noqa: E402
+from sitegen.build_fingerprint import tree_digest  # noqa: E402
+from sitegen.cli_common import build_label, load_experiences, safe_git_sha, timestamp_for_build  # noqa: E402
+from sitegen.micro_store import MicroStore  # noqa: E402
+
+# Relative to REPO_ROOT, like the cli_build_site defaults; main() runs from there.
+DEFAULT_EXPERIENCES = Path("config/experiences.yaml")
+DEFAULT_SRC = Path("experience_src")
 
 
 @dataclass(frozen=True)
@@ -39,9 +59,12 @@ SEASONS: dict[str, SeasonSpec] = {
 }
 
 
-def _run(cmd: list[str]) -> None:
-    print("$ " + " ".join(cmd))
-    subprocess.run(cmd, check=True, cwd=REPO_ROOT)
+@dataclass(frozen=True)
+class PreviewResult:
+    key: str
+    episodes: int
+    files: int
+    elapsed: float
 
 
 def _count_episode_html(out_dir: Path, season: str) -> int:
@@ -54,6 +77,35 @@ def _clean_outputs(*paths: Path) -> None:
             shutil.rmtree(path)
 
 
+def _replace_dir(src: Path, dest: Path) -> None:
+    _clean_outputs(dest)
+    os.replace(src, dest)
+
+
+def _render_preview(
+    store: MicroStore,
+    out_root: Path,
+    *,
+    href_root: Path,
+    variant: str,
+    experiences_path: Path,
+    src_root: Path,
+    label: str | None,
+) -> int:
+    experiences = [exp for exp in load_experiences(experiences_path) if exp.key == variant]
+    if not experiences:
+        raise SystemExit(f"Unknown experience keys: {variant}")
+    ctx = BuildContext(src_root=src_root, out_root=out_root, href_root=href_root, build_label=label)
+    written = build_site_from_micro_v2(
+        micro_store_dir=store.root,
+        micro_store=store,
+        experiences=experiences,
+        ctx=ctx,
+        generate_shared=True,
+    )
+    return len(written)
+
+
 def build_preview_for_season(
     spec: SeasonSpec,
     *,
@@ -63,67 +115,90 @@ def build_preview_for_season(
     force: bool,
     clean_html: bool,
     alias_out: str | None,
-) -> None:
+    experiences_path: Path = DEFAULT_EXPERIENCES,
+    src_root: Path = DEFAULT_SRC,
+    git_sha: str | None = None,
+) -> PreviewResult:
+    """Run markdown -> micro -> compile -> render for one season in this process.
+
+    The micro store is streamed to ``spec.micro_out``, loaded once, and the
+    loaded store is rendered twice into sibling temporary directories as a determinism check
+    (like ``cli_build_site --deterministic --check``). The first run replaces
+    ``spec.html_out`` and the identical second run becomes the alias directory,
+    so the rendered output is never copied.
+    """
+
     if not spec.markdown.exists():
         raise FileNotFoundError(f"Markdown input not found: {spec.markdown}")
 
+    start = time.perf_counter()
     alias_dir = spec.html_out.parent / alias_out if alias_out else None
 
-    if force:
-        _clean_outputs(spec.micro_out)
     if clean_html:
         targets = (spec.html_out, alias_dir) if alias_dir else (spec.html_out,)
         _clean_outputs(*targets)
-    elif alias_dir and alias_dir.exists():
-        _clean_outputs(alias_dir)
-
-    micro_cmd = [
-        sys.executable,
-        str(REPO_ROOT / "scripts" / "markdown_to_micro_v2.py"),
-        "--input",
-        str(spec.markdown),
-        "--out",
-        str(spec.micro_out),
-        "--season",
-        spec.key,
-        "--variant",
-        variant,
-        "--expected-blocks",
-        str(expected_blocks),
-    ]
-    if force:
-        micro_cmd.append("--force")
-    for tag in extra_tags:
-        micro_cmd.extend(["--tag", tag])
-    _run(micro_cmd)
-
-    build_cmd = [
-        sys.executable,
-        "-m",
-        "sitegen.cli_build_site",
-        "--micro-store",
-        str(spec.micro_out),
-        "--experiences",
-        "config/experiences.yaml",
-        "--src",
-        "experience_src",
-        "--out",
-        str(spec.html_out),
-        "--shared",
-        "--deterministic",
-        "--check",
-        "--experience",
-        variant,
-    ]
-    _run(build_cmd)
-
-    episode_html = _count_episode_html(spec.html_out, spec.key)
-    print(f"[{spec.key}] episodes rendered: {episode_html} (expected {expected_blocks})")
 
+    build_micro_store(
+        input_path=spec.markdown,
+        out_dir=spec.micro_out,
+        season=spec.key,
+        variant=variant,
+        expected_blocks=expected_blocks,
+        extra_tags=extra_tags,
+        force=force,
+    )
+    store = MicroStore.load(spec.micro_out)
+    print(f"[{spec.key}] micro store synced to {spec.micro_out}")
+
+    label = build_label(timestamp_for_build(deterministic=True), git_sha, override=None)
+    spec.html_out.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=spec.html_out.parent, prefix=f".{spec.html_out.name}-") as tmp:
+        runs = [Path(tmp) / "run1", Path(tmp) / "run2"]
+        for run in runs:
+            files = _render_preview(
+                store,
+                run,
+                href_root=spec.html_out,
+                variant=variant,
+                experiences_path=experiences_path,
+                src_root=src_root,
+                label=label,
+            )
+        if tree_digest(runs[0]) != tree_digest(runs[1]):
+            raise SystemExit(f"[{spec.key}] Determinism check failed: outputs differ between runs")
+
+        _replace_dir(runs[0], spec.html_out)
+        if alias_dir:
+            _replace_dir(runs[1], alias_dir)
+
+    episodes = _count_episode_html(spec.html_out, spec.key)
+    print(f"[{spec.key}] episodes rendered: {episodes} (expected {expected_blocks})")
     if alias_dir:
-        _clean_outputs(alias_dir)
-        shutil.copytree(spec.html_out, alias_dir)
-        print(f"[{spec.key}] aliased output copied to {alias_dir}")
+        print(f"[{spec.key}] aliased output written to {alias_dir}")
+    return PreviewResult(key=spec.key, episodes=episodes, files=files, elapsed=time.perf_counter() - start)
+
+
+def build_previews(
+    specs: Iterable[SeasonSpec],
+    *,
+    workers: int | None = None,
+    **options,
+) -> list[PreviewResult]:
+    """Build several seasons concurrently, one worker process per season.
+
+    ``options`` are passed to ``build_preview_for_season``; results come back in
+    the order of ``specs``. With a single season or ``workers=1`` everything runs
+    in the current process.
+    """
+
+    ordered = list(specs)
+    options.setdefault("git_sha", safe_git_sha())
+    workers = max(1, min(workers or len(ordered), len(ordered)))
+    if workers == 1:
+        return [build_preview_for_season(spec, **options) for spec in ordered]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(build_preview_for_season, spec, **options) for spec in ordered]
+        return [future.result() for future in futures]
 
 
 def parse_args() -> argparse.Namespace:
@@ -146,13 +221,19 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--alias-out",
         default="generated",
-        help="Copy generated_v2 output into this sibling directory as an alias (default: generated).",
+        help="Also write the generated_v2 output into this sibling directory as an alias (default: generated).",
     )
     parser.add_argument(
         "--no-alias",
         action="store_true",
         help="Skip creating an alias copy of the generated output.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Seasons to build concurrently (default: one process per season; 1 builds serially).",
+    )
     return parser.parse_args()
 
 
@@ -161,17 +242,22 @@ def main() -> None:
     seasons = args.season or sorted(SEASONS.keys())
     alias_out = None if args.no_alias else (args.alias_out or None)
 
-    for season in seasons:
-        spec = SEASONS[season]
-        build_preview_for_season(
-            spec,
-            variant=args.variant,
-            expected_blocks=args.expected_blocks,
-            extra_tags=args.tags,
-            force=args.force,
-            clean_html=not args.no_clean_html,
-            alias_out=alias_out,
-        )
+    # Output hrefs and the default input paths are relative to the working directory.
+    os.chdir(REPO_ROOT)
+    start = time.perf_counter()
+    results = build_previews(
+        [SEASONS[season] for season in seasons],
+        workers=args.workers,
+        variant=args.variant,
+        expected_blocks=args.expected_blocks,
+        extra_tags=args.tags,
+        force=args.force,
+        clean_html=not args.no_clean_html,
+        alias_out=alias_out,
+    )
+    for result in results:
+        print(f"[{result.key}] {result.files} file(s), {result.episodes} episode(s) in {result.elapsed:.2f}s")
+    print(f"Built {len(results)} season(s) in {time.perf_counter() - start:.2f}s")
 
 
 if __name__ == "__main__":
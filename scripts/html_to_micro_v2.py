@@ -6,18 +6,29 @@ of the input HTML and emits a deterministic micro store compatible with the
 existing micro v2 loaders and validators. Only a lightweight subset of tags is
 handled (headings, paragraphs, list items, and links), but whitespace is
 normalized to keep fingerprints stable.
+
+The tree is built by ``html.parser`` unless another installed builder is
+chosen with ``--parser`` (block ids depend on the parsed DOM, so the default
+does not vary with the environment) and walked once:
+element text comes from one flat list of strings and the enclosing link href
+from a stack, instead of ``get_text``/``find_parent`` per block. ``--input-dir``
+and ``--glob`` convert many pages into one store in parallel, storing blocks
+shared between pages (site chrome, footers, repeated links) once.
 """
 
 from __future__ import annotations
 
 import argparse
+import glob
 import html as html_lib
+import importlib.util
+import os
 import re
-import shutil
 import sys
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Dict, Iterator, List
 
 from bs4 import BeautifulSoup, NavigableString, Tag
 
@@ -27,12 +38,20 @@ if REPO_ROOT_STR not in sys.path:
     sys.path.insert(0, REPO_ROOT_STR)
 
 from sitegen.compile_pipeline import compile_store_v2
-from sitegen.io_utils import write_json_stable
-from sitegen.micro_ids import block_id_from_block
-from sitegen.micro_store import MicroStore
+from sitegen.io_utils import stable_json_dumps
+from sitegen.legacy_pipeline import map_paths
+from sitegen.micro_ids import BLOCK_ID_SCHEMES, DEFAULT_BLOCK_ID_SCHEME, block_id_from_block, index_with_digests
+from sitegen.micro_store import MicroStore, store_block_id_scheme, sync_micro_store
 
 
 WHITESPACE_RE = re.compile(r"\s+")
+SLUG_RE = re.compile(r"[^\w]+")
+
+# BeautifulSoup tree builders; html.parser is the default because it is always available.
+DEFAULT_PARSER = "html.parser"
+PARSER_BACKENDS = (DEFAULT_PARSER, "lxml", "html5lib")
+# Strings that Tag.get_text() includes for ordinary tags (no comments, scripts, ...).
+_TEXT_STRING_TYPES = frozenset(Tag.MAIN_CONTENT_STRING_TYPES)
 
 
 @dataclass
@@ -43,6 +62,18 @@ class BuildOptions:
     variant: str
     page_type: str
     force: bool
+    parser: str = DEFAULT_PARSER
+    scheme: str | None = None
+
+
+def resolve_parser(name: str = DEFAULT_PARSER) -> str:
+    """Return the BeautifulSoup tree builder for ``name``, checking that it is installed."""
+
+    if name not in PARSER_BACKENDS:
+        raise SystemExit(f"Unknown parser {name!r}; choose from {', '.join(PARSER_BACKENDS)}")
+    if name != DEFAULT_PARSER and importlib.util.find_spec(name) is None:
+        raise SystemExit(f"Parser backend {name!r} is not installed")
+    return name
 
 
 def _normalize_text(text: str) -> str:
@@ -59,13 +90,6 @@ def _select_content_root(soup: BeautifulSoup) -> Tag:
     return soup
 
 
-def _ancestor_href(tag: Tag) -> str | None:
-    anchor = tag if tag.name == "a" else tag.find_parent("a", href=True)
-    if isinstance(anchor, Tag) and anchor.has_attr("href"):
-        return anchor.get("href") or None
-    return None
-
-
 def _append_text_inline(inlines: List[Dict[str, str]], text: str) -> None:
     if not text:
         return
@@ -87,7 +111,66 @@ def _parts_to_inlines(parts: List[tuple[str, str, str | None]], href_hint: str |
     return inlines or [{"type": "Text", "text": ""}]
 
 
-def _inlines_from_tag(tag: Tag, *, href_hint: str | None = None) -> List[Dict[str, str]]:
+class _PageWalk:
+    """One pre-order pass over the content root.
+
+    Every stripped text string is appended to ``strings`` and each tag records
+    the ``[start, end)`` slice it covers, so a tag's ``get_text(" ", strip=True)``
+    is a join over that slice. The nearest enclosing ``<a href>`` is kept on a
+    stack while descending.
+    """
+
+    def __init__(self, content_root: Tag) -> None:
+        self.strings: List[str] = []
+        self.spans: Dict[int, tuple[int, int]] = {}
+        # (tag, href of the nearest enclosing <a href>) for block candidates, in document order.
+        self.candidates: List[tuple[Tag, str | None]] = []
+        self.tags: List[Tag] = []
+        anchor = content_root.find_parent("a", href=True)
+        self._walk(content_root, anchor.get("href") or None if anchor is not None else None)
+
+    def _walk(self, root: Tag, root_href: str | None) -> None:
+        href_stack: List[str | None] = [root_href]
+        # Entries are (node, is_root) on the way down and (tag, None) on the way up.
+        stack: List[tuple[object, bool | None]] = [(root, True)]
+        while stack:
+            node, entering = stack.pop()
+            if entering is None:
+                start = self.spans[id(node)][0]
+                self.spans[id(node)] = (start, len(self.strings))
+                if node.name == "a" and node.has_attr("href"):
+                    href_stack.pop()
+                continue
+            if isinstance(node, NavigableString):
+                if type(node) in _TEXT_STRING_TYPES:
+                    stripped = node.strip()
+                    if stripped:
+                        self.strings.append(stripped)
+                continue
+            if not isinstance(node, Tag):
+                continue
+
+            name = node.name.lower()
+            if not entering:
+                if name in {"h1", "h2", "h3", "p", "li", "a"}:
+                    self.candidates.append((node, href_stack[-1]))
+                if "tag" in (node.get("class") or ()):
+                    self.tags.append(node)
+            self.spans[id(node)] = (len(self.strings), len(self.strings))
+            if name == "a" and node.has_attr("href"):
+                href_stack.append(node.get("href") or None)
+            stack.append((node, None))
+            stack.extend((child, False) for child in reversed(node.contents))
+
+    def text(self, tag: Tag) -> str:
+        if tag.interesting_string_types not in (None, _TEXT_STRING_TYPES):
+            # <rt>, <script>, <template>, ... only collect their own string class.
+            return _normalize_text(tag.get_text(" ", strip=True))
+        start, end = self.spans[id(tag)]
+        return _normalize_text(" ".join(self.strings[start:end]))
+
+
+def _inlines_from_tag(tag: Tag, walk: _PageWalk, *, href_hint: str | None = None) -> List[Dict[str, str]]:
     parts: List[tuple[str, str, str | None]] = []
     for child in tag.contents:
         if isinstance(child, NavigableString):
@@ -104,19 +187,19 @@ def _inlines_from_tag(tag: Tag, *, href_hint: str | None = None) -> List[Dict[st
             parts.append(("text", " ", None))
             continue
         if name == "a":
-            label = _normalize_text(child.get_text(" ", strip=True))
+            label = walk.text(child)
             href = child.get("href") or href_hint
             if label:
                 parts.append(("link", label, href))
             continue
-        text = _normalize_text(child.get_text(" ", strip=True))
+        text = walk.text(child)
         if text:
             parts.append(("text", text, None))
     return _parts_to_inlines(parts, href_hint)
 
 
-def _heading_block(tag: Tag) -> dict | None:
-    text = _normalize_text(tag.get_text(" ", strip=True))
+def _heading_block(tag: Tag, walk: _PageWalk) -> dict | None:
+    text = walk.text(tag)
     if not text:
         return None
     level = 1
@@ -127,16 +210,15 @@ def _heading_block(tag: Tag) -> dict | None:
     return {"type": "Heading", "level": level, "text": text}
 
 
-def _paragraph_block(tag: Tag) -> dict | None:
-    text = _normalize_text(tag.get_text(" ", strip=True))
-    if not text:
+def _paragraph_block(tag: Tag, walk: _PageWalk, href_hint: str | None) -> dict | None:
+    if not walk.text(tag):
         return None
-    inlines = _inlines_from_tag(tag, href_hint=_ancestor_href(tag))
+    inlines = _inlines_from_tag(tag, walk, href_hint=href_hint)
     return {"type": "Paragraph", "inlines": inlines}
 
 
-def _list_item_block(tag: Tag) -> dict | None:
-    block = _paragraph_block(tag)
+def _list_item_block(tag: Tag, walk: _PageWalk, href_hint: str | None) -> dict | None:
+    block = _paragraph_block(tag, walk, href_hint)
     if not block:
         return None
     inlines = block.get("inlines", [])
@@ -146,32 +228,28 @@ def _list_item_block(tag: Tag) -> dict | None:
     return block
 
 
-def _link_block(tag: Tag) -> dict | None:
+def _link_block(tag: Tag, walk: _PageWalk) -> dict | None:
     href = tag.get("href")
     if not href:
         return None
-    label = _normalize_text(tag.get_text(" ", strip=True))
+    label = walk.text(tag)
     if not label:
         return None
     return {"type": "Link", "label": label, "href": href}
 
 
-def _iter_blocks(content_root: Tag) -> Iterable[dict]:
-    for element in content_root.descendants:
-        if not isinstance(element, Tag):
-            continue
+def _iter_blocks(walk: _PageWalk) -> Iterator[dict]:
+    for element, enclosing_href in walk.candidates:
         name = element.name.lower()
-        if name in {"script", "style"}:
-            continue
         block: dict | None = None
         if name in {"h1", "h2", "h3"}:
-            block = _heading_block(element)
+            block = _heading_block(element, walk)
         elif name == "p":
-            block = _paragraph_block(element)
+            block = _paragraph_block(element, walk, enclosing_href)
         elif name == "li":
-            block = _list_item_block(element)
+            block = _list_item_block(element, walk, enclosing_href)
         elif name == "a":
-            block = _link_block(element)
+            block = _link_block(element, walk)
         if block:
             yield block
 
@@ -193,35 +271,26 @@ def _block_text(block: dict) -> str:
     return ""
 
 
-def build_micro_store_from_html(opts: BuildOptions) -> None:
-    if not opts.input_path.exists():
-        raise FileNotFoundError(f"Input HTML not found: {opts.input_path}")
-
-    html = opts.input_path.read_text(encoding="utf-8")
-    soup = BeautifulSoup(html, "html.parser")
-    content_root = _select_content_root(soup)
-
-    if opts.out_dir.exists():
-        if not opts.force:
-            raise SystemExit(f"Output directory already exists: {opts.out_dir}. Use --force to overwrite.")
-        shutil.rmtree(opts.out_dir)
+def convert_html_page(
+    html: str,
+    *,
+    entity_id: str,
+    variant: str,
+    page_type: str,
+    parser: str = DEFAULT_PARSER,
+    scheme: str = DEFAULT_BLOCK_ID_SCHEME,
+) -> tuple[dict, Dict[str, dict]]:
+    """Convert one HTML document into an entity and its blocks (by id, in first-use order)."""
 
-    blocks_dir = opts.out_dir / "blocks"
-    entities_dir = opts.out_dir / "entities"
-    blocks_dir.mkdir(parents=True, exist_ok=True)
-    entities_dir.mkdir(parents=True, exist_ok=True)
+    soup = BeautifulSoup(html, resolve_parser(parser))
+    walk = _PageWalk(_select_content_root(soup))
 
     blocks_by_id: Dict[str, dict] = {}
-    block_ids: List[str] = []
     block_refs: List[str] = []
-
-    for block in _iter_blocks(content_root):
-        block_id = block_id_from_block(block)
-        block_with_id = {"id": block_id, **block}
+    for block in _iter_blocks(walk):
+        block_id = block_id_from_block(block, scheme=scheme)
         if block_id not in blocks_by_id:
-            blocks_by_id[block_id] = block_with_id
-            block_ids.append(block_id)
-            write_json_stable(blocks_dir / f"{block_id}.json", block_with_id)
+            blocks_by_id[block_id] = {"id": block_id, **block}
         block_refs.append(block_id)
 
     title = _normalize_text(soup.title.get_text() if soup.title else "")
@@ -240,28 +309,187 @@ def build_micro_store_from_html(opts: BuildOptions) -> None:
             if description:
                 break
 
-    tags = []
-    for tag in content_root.select(".tag"):
-        text = _normalize_text(tag.get_text(" ", strip=True))
-        if text:
-            tags.append(text)
+    tags = [text for text in (walk.text(tag) for tag in walk.tags) if text]
 
     entity = {
-        "id": opts.entity_id,
-        "variant": opts.variant,
-        "type": opts.page_type,
+        "id": entity_id,
+        "variant": variant,
+        "type": page_type,
         "meta": {
-            "title": title or opts.entity_id,
-            "summary": description or title or opts.entity_id,
+            "title": title or entity_id,
+            "summary": description or title or entity_id,
             "tags": tags,
         },
         "body": {"blockRefs": block_refs},
         "relations": {},
     }
+    return entity, blocks_by_id
+
+
+def _write_store(out_dir: Path, entities: List[dict], blocks_by_id: Dict[str, dict], *, force: bool) -> MicroStore:
+    if out_dir.exists() and not force:
+        raise SystemExit(f"Output directory already exists: {out_dir}. Use --force to overwrite.")
+    index = {"entity_ids": [entity["id"] for entity in entities], "block_ids": list(blocks_by_id)}
+    index = index_with_digests(index, entities, blocks_by_id)
+    sync_micro_store(out_dir, entities, blocks_by_id, index)
+    return MicroStore(
+        root=out_dir,
+        blocks_by_id=blocks_by_id,
+        entities_by_id={entity["id"]: entity for entity in entities},
+        index=index,
+    )
+
+
+def build_micro_store_from_html(opts: BuildOptions) -> MicroStore:
+    if not opts.input_path.exists():
+        raise FileNotFoundError(f"Input HTML not found: {opts.input_path}")
+
+    entity, blocks_by_id = convert_html_page(
+        opts.input_path.read_text(encoding="utf-8"),
+        entity_id=opts.entity_id,
+        variant=opts.variant,
+        page_type=opts.page_type,
+        parser=opts.parser,
+        scheme=store_block_id_scheme(opts.out_dir, opts.scheme),
+    )
+    return _write_store(opts.out_dir, [entity], blocks_by_id, force=opts.force)
+
 
-    write_json_stable(entities_dir / f"{opts.entity_id}.json", entity)
-    index = {"entity_ids": [opts.entity_id], "block_ids": block_ids}
-    write_json_stable(opts.out_dir / "index.json", index)
+def page_entity_id(path: Path, root: Path, prefix: str) -> str:
+    """Entity id for a page in a batch: ``<prefix>-<slug of its path under root>``.
+
+    The slug keeps Unicode word characters so non-ASCII page names stay distinct.
+    """
+
+    slug = SLUG_RE.sub("-", path.relative_to(root).with_suffix("").as_posix().lower()).strip("-")
+    return f"{prefix}-{slug}" if prefix else slug
+
+
+def _convert_page_file(
+    path: Path, *, root: Path, prefix: str, variant: str, page_type: str, parser: str, scheme: str
+) -> tuple[dict, Dict[str, dict]]:
+    return convert_html_page(
+        path.read_text(encoding="utf-8"),
+        entity_id=page_entity_id(path, root, prefix),
+        variant=variant,
+        page_type=page_type,
+        parser=parser,
+        scheme=scheme,
+    )
+
+
+@dataclass
+class DedupeReport:
+    """How much block storage a batch saved by sharing blocks between pages."""
+
+    pages: int = 0
+    block_refs: int = 0
+    unique_blocks: int = 0
+    shared_blocks: int = 0
+    referenced_bytes: int = 0
+    stored_bytes: int = 0
+
+    @property
+    def block_ratio(self) -> float:
+        return 1 - self.unique_blocks / self.block_refs if self.block_refs else 0.0
+
+    @property
+    def byte_ratio(self) -> float:
+        return 1 - self.stored_bytes / self.referenced_bytes if self.referenced_bytes else 0.0
+
+    def format(self) -> str:
+        return (
+            f"{self.pages} page(s), {self.block_refs} block ref(s) -> {self.unique_blocks} unique block(s) "
+            f"({self.block_ratio:.1%} deduplicated, {self.shared_blocks} shared by several pages); "
+            f"{self.referenced_bytes} -> {self.stored_bytes} bytes ({self.byte_ratio:.1%} saved)"
+        )
+
+
+def expand_html_inputs(patterns: List[str]) -> tuple[List[Path], Path]:
+    """Expand glob patterns (``**`` allowed) to sorted HTML files and their common root."""
+
+    paths = sorted(
+        {Path(match) for pattern in patterns for match in glob.glob(pattern, recursive=True) if Path(match).is_file()}
+    )
+    if not paths:
+        raise SystemExit(f"No HTML files match {', '.join(patterns)}")
+    root = Path(os.path.commonpath([str(path.parent) for path in paths]))
+    return paths, root
+
+
+def build_micro_store_from_html_pages(
+    paths: List[Path],
+    out_dir: Path,
+    *,
+    root: Path,
+    variant: str,
+    page_type: str,
+    entity_prefix: str,
+    force: bool,
+    parser: str = DEFAULT_PARSER,
+    workers: int | None = None,
+    progress: bool = False,
+    scheme: str | None = None,
+) -> tuple[MicroStore, DedupeReport]:
+    """Convert many HTML pages into one micro store with blocks shared across pages.
+
+    Pages are parsed in worker processes and merged in the given order, so the
+    store is identical for any worker count. Entity ids come from each page's
+    path under ``root``. Identical blocks (site chrome, footers, repeated
+    links) have the same fingerprint id and are stored once. Block ids use
+    ``scheme``, defaulting to the one ``out_dir`` already uses.
+    """
+
+    convert = partial(
+        _convert_page_file,
+        root=root,
+        prefix=entity_prefix,
+        variant=variant,
+        page_type=page_type,
+        parser=resolve_parser(parser),
+        scheme=store_block_id_scheme(out_dir, scheme),
+    )
+    results, _ = map_paths(convert, paths, label="html-to-micro", workers=workers, progress=progress)
+
+    entities: List[dict] = []
+    blocks_by_id: Dict[str, dict] = {}
+    pages_per_block: Dict[str, int] = {}
+    seen: Dict[str, Path] = {}
+    for path, (entity, page_blocks) in zip(paths, results):
+        if entity["id"] in seen:
+            raise SystemExit(f"Entity id {entity['id']} is used by both {seen[entity['id']]} and {path}")
+        seen[entity["id"]] = path
+        entities.append(entity)
+        for block_id, block in page_blocks.items():
+            blocks_by_id.setdefault(block_id, block)
+            pages_per_block[block_id] = pages_per_block.get(block_id, 0) + 1
+
+    sizes = {block_id: len(stable_json_dumps(block).encode("utf-8")) for block_id, block in blocks_by_id.items()}
+    refs = [block_id for entity in entities for block_id in entity["body"]["blockRefs"]]
+    report = DedupeReport(
+        pages=len(entities),
+        block_refs=len(refs),
+        unique_blocks=len(blocks_by_id),
+        shared_blocks=sum(1 for count in pages_per_block.values() if count > 1),
+        referenced_bytes=sum(sizes[block_id] for block_id in refs),
+        stored_bytes=sum(sizes.values()),
+    )
+    return _write_store(out_dir, entities, blocks_by_id, force=force), report
+
+
+def build_micro_store_from_html_dir(
+    input_dir: Path,
+    out_dir: Path,
+    **options,
+) -> tuple[MicroStore, DedupeReport]:
+    """Convert every ``*.html`` under ``input_dir`` (see ``build_micro_store_from_html_pages``)."""
+
+    if not input_dir.is_dir():
+        raise FileNotFoundError(f"Input directory not found: {input_dir}")
+    paths = sorted(input_dir.rglob("*.html"))
+    if not paths:
+        raise SystemExit(f"No HTML files found under {input_dir}")
+    return build_micro_store_from_html_pages(paths, out_dir, root=input_dir, **options)
 
 
 def _write_compiled_outputs(micro_dir: Path, out_dir: Path) -> None:
@@ -293,30 +521,82 @@ def _write_compiled_outputs(micro_dir: Path, out_dir: Path) -> None:
 
 def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Convert HTML to micro store (v2)")
-    parser.add_argument("--input", required=True, type=Path, help="Input HTML file (e.g., etc/index.html)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", type=Path, help="Input HTML file (e.g., etc/index.html)")
+    source.add_argument(
+        "--input-dir",
+        type=Path,
+        help="Convert every *.html under this directory into one store (one entity per page)",
+    )
+    source.add_argument(
+        "--glob",
+        action="append",
+        dest="globs",
+        metavar="PATTERN",
+        help="Convert the HTML files matching this glob (repeatable, ** allowed) into one store",
+    )
     parser.add_argument("--out", required=True, type=Path, help="Output directory for the micro store")
     parser.add_argument("--entity-id", default="etc-home", help="Entity id to assign to the generated page")
     parser.add_argument("--variant", default="etc", help="Variant to embed in the entity")
     parser.add_argument("--page-type", default="page", help="Page type value for the entity")
     parser.add_argument("--compiled-out", type=Path, help="Optional output directory for compiled HTML + micro.css")
     parser.add_argument("--force", action="store_true", help="Overwrite the output directory if it exists")
+    parser.add_argument(
+        "--parser",
+        choices=PARSER_BACKENDS,
+        default=DEFAULT_PARSER,
+        help="BeautifulSoup tree builder (default: html.parser; lxml/html5lib are opt-in and may change block ids)",
+    )
+    parser.add_argument(
+        "--entity-prefix",
+        default=None,
+        help="Batch modes: prefix for entity ids derived from page paths (default: the variant)",
+    )
+    parser.add_argument(
+        "--id-scheme",
+        choices=sorted(BLOCK_ID_SCHEMES),
+        default=None,
+        help="Block id scheme (default: the scheme the --out store already uses, else v1)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Batch modes: worker processes (default: auto)")
+    parser.add_argument("--progress", action="store_true", help="Batch modes: report progress and timing on stderr")
     return parser.parse_args(argv)
 
 
 def main(argv: list[str] | None = None) -> None:
     args = _parse_args(argv)
-    opts = BuildOptions(
-        input_path=args.input,
-        out_dir=args.out,
-        entity_id=args.entity_id,
-        variant=args.variant,
-        page_type=args.page_type,
-        force=args.force,
-    )
-    build_micro_store_from_html(opts)
+    if args.input_dir or args.globs:
+        options = dict(
+            variant=args.variant,
+            page_type=args.page_type,
+            entity_prefix=args.variant if args.entity_prefix is None else args.entity_prefix,
+            force=args.force,
+            parser=args.parser,
+            workers=args.workers,
+            progress=args.progress,
+            scheme=args.id_scheme,
+        )
+        if args.input_dir:
+            _, report = build_micro_store_from_html_dir(args.input_dir, args.out, **options)
+        else:
+            paths, root = expand_html_inputs(args.globs)
+            _, report = build_micro_store_from_html_pages(paths, args.out, root=root, **options)
+        print(report.format())
+    else:
+        opts = BuildOptions(
+            input_path=args.input,
+            out_dir=args.out,
+            entity_id=args.entity_id,
+            variant=args.variant,
+            page_type=args.page_type,
+            force=args.force,
+            parser=args.parser,
+            scheme=args.id_scheme,
+        )
+        build_micro_store_from_html(opts)
     if args.compiled_out:
-        _write_compiled_outputs(opts.out_dir, args.compiled_out)
-    print(f"Wrote micro store to {opts.out_dir}")
+        _write_compiled_outputs(args.out, args.compiled_out)
+    print(f"Wrote micro store to {args.out}")
 
 
 if __name__ == "__main__":
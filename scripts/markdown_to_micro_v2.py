@@ -10,19 +10,25 @@ from __future__ import annotations
 
 import argparse
 import re
-import shutil
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, Iterator, List
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 REPO_ROOT_STR = str(REPO_ROOT)
 if REPO_ROOT_STR not in sys.path:
     sys.path.insert(0, REPO_ROOT_STR)
 
-from sitegen.io_utils import write_json_stable
-from sitegen.micro_ids import block_id_from_block
+from sitegen.micro_ids import BLOCK_ID_SCHEMES, block_id_from_block
+from sitegen.micro_store import (
+    MicroStoreDiff,
+    SyncReport,
+    diff_entity_digests,
+    read_entity_digests,
+    store_block_id_scheme,
+    stream_micro_store,
+)
 
 
 DEFAULT_EXPECTED_BLOCKS = 13
@@ -53,12 +59,18 @@ def summarize_body(body: str, limit: int = 140) -> str:
     return collapsed[:limit]
 
 
-def extract_text_fences(markdown: str) -> List[str]:
-    blocks: List[str] = []
+def iter_text_fences(lines: Iterable[str]) -> Iterator[Episode]:
+    """Yield the ``Episode`` of each ```text fence as soon as its closing fence is read.
+
+    ``lines`` may keep their trailing newline (as when iterating a file opened
+    in text mode); only the body of the fence being read is held in memory.
+    """
+
     in_block = False
     current: List[str] = []
 
-    for line in _normalize_newlines(markdown).split("\n"):
+    for raw_line in lines:
+        line = raw_line[:-1] if raw_line.endswith("\n") else raw_line
         stripped = line.strip()
         if not in_block:
             if stripped.startswith("```text"):
@@ -67,7 +79,7 @@ def extract_text_fences(markdown: str) -> List[str]:
             continue
 
         if stripped == "```":
-            blocks.append("\n".join(current))
+            yield _split_title_and_body("\n".join(current))
             in_block = False
             current = []
             continue
@@ -77,7 +89,9 @@ def extract_text_fences(markdown: str) -> List[str]:
     if in_block:
         raise ValueError("Unterminated ```text fenced block detected")
 
-    return blocks
+
+def extract_text_fences(markdown: str) -> List[Episode]:
+    return list(iter_text_fences(_normalize_newlines(markdown).split("\n")))
 
 
 def _split_title_and_body(block_text: str) -> Episode:
@@ -99,9 +113,16 @@ def _split_title_and_body(block_text: str) -> Episode:
     return Episode(title=title, body=body)
 
 
-def _build_block(normalized_body: str) -> dict:
+def _iter_file_fences(input_path: Path) -> Iterator[Episode]:
+    # Text mode uses universal newlines, so CRLF and CR input split exactly like
+    # _normalize_newlines would.
+    with input_path.open(encoding="utf-8") as handle:
+        yield from iter_text_fences(handle)
+
+
+def _build_block(normalized_body: str, scheme: str) -> dict:
     block = {"type": "Markdown", "source": normalized_body}
-    block_id = block_id_from_block(block)
+    block_id = block_id_from_block(block, scheme=scheme)
     return {"id": block_id, **block}
 
 
@@ -132,66 +153,119 @@ def _build_entity(
     }
 
 
-def build_micro_store(
+def _check_fence_count(input_path: Path, expected_blocks: int) -> None:
+    # A streaming pass of its own, so a bad input fails before anything is written.
+    found = sum(1 for _ in _iter_file_fences(input_path))
+    if found != expected_blocks:
+        raise SystemExit(
+            f"Expected {expected_blocks} fenced blocks but found {found} in {input_path}"
+        )
+
+
+def iter_markdown_entities(
     *,
     input_path: Path,
-    out_dir: Path,
     season: str,
     variant: str,
-    expected_blocks: int,
     extra_tags: Iterable[str],
-    force: bool,
-) -> None:
-    markdown = input_path.read_text(encoding="utf-8")
-    fences = extract_text_fences(markdown)
+    scheme: str,
+) -> Iterator[tuple[dict, list[dict]]]:
+    """Yield ``(entity, [block])`` for each episode as soon as its fence closes."""
 
-    if len(fences) != expected_blocks:
-        raise SystemExit(
-            f"Expected {expected_blocks} fenced blocks but found {len(fences)} in {input_path}"
-        )
-
-    if out_dir.exists():
-        if not force:
-            raise SystemExit(f"Output directory already exists: {out_dir}. Use --force to overwrite.")
-        shutil.rmtree(out_dir)
-
-    entities_dir = out_dir / "entities"
-    blocks_dir = out_dir / "blocks"
-    entities_dir.mkdir(parents=True, exist_ok=True)
-    blocks_dir.mkdir(parents=True, exist_ok=True)
-
-    entities: list[dict] = []
-    block_ids: list[str] = []
-    blocks_by_id: dict[str, dict] = {}
-
-    for idx, block_text in enumerate(fences, start=1):
-        episode = _split_title_and_body(block_text)
+    for number, episode in enumerate(_iter_file_fences(input_path), start=1):
         normalized_body = normalize_body_text(episode.body)
-        block = _build_block(normalized_body)
-        block_id = block["id"]
+        block = _build_block(normalized_body, scheme)
         entity = _build_entity(
             season=season,
-            index=idx,
+            index=number,
             title=episode.title,
             body=normalized_body,
-            block_id=block_id,
+            block_id=block["id"],
             variant=variant,
             extra_tags=extra_tags,
         )
+        yield entity, [block]
 
-        if block_id not in blocks_by_id:
-            blocks_by_id[block_id] = block
-            block_ids.append(block_id)
-            write_json_stable(blocks_dir / f"{block_id}.json", block)
-        write_json_stable(entities_dir / f"{entity['id']}.json", entity)
 
-        entities.append(entity)
+def build_micro_store(
+    *,
+    input_path: Path,
+    out_dir: Path,
+    season: str,
+    variant: str,
+    expected_blocks: int,
+    extra_tags: Iterable[str],
+    force: bool,
+    scheme: str | None = None,
+) -> dict:
+    """Stream ``input_path`` into the micro store at ``out_dir`` and return its index.
+
+    The input is read twice, one fence at a time: once to check the fence
+    count, then to write each episode's block and entity as its fence closes.
+    No store is built in memory; only ids and digests are kept until
+    ``index.json`` is committed last (see ``stream_micro_store``).
+    """
+
+    _check_fence_count(input_path, expected_blocks)
+    if out_dir.exists() and not force:
+        raise SystemExit(f"Output directory already exists: {out_dir}. Use --force to overwrite.")
+
+    # --force syncs in place: unchanged files are kept and index.json is replaced last.
+    items = iter_markdown_entities(
+        input_path=input_path,
+        season=season,
+        variant=variant,
+        extra_tags=extra_tags,
+        scheme=store_block_id_scheme(out_dir, scheme),
+    )
+    index, _ = stream_micro_store(out_dir, items)
+    return index
 
-    index = {
-        "entity_ids": [entity["id"] for entity in entities],
-        "block_ids": block_ids,
-    }
-    write_json_stable(out_dir / "index.json", index)
+
+def update_micro_store(
+    *,
+    input_path: Path,
+    out_dir: Path,
+    season: str,
+    variant: str,
+    expected_blocks: int,
+    extra_tags: Iterable[str],
+    scheme: str | None = None,
+) -> tuple[dict, MicroStoreDiff, SyncReport]:
+    """Incrementally bring ``out_dir`` up to date with ``input_path``.
+
+    Episodes are compared by the entity digests recorded in the existing
+    ``index.json``; entity files of unchanged episodes are not rewritten or even
+    read back, and blocks that already exist are kept since their file names are
+    content hashes. Blocks no longer referenced are removed. A missing output
+    directory is built from scratch. Returns the new index, the episode changes
+    and the file report.
+    """
+
+    _check_fence_count(input_path, expected_blocks)
+    previous = read_entity_digests(out_dir) if (out_dir / "index.json").exists() else {}
+    items = iter_markdown_entities(
+        input_path=input_path,
+        season=season,
+        variant=variant,
+        extra_tags=extra_tags,
+        scheme=store_block_id_scheme(out_dir, scheme),
+    )
+    index, report = stream_micro_store(out_dir, items, previous_digests=previous)
+    return index, diff_entity_digests(previous, index["entity_digests"]), report
+
+
+def format_episode_changes(changes: MicroStoreDiff, report: SyncReport) -> str:
+    lines = [
+        f"Episodes: {len(changes.added)} added, {len(changes.changed)} changed, "
+        f"{len(changes.removed)} removed"
+    ]
+    for marker, entity_ids in (("A", changes.added), ("M", changes.changed), ("D", changes.removed)):
+        lines.extend(f"  {marker} {entity_id}" for entity_id in entity_ids)
+    lines.append(
+        f"Files: {len(report.written)} written, {len(report.removed)} removed, {report.unchanged} unchanged"
+    )
+    return "\n".join(lines)
 
 
 def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -213,13 +287,42 @@ def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=[],
         help="Additional meta tags (can be provided multiple times)",
     )
-    parser.add_argument("--force", action="store_true", help="Overwrite the output directory if it exists")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Update an existing output directory in place (unchanged files are kept)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Update an existing store by episode digest, writing only changed episodes and printing a summary",
+    )
+    parser.add_argument(
+        "--id-scheme",
+        choices=sorted(BLOCK_ID_SCHEMES),
+        default=None,
+        help="Block id scheme (default: the scheme the --out store already uses, else v1)",
+    )
     return parser.parse_args(argv)
 
 
 def main(argv: list[str] | None = None) -> None:
     args = _parse_args(argv)
 
+    if args.incremental:
+        _, changes, report = update_micro_store(
+            input_path=args.input,
+            out_dir=args.out,
+            season=args.season,
+            variant=args.variant,
+            expected_blocks=args.expected_blocks,
+            extra_tags=args.tags,
+            scheme=args.id_scheme,
+        )
+        print(format_episode_changes(changes, report))
+        print(f"Updated micro store in {args.out}")
+        return
+
     build_micro_store(
         input_path=args.input,
         out_dir=args.out,
@@ -228,6 +331,7 @@ def main(argv: list[str] | None = None) -> None:
         expected_blocks=args.expected_blocks,
         extra_tags=args.tags,
         force=args.force,
+        scheme=args.id_scheme,
     )
 
     print(f"Wrote micro store to {args.out}")
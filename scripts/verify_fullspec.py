@@ -7,12 +7,17 @@ import sys
 from pathlib import Path
 from typing import Iterable
 
-import yaml
 from bs4 import BeautifulSoup
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from sitegen.config_loader import load_experiences_data  # noqa: E402
+
 
 def _load_generated_experiences(config_path: Path) -> list[str]:
-    data = yaml.safe_load(config_path.read_text(encoding="utf-8")) or []
+    data = load_experiences_data(config_path)
     keys: list[str] = []
     for item in data:
         if item.get("kind") == "generated" and item.get("key"):
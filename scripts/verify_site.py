@@ -1,4 +1,8 @@
-"""Verify generated site structure and routes."""
+"""Verify generated site structure and routes.
+
+When the build left a ``links.json`` link index, every recorded link is also
+checked against it in memory.
+"""
 
 from __future__ import annotations
 
@@ -8,6 +12,13 @@ import sys
 from pathlib import Path
 from typing import Iterable
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from sitegen.link_index import load_link_index, verify_link_index  # noqa: E402
+from sitegen.util_fs import TreeSnapshot  # noqa: E402
+
 
 def _load_routes(routes_path: Path) -> dict:
     if not routes_path.exists():
@@ -27,7 +38,9 @@ def _iter_route_values(payload: dict) -> Iterable[str]:
     for exp in routes.values():
         for key, value in exp.items():
             if isinstance(value, dict):
-                yield from value.values()
+                for nested in value.values():
+                    # contentAliases maps each slug to a list of alias routes.
+                    yield from nested if isinstance(nested, list) else [nested]
             elif isinstance(value, str):
                 yield value
 
@@ -41,13 +54,15 @@ def verify_site(root: Path) -> list[str]:
         return [str(exc)]
 
     base_dir = routes_path.parent
+    # One scandir walk; every existence check below is a set lookup.
+    tree = TreeSnapshot(root)
 
     for href in _iter_route_values(payload):
         if href.startswith("/"):
             errors.append(f"Absolute href is not allowed: {href}")
 
         target = _resolve_target(base_dir, href)
-        if not target.exists():
+        if not tree.exists(target):
             errors.append(f"Route target missing: {href} -> {target}")
 
     representative = [
@@ -56,7 +71,7 @@ def verify_site(root: Path) -> list[str]:
         root / "hina" / "posts" / "ep01" / "index.html",
     ]
     for page in representative:
-        if not page.exists():
+        if not tree.exists(page):
             errors.append(f"Representative page missing: {page}")
             continue
         content = page.read_text(encoding="utf-8")
@@ -69,9 +84,13 @@ def verify_site(root: Path) -> list[str]:
         root / "hina" / "posts" / "ep01" / "index.html",
     ]
     for target in required_paths:
-        if not target.exists():
+        if not tree.exists(target):
             errors.append(f"Expected file missing: {target}")
 
+    link_index = load_link_index(root)
+    if link_index is not None:
+        errors.extend(verify_link_index(link_index))
+
     return errors
 
 
@@ -8,18 +8,28 @@ import shutil
 from collections import Counter
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
-from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+from jinja2 import Environment, FileSystemLoader
 from pydantic import ValidationError
 
-from .compile_pipeline import CompiledStore, CompiledPost, compile_store_v2
-from .models import ContentItem, ExperienceSpec
+from .build_fingerprint import (
+    compiled_store_digest,
+    input_fingerprint,
+    micro_store_digest,
+    previous_build,
+    with_legacy_digest,
+)
+from .compile_pipeline import CompiledStore, CompiledPost, compile_entity
+from .link_index import LinkIndex, view_model_hrefs
+from .models import ContentItem, ExperienceSpec, HtmlRender
 from .micro_store import MicroStore
-from .patch_legacy import patch_legacy_pages
 from .routes_gen import write_routes_payload
-from .routing import PageSpec, SiteRouter, relative_href
+from .routing import PageSpec, SiteRouter, out_href_prefix, relative_href
 from .shared_gen import generate_init_features_js, generate_switcher_assets
+from .sharding import ShardSpec, key_positions, write_shard_manifest
+from .template_compiler import compiled_loader, create_environment
+from .themes import ThemeStage, compile_theme_css
 from .util_fs import ensure_dir
 
 
@@ -36,7 +46,15 @@ class BuildContext:
     build_info: dict | None = None
     build_label: str | None = None
     micro_css_path: Path | None = None
+    micro_css_paths: dict[str, Path] = field(default_factory=dict)
+    compiled_templates_dir: Path | None = None
+    up_to_date: bool = False
+    link_index: LinkIndex = field(init=False, repr=False)
     _copied_assets: set[str] = field(default_factory=set, init=False, repr=False)
+    _jinja_envs: dict[str, Environment] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.link_index = LinkIndex(self.out_root, out_href_prefix(self))
 
     @property
     def shared_templates_dir(self) -> Path:
@@ -69,8 +87,8 @@ class BuildContext:
         if cache_key in self._copied_assets:
             return destination
 
-        _copy_assets(self.shared_experience_assets_dir, destination)
-        _copy_assets(self.assets_dir(experience), destination)
+        self.link_index.add_files(_copy_assets(self.shared_experience_assets_dir, destination))
+        self.link_index.add_files(_copy_assets(self.assets_dir(experience), destination))
         self._copied_assets.add(cache_key)
         return destination
 
@@ -95,24 +113,38 @@ class BuildContext:
             return None
         return relative_href(self.shared_assets_dir / filename, base)
 
+    def template_search_path(self, experience: ExperienceSpec) -> list[Path]:
+        """Return template directories for the experience in lookup order."""
+
+        return [self.templates_dir(experience), self.shared_templates_dir]
+
     def jinja_env(self, experience: ExperienceSpec) -> Environment:
-        """Create a Jinja environment scoped to the experience templates."""
-
-        template_dirs = [self.templates_dir(experience), self.shared_templates_dir]
-        return Environment(
-            loader=FileSystemLoader(template_dirs),
-            autoescape=select_autoescape(["html", "jinja"]),
-            trim_blocks=True,
-            lstrip_blocks=True,
-            undefined=StrictUndefined,
-        )
+        """Return the Jinja environment scoped to the experience templates.
 
+        Environments are cached per experience so templates are parsed once per
+        build. When ``compiled_templates_dir`` holds up-to-date modules from
+        ``sitegen compile-templates`` they are loaded instead of the sources.
+        """
 
-def _copy_assets(source: Path, destination: Path) -> None:
-    """Copy static assets into the destination directory."""
+        env = self._jinja_envs.get(experience.key)
+        if env is not None:
+            return env
 
+        template_dirs = self.template_search_path(experience)
+        loader = None
+        if self.compiled_templates_dir is not None:
+            loader = compiled_loader(self.compiled_templates_dir / experience.key, template_dirs)
+        env = create_environment(loader or FileSystemLoader(template_dirs))
+        self._jinja_envs[experience.key] = env
+        return env
+
+
+def _copy_assets(source: Path, destination: Path) -> list[Path]:
+    """Copy static assets into the destination directory and return the copies."""
+
+    copied: list[Path] = []
     if not source.exists():
-        return
+        return copied
 
     for asset_path in source.rglob("*"):
         if asset_path.is_dir():
@@ -121,6 +153,8 @@ def _copy_assets(source: Path, destination: Path) -> None:
         target = destination / relative
         target.parent.mkdir(parents=True, exist_ok=True)
         shutil.copy2(asset_path, target)
+        copied.append(target)
+    return copied
 
 
 def load_content_items(content_dir: Path) -> list[ContentItem]:
@@ -150,30 +184,58 @@ def load_micro_store_v2(micro_store_dir: Path) -> MicroStore:
     return MicroStore.load(micro_store_dir)
 
 
-def _compiled_post_to_content_item(post: CompiledPost) -> ContentItem:
-    meta = post.meta
-    cta = meta.get("cta", {})
-    payload = {
-        "contentId": post.id,
-        "experience": post.variant,
-        "pageType": post.page_type,
-        "title": meta.get("title") or "",
-        "summary": meta.get("summary"),
-        "role": meta.get("role"),
-        "profile": meta.get("profile"),
-        "ctaLabel": cta.get("label"),
-        "ctaHref": cta.get("href"),
-        "render": {"kind": "html", "html": post.html},
-        "bodyHtml": post.html,
-        "tags": meta.get("tags", []),
-    }
-    if "dataHref" in meta:
-        payload["dataHref"] = meta["dataHref"]
-    return ContentItem.model_validate(payload)
+def _entity_to_content_item(entity: dict, html: str = "", *, strict: bool = False) -> ContentItem:
+    """Adapt a micro entity to ContentItem.
+
+    Entities come from an already validated MicroStore, so by default the item is
+    built with ``model_construct`` and ``render.html``/``bodyHtml`` share the same
+    string. ``strict`` runs full pydantic validation instead.
+    """
+
+    meta = entity.get("meta", {})
+    if strict:
+        cta = meta.get("cta", {})
+        payload = {
+            "contentId": entity["id"],
+            "experience": entity["variant"],
+            "pageType": entity["type"],
+            "title": meta.get("title") or "",
+            "summary": meta.get("summary"),
+            "role": meta.get("role"),
+            "profile": meta.get("profile"),
+            "ctaLabel": cta.get("label"),
+            "ctaHref": cta.get("href"),
+            "render": {"kind": "html", "html": html},
+            "bodyHtml": html,
+            "tags": meta.get("tags", []),
+        }
+        if "dataHref" in meta:
+            payload["dataHref"] = meta["dataHref"]
+        return ContentItem.model_validate(payload)
+
+    return ContentItem.model_construct(
+        content_id=entity["id"],
+        experience=entity["variant"],
+        page_type=entity["type"],
+        title=meta.get("title") or "",
+        summary=meta.get("summary"),
+        role=meta.get("role"),
+        profile=meta.get("profile"),
+        render=HtmlRender.model_construct(html=html),
+        body_html=html,
+        data_href=meta.get("dataHref"),
+        tags=meta.get("tags", []),
+    )
 
 
-def _compiled_store_to_items(compiled: CompiledStore) -> list[ContentItem]:
-    return [_compiled_post_to_content_item(post) for post in compiled.posts.values()]
+def _compiled_post_to_content_item(post: CompiledPost, *, strict: bool = False) -> ContentItem:
+    return _entity_to_content_item(post.entity, post.html, strict=strict)
+
+
+def _compiled_store_to_items(compiled: CompiledStore, *, strict: bool = False) -> list[ContentItem]:
+    return [
+        _compiled_post_to_content_item(post, strict=strict) for post in compiled.posts.values()
+    ]
 
 
 def _content_for_experience(
@@ -497,29 +559,29 @@ def build_home(
         page_spec=page_spec,
     )
 
+    switcher_css_href = ctx.shared_asset_href("switcher.css", output_file.parent)
+    switcher_js_href = ctx.shared_asset_href("switcher.js", output_file.parent)
     rendered = template.render(
         experience=experience,
         routes_href=view_model["switcher"]["routes_href"],
         asset_prefix=asset_prefix,
-        switcher_css_href=ctx.shared_asset_href("switcher.css", output_file.parent),
-        switcher_js_href=ctx.shared_asset_href("switcher.js", output_file.parent),
+        switcher_css_href=switcher_css_href,
+        switcher_js_href=switcher_js_href,
         template_key="home",
         view_model=view_model,
     )
     if ctx.build_label:
         rendered += f"\n<!-- sitegen build: {ctx.build_label} -->\n"
     output_file.write_text(rendered, encoding="utf-8")
+    ctx.link_index.add_page(output_file, [*view_model_hrefs(view_model), switcher_css_href, switcher_js_href])
 
     return [output_file]
 
 
-def write_generated_root_index(
+def _root_index_entries(
     ctx: BuildContext, router: SiteRouter, experiences: list[ExperienceSpec]
-) -> Path:
-    """Write an index under the generated out_root to avoid directory listings."""
-
-    ensure_dir(ctx.out_root)
-    entries: list[tuple[str, str]] = []
+) -> list[tuple[str, str, str]]:
+    entries: list[tuple[str, str, str]] = []
     for exp in experiences:
         if exp.kind != "generated":
             continue
@@ -531,18 +593,21 @@ def write_generated_root_index(
             if not href.endswith("/"):
                 href += "/"
         label = exp.name or exp.key
-        entries.append((label, href))
+        entries.append((exp.key, label, href))
+    return entries
+
+
+def render_root_index_html(entries: list[tuple[str, str]], routes_href: str = "") -> str:
+    """Render the generated root index from ``(label, href)`` pairs."""
 
     links = "\n".join(
         f'        <li><a href="{href}">{label}</a></li>' for label, href in entries if href
     )
-    routes_href = ""
-    if ctx.routes_path.exists():
-        routes_href = (
-            f'        <p><a href="{router.absolute_href_for_path(ctx.routes_path)}">routes.json</a></p>\n'
-        )
+    routes_link = ""
+    if routes_href:
+        routes_link = f'        <p><a href="{routes_href}">routes.json</a></p>\n'
 
-    html = "\n".join(
+    return "\n".join(
         [
             "<!doctype html>",
             '<html lang="ja">',
@@ -558,16 +623,40 @@ def write_generated_root_index(
             "      <ul>",
             links or "        <li>リンク先が見つかりませんでした。</li>",
             "      </ul>",
-            routes_href + "    </main>",
+            routes_link + "    </main>",
             "  </body>",
             "</html>",
         ]
     )
+
+
+def write_generated_root_index(
+    ctx: BuildContext, router: SiteRouter, experiences: list[ExperienceSpec]
+) -> Path:
+    """Write an index under the generated out_root to avoid directory listings."""
+
+    ensure_dir(ctx.out_root)
+    entries = [
+        (label, href) for _, label, href in _root_index_entries(ctx, router, experiences)
+    ]
+    routes_href = ""
+    if ctx.routes_path.exists():
+        routes_href = router.absolute_href_for_path(ctx.routes_path)
+
     index_path = ctx.out_root / "index.html"
-    index_path.write_text(html, encoding="utf-8")
+    index_path.write_text(render_root_index_html(entries, routes_href), encoding="utf-8")
     return index_path
 
 
+def write_link_index(ctx: BuildContext, written: Iterable[Path]) -> Path:
+    """Resolve the recorded links against the build's files and write ``links.json``."""
+
+    ctx.link_index.add_files(written)
+    if ctx.shared_init_features:
+        ctx.link_index.add_files([ctx.shared_init_features])
+    return ctx.link_index.write()
+
+
 def build_list(
     experience: ExperienceSpec,
     ctx: BuildContext,
@@ -608,18 +697,21 @@ def build_list(
         page_spec=page_spec,
     )
 
+    switcher_css_href = ctx.shared_asset_href("switcher.css", output_file.parent)
+    switcher_js_href = ctx.shared_asset_href("switcher.js", output_file.parent)
     rendered = template.render(
         experience=experience,
         routes_href=view_model["switcher"]["routes_href"],
         asset_prefix=asset_prefix,
-        switcher_css_href=ctx.shared_asset_href("switcher.css", output_file.parent),
-        switcher_js_href=ctx.shared_asset_href("switcher.js", output_file.parent),
+        switcher_css_href=switcher_css_href,
+        switcher_js_href=switcher_js_href,
         template_key="list",
         view_model=view_model,
     )
     if ctx.build_label:
         rendered += f"\n<!-- sitegen build: {ctx.build_label} -->\n"
     output_file.write_text(rendered, encoding="utf-8")
+    ctx.link_index.add_page(output_file, [*view_model_hrefs(view_model), switcher_css_href, switcher_js_href])
 
     return [output_file]
 
@@ -680,14 +772,16 @@ def build_detail(
 
     env = ctx.jinja_env(experience)
     template = env.get_template(template_name)
+    switcher_css_href = ctx.shared_asset_href("switcher.css", output_file.parent)
+    switcher_js_href = ctx.shared_asset_href("switcher.js", output_file.parent)
     rendered = template.render(
         experience=experience,
         content=item,
         routes_href=view_model["switcher"]["routes_href"],
         asset_prefix=asset_prefix,
         features_init_href=features_init_href,
-        switcher_css_href=ctx.shared_asset_href("switcher.css", output_file.parent),
-        switcher_js_href=ctx.shared_asset_href("switcher.js", output_file.parent),
+        switcher_css_href=switcher_css_href,
+        switcher_js_href=switcher_js_href,
         template_key="detail",
         nav_links=view_model["nav"]["links"],
         view_model=view_model,
@@ -696,6 +790,10 @@ def build_detail(
     if ctx.build_label:
         rendered += f"\n<!-- sitegen build: {ctx.build_label} -->\n"
     output_file.write_text(rendered, encoding="utf-8")
+    ctx.link_index.add_page(
+        output_file,
+        [*view_model_hrefs(view_model), switcher_css_href, switcher_js_href, micro_css_href, features_init_href],
+    )
 
     return [output_file]
 
@@ -706,32 +804,112 @@ def build_site_from_micro_v2(
     experiences: list[ExperienceSpec],
     ctx: BuildContext,
     compiled_store: CompiledStore | None = None,
+    micro_store: MicroStore | None = None,
+    theme: dict | None = None,
+    strict: bool = False,
     generate_shared: bool = False,
     generate_all: bool = False,
     legacy_base: Path | None = None,
+    shard: ShardSpec | None = None,
+    force: bool = False,
 ) -> list[Path]:
-    """Build generated experiences directly from a micro store (v2 flow)."""
+    """Build generated experiences directly from a micro store (v2 flow).
+
+    Without ``compiled_store`` posts are compiled lazily while detail pages are
+    written, so only one post's HTML is alive at a time. Listing pages and the
+    router work from metadata-only items. ``strict`` re-validates every item with
+    pydantic instead of using the zero-copy adapter.
+
+    With ``shard`` only that shard's pages are rendered, and routes, the root
+    index and build info go into a partial manifest for ``merge_shards``.
+
+    An input fingerprint is recorded in ``_buildinfo.json``; when the existing
+    output already carries the same fingerprint the build is skipped (unless
+    ``force``) and ``ctx.up_to_date`` is set.
+    """
 
     ensure_dir(ctx.out_root)
-    store = load_micro_store_v2(micro_store_dir)
-    compiled = compiled_store or compile_store_v2(store)
-    items = _compiled_store_to_items(compiled)
+    generated_specs = [exp for exp in experiences if exp.kind == "generated"]
+    if compiled_store is not None:
+        store_digest = compiled_store_digest(compiled_store)
+    else:
+        store = micro_store or load_micro_store_v2(micro_store_dir)
+        store_digest = micro_store_digest(store)
+    legacy_paths = None
+    if generate_all:
+        from .patch_legacy import legacy_pages
+
+        legacy_paths = [page.path for page in legacy_pages(Path(legacy_base or "."), experiences)]
+    fingerprint = input_fingerprint(
+        store_digest=store_digest,
+        template_dirs=[path for exp in generated_specs for path in ctx.template_search_path(exp)],
+        asset_dirs=[ctx.shared_experience_assets_dir]
+        + [ctx.assets_dir(exp) for exp in generated_specs],
+        config={
+            "experiences": [exp.model_dump(mode="json") for exp in experiences],
+            "theme": compiled_store.theme if compiled_store is not None else theme or {},
+            "strict": strict,
+            "generateShared": generate_shared,
+            "generateAll": generate_all,
+            "legacyBase": str(legacy_base) if generate_all else None,
+            "hrefPrefix": out_href_prefix(ctx),
+            "outName": ctx.out_root.name if generate_all else None,
+            "routesFilename": ctx.routes_filename,
+        },
+        legacy_pages=legacy_paths,
+    )
+    if shard is None and not force:
+        previous = previous_build(ctx.out_root, fingerprint)
+        if previous is not None:
+            ctx.up_to_date = True
+            return previous
+
+    detail_pages: dict[str, list[PageSpec]] = {}
+    if compiled_store is not None:
+        entities = [post.entity for post in compiled_store.posts.values()]
+        posts: Iterable[CompiledPost] = iter(compiled_store.posts.values())
+        theme = compiled_store.theme
+        css_text = compiled_store.css_text
+    else:
+        entities = store.iter_posts()
+        # Compile only posts that have detail pages on this build (or shard).
+        posts = (
+            compile_entity(entity, store)
+            for entity in store.iter_entities()
+            if entity["id"] in detail_pages
+        )
+        theme = theme or {}
+        css_text = compile_theme_css(theme) if entities else ""
+    items = [_entity_to_content_item(entity, strict=strict) for entity in entities]
 
     if generate_shared or generate_all:
         ctx.shared_init_features = generate_init_features_js(ctx.out_root)
         ctx.shared_assets_dir = ensure_dir(ctx.out_root / "shared")
 
-    if compiled.css_text:
+    written_assets: list[Path] = []
+    if css_text:
         ctx.micro_css_path = ctx.out_root / "micro.css"
-        ctx.micro_css_path.write_text(compiled.css_text, encoding="utf-8")
-        written_assets: list[Path] = [ctx.micro_css_path]
-    else:
-        written_assets = []
+        ctx.micro_css_path.write_text(css_text, encoding="utf-8")
+        written_assets.append(ctx.micro_css_path)
 
     router = SiteRouter(ctx, experiences, items)
-    generated = [exp for exp in experiences if exp.kind == "generated"]
+    generated = generated_specs
     if not generated:
         return []
+    generated_keys = [exp.key for exp in generated]
+    content_positions: dict[str, int] = {}
+    if shard is not None:
+        # Sorted positions are computed once; ownership checks are then O(1) per page.
+        content_positions = key_positions(item.content_id for item in items)
+        experience_positions = key_positions(generated_keys)
+        generated = [exp for exp in generated if shard.owns_experience(exp.key, experience_positions)]
+
+    if css_text:
+        themes = ThemeStage()
+        for exp in generated:
+            themes.add(exp.key, {**theme, **exp.theme})
+        ctx.micro_css_paths = themes.write(ctx.out_root)
+        written_assets.extend(sorted(set(ctx.micro_css_paths.values())))
 
     if ctx.build_label:
         ctx.build_label = f"{ctx.build_label} items={len(items)}"
@@ -742,9 +920,11 @@ def build_site_from_micro_v2(
         "experiences": [],
         "routesFilename": ctx.routes_filename,
         "microStore": str(micro_store_dir),
+        "inputFingerprint": fingerprint,
     }
 
     written: list[Path] = list(written_assets)
+    rendered_pages: list[PageSpec] = []
     for exp in generated:
         targeted = _content_for_experience(exp, items)
         ctx.build_info["experiences"].append(
@@ -758,51 +938,106 @@ def build_site_from_micro_v2(
             }
         )
         for page in router.pages_for_experience(exp.key):
-            if page.page_type == "home":
+            if page.content:
+                if shard and not shard.owns_content(page.content.content_id, content_positions):
+                    continue
+                detail_pages.setdefault(page.content.content_id, []).append(page)
+            elif shard and not shard.owns_listing():
+                continue
+            elif page.page_type == "home":
                 written.extend(build_home(exp, ctx, items, router=router, page_spec=page))
             elif page.page_type == "list":
                 written.extend(build_list(exp, ctx, items, router=router, page_spec=page))
-            elif page.content:
-                written.extend(
-                    build_detail(
-                        exp,
-                        ctx,
-                        page.content,
-                        items,
-                        router=router,
-                        page_spec=page,
-                        micro_css_path=ctx.micro_css_path,
-                    )
+            else:
+                continue
+            rendered_pages.append(page)
+
+    for post in posts:
+        pages = detail_pages.pop(post.id, [])
+        if not pages:
+            continue
+        item = _compiled_post_to_content_item(post, strict=strict)
+        for page in pages:
+            exp = page.experience
+            written.extend(
+                build_detail(
+                    exp,
+                    ctx,
+                    item,
+                    items,
+                    router=router,
+                    page_spec=page,
+                    micro_css_path=ctx.micro_css_paths.get(exp.key, ctx.micro_css_path),
                 )
+            )
 
+    routes_payload = None
     if generate_shared or generate_all:
         routes_payload = router.routes_payload()
-        route_targets = [ctx.routes_path]
-        written.extend(write_routes_payload(routes_payload, route_targets))
+        if shard is None:
+            route_targets = [ctx.routes_path]
+            written.extend(write_routes_payload(routes_payload, route_targets))
         switcher_roots = [ctx.out_root]
         if generate_all:
             switcher_roots.insert(0, Path("."))
         written.extend(generate_switcher_assets(switcher_roots))
-    if generate_all:
-        written.extend(
-            patch_legacy_pages(
-                Path(legacy_base or "."),
-                routes_href=str(Path(ctx.out_root.name) / ctx.routes_filename),
-                css_href=str(Path(ctx.out_root.name) / "shared" / "switcher.css"),
-                js_href=str(Path(ctx.out_root.name) / "shared" / "switcher.js"),
-            )
+    if generate_all and (shard is None or shard.index == 1):
+        from .patch_legacy import patch_legacy_pages
+
+        patched = patch_legacy_pages(
+            Path(legacy_base or "."),
+            routes_href=str(Path(ctx.out_root.name) / ctx.routes_filename),
+            css_href=str(Path(ctx.out_root.name) / "shared" / "switcher.css"),
+            js_href=str(Path(ctx.out_root.name) / "shared" / "switcher.js"),
+            experiences=experiences,
         )
+        written.extend(patched)
+        # Record the patched legacy pages so an unchanged rerun matches.
+        ctx.build_info["inputFingerprint"] = with_legacy_digest(fingerprint, patched)
 
-    written.extend(router.render_aliases())
-    written.append(write_generated_root_index(ctx, router, experiences))
+    written.extend(router.render_aliases(rendered_pages))
+    if shard is None:
+        written.append(write_generated_root_index(ctx, router, experiences))
+        written.append(write_link_index(ctx, written))
 
-    build_info_path = ctx.out_root / "_buildinfo.json"
     ctx.build_info["writtenFiles"] = [
         str(path.relative_to(ctx.out_root))
         if path.is_relative_to(ctx.out_root)
         else str(path)
         for path in sorted(set(written))
     ]
+    external = sorted({str(path) for path in written if not path.is_relative_to(ctx.out_root)})
+    if external:
+        ctx.build_info["externalFiles"] = external
+    if shard is not None:
+        owned_keys = {exp.key for exp in generated}
+        if routes_payload is not None:
+            routes_payload["routes"] = {
+                key: value
+                for key, value in routes_payload["routes"].items()
+                if key not in generated_keys or key in owned_keys
+            }
+        root_index = [
+            {"key": key, "label": label, "href": href}
+            for key, label, href in _root_index_entries(ctx, router, generated)
+        ]
+        written.append(
+            write_shard_manifest(
+                ctx.out_root,
+                shard,
+                order=[exp.key for exp in experiences],
+                routes=routes_payload,
+                routes_href=router.absolute_href_for_path(ctx.routes_path)
+                if routes_payload is not None
+                else None,
+                root_index=root_index,
+                build_info=ctx.build_info,
+                links={"hrefPrefix": ctx.link_index.href_prefix, "pages": ctx.link_index.pages},
+            )
+        )
+        return written
+
+    build_info_path = ctx.out_root / "_buildinfo.json"
     build_info_path.write_text(
         json.dumps(ctx.build_info, ensure_ascii=False, indent=2) + "\n",
         encoding="utf-8",
@@ -821,5 +1056,7 @@ __all__ = [
     "build_home",
     "build_list",
     "load_content_items",
+    "render_root_index_html",
     "write_generated_root_index",
+    "write_link_index",
 ]
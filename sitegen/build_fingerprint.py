@@ -0,0 +1,158 @@
+"""Input fingerprint used to skip builds whose inputs did not change.
+
+The fingerprint is a small Merkle tree: every input file is hashed, each input
+group (templates, assets, config, sitegen itself) hashes its sorted
+``path -> digest`` leaves, and the root hashes the group digests. The micro
+store contributes the root hash of the already-loaded store instead of its
+files, so they are not read a second time. The build label
+is deliberately not an input, so a push that only changes the git SHA keeps the
+previous output.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+from .util_fs import file_digest
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .compile_pipeline import CompiledStore
+    from .micro_store import MicroStore
+
+FINGERPRINT_VERSION = 1
+SITEGEN_DIR = Path(__file__).parent
+
+
+def _combine(leaves: Iterable[tuple[str, str]]) -> str:
+    digest = hashlib.sha256()
+    for name, leaf in sorted(leaves):
+        digest.update(f"{name}\0{leaf}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def tree_digest(root: Path) -> str:
+    """Digest of every file under ``root`` (a missing directory hashes as empty)."""
+
+    if not root.is_dir():
+        return _combine([])
+    return _combine(
+        (path.relative_to(root).as_posix(), file_digest(path))
+        for path in root.rglob("*")
+        if path.is_file() and "__pycache__" not in path.parts
+    )
+
+
+def files_digest(paths: Iterable[Path]) -> str:
+    """Digest of exactly the given files, keyed by their POSIX paths."""
+
+    return _combine(sorted((Path(path).as_posix(), file_digest(Path(path))) for path in paths))
+
+
+def value_digest(value: Any) -> str:
+    payload = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def sitegen_digest() -> str:
+    """Digest of sitegen's own sources plus the Jinja2 version that renders them."""
+
+    import jinja2
+
+    return _combine([("sitegen", tree_digest(SITEGEN_DIR)), ("jinja2", jinja2.__version__)])
+
+
+def micro_store_digest(store: "MicroStore") -> str:
+    """Store root hash (entity contents and block ids) plus the entity order."""
+
+    return _combine([("root", store.root_hash), ("order", value_digest(store.index.get("entity_ids", [])))])
+
+
+def compiled_store_digest(compiled: "CompiledStore") -> str:
+    return value_digest([[post.entity, post.html] for post in compiled.posts.values()])
+
+
+def input_fingerprint(
+    *,
+    store_digest: str,
+    template_dirs: Iterable[Path],
+    asset_dirs: Iterable[Path],
+    config: Any,
+    legacy_pages: Iterable[Path] | None = None,
+) -> dict:
+    """Return ``{"version", "root", "inputs"}`` for the given build inputs.
+
+    ``store_digest`` comes from ``micro_store_digest``/``compiled_store_digest``.
+    ``legacy_pages`` (the files ``patch_legacy.legacy_pages`` selects) are
+    hashed when they are patched in place; callers refresh that input with
+    ``with_legacy_digest`` after
+    patching so an untouched tree matches next time.
+    """
+
+    def _dirs_digest(dirs: Iterable[Path]) -> str:
+        return _combine((str(path), tree_digest(path)) for path in sorted(set(dirs)))
+
+    inputs = {
+        "microStore": store_digest,
+        "templates": _dirs_digest(template_dirs),
+        "assets": _dirs_digest(asset_dirs),
+        "config": value_digest(config),
+        "sitegen": sitegen_digest(),
+    }
+    if legacy_pages is not None:
+        inputs["legacy"] = files_digest(legacy_pages)
+    return _fingerprint(inputs)
+
+
+def _fingerprint(inputs: dict) -> dict:
+    return {
+        "version": FINGERPRINT_VERSION,
+        "root": _combine(inputs.items()),
+        "inputs": inputs,
+    }
+
+
+def with_legacy_digest(fingerprint: dict, legacy_pages: Iterable[Path]) -> dict:
+    """Return ``fingerprint`` with only its ``legacy`` input re-hashed."""
+
+    return _fingerprint({**fingerprint["inputs"], "legacy": files_digest(legacy_pages)})
+
+
+def previous_build(out_root: Path, fingerprint: dict) -> list[Path] | None:
+    """Return the files of an existing build with the same fingerprint, if intact."""
+
+    build_info_path = out_root / "_buildinfo.json"
+    try:
+        build_info = json.loads(build_info_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    previous = build_info.get("inputFingerprint") or {}
+    if previous.get("version") != fingerprint["version"] or previous.get("root") != fingerprint["root"]:
+        return None
+
+    external = set(build_info.get("externalFiles", []))
+    written: list[Path] = []
+    for entry in build_info.get("writtenFiles", []):
+        path = Path(entry) if entry in external else out_root / entry
+        if not path.exists():
+            return None
+        written.append(path)
+    written.append(build_info_path)
+    return written
+
+
+__all__ = [
+    "FINGERPRINT_VERSION",
+    "compiled_store_digest",
+    "file_digest",
+    "files_digest",
+    "input_fingerprint",
+    "micro_store_digest",
+    "previous_build",
+    "sitegen_digest",
+    "tree_digest",
+    "value_digest",
+    "with_legacy_digest",
+]
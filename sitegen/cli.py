@@ -1,41 +1,46 @@
-"""Command-line interface for sitegen."""
+"""Command-line interface for sitegen.
+
+Subcommand handlers import their dependencies lazily so that argument parsing
+and lightweight commands do not pay for Jinja2, BeautifulSoup or the build
+pipeline.
+"""
+
+from __future__ import annotations
 
 import argparse
 import json
-import os
-import subprocess
 import sys
 from collections import Counter
-from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Iterable, Literal, Optional
-
-import yaml
-from pydantic import BaseModel, ConfigDict, Field, ValidationError
-
-from .build import (
-    BuildContext,
-    build_detail,
-    build_home,
-    build_list,
-    _content_for_experience,
-    load_content_items,
-    write_generated_root_index,
-)
-from .shared_gen import generate_init_features_js, generate_switcher_assets
-from .routes_gen import write_routes_payload
-from .models import (
-    ContentItem,
-    ExperienceSpec,
-    ExperimentPlan,
-    IAPlan,
-    IASection,
-    IATemplateSpec,
-)
-from .patch_legacy import patch_legacy_pages
-from .routing import SiteRouter
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+from .cli_common import build_label as _build_label
+from .cli_common import load_experiences as _load_experiences
+from .cli_common import safe_git_sha as _safe_git_sha
+from .cli_common import timestamp_for_build as _timestamp_for_build
+from .micro_ids import BLOCK_ID_SCHEMES
 from .util_fs import ensure_dir, write_text
 
+if TYPE_CHECKING:  # pragma: no cover
+    from .models import (
+        ContentItem,
+        ExperimentPlan,
+        IAPlan,
+        IASection,
+        IATemplateSpec,
+        ScaffoldExperience,
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # ScaffoldExperience used to be defined here; keep ``from sitegen.cli
+    # import ScaffoldExperience`` working without importing pydantic eagerly.
+    if name == "ScaffoldExperience":
+        from .models import ScaffoldExperience
+
+        return ScaffoldExperience
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def _experiment_plan_to_markdown(plan: ExperimentPlan) -> str:
     """Render an ExperimentPlan as a simple Markdown document."""
@@ -86,11 +91,19 @@ def _experiment_plan_to_markdown(plan: ExperimentPlan) -> str:
 
 
 def _load_experiment_plan(path: Path) -> ExperimentPlan:
+    import yaml
+
+    from .models import ExperimentPlan
+
     data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
     return ExperimentPlan.model_validate(data)
 
 
 def _load_ia_plan(path: Path) -> IAPlan:
+    import yaml
+
+    from .models import IAPlan
+
     data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
     return IAPlan.model_validate(data)
 
@@ -105,72 +118,24 @@ def _handle_export_docs(args: argparse.Namespace) -> None:
     output_path.write_text(output, encoding="utf-8")
 
 
-def _load_experiences(path: Path) -> list[ExperienceSpec]:
-    data = yaml.safe_load(path.read_text(encoding="utf-8")) or []
-    if not isinstance(data, list):
-        raise SystemExit("experiences.yaml must contain a list of experiences.")
-    try:
-        return [ExperienceSpec.model_validate(item) for item in data]
-    except ValidationError as exc:
-        raise SystemExit(f"Invalid experience spec in {path}: {exc}") from exc
-
-
 def _load_content_item(path: Path) -> ContentItem:
+    from .models import ContentItem
+
     payload = json.loads(path.read_text(encoding="utf-8"))
     return ContentItem.model_validate(payload)
 
 
-def _safe_git_sha() -> str | None:
-    try:
-        return subprocess.check_output(
-            ["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL
-        ).strip()
-    except (subprocess.SubprocessError, FileNotFoundError):
-        return None
-
-
-def _timestamp_for_build(*, deterministic: bool) -> str:
-    if not deterministic:
-        return datetime.now(timezone.utc).isoformat()
-
-    source_date_epoch = os.environ.get("SOURCE_DATE_EPOCH")
-    try:
-        epoch = int(source_date_epoch) if source_date_epoch is not None else 0
-    except ValueError:
-        epoch = 0
-    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
-
-
-def _build_label(timestamp: str | None, git_sha: str | None, *, override: str | None) -> str | None:
-    if override is not None:
-        return override
-
-    label_parts = []
-    if timestamp:
-        label_parts.append(f"ts={timestamp}")
-    if git_sha:
-        label_parts.append(f"sha={git_sha}")
-    return " ".join(label_parts) if label_parts else None
-
-
 def _page_type_counts(items: list[ContentItem]) -> dict[str, int]:
     return dict(Counter(item.page_type for item in items))
 
 
-class ScaffoldExperience(BaseModel):
-    """Lightweight experience spec used for scaffolding."""
-
-    key: str
-    kind: Literal["legacy", "generated"]
-    output_dir: Optional[str] = Field(default=None, alias="output_dir")
-    home: Optional[str] = None
-    content: dict[str, str] = Field(default_factory=dict)
-
-    model_config = ConfigDict(populate_by_name=True)
+def _load_scaffold_experiences(path: Path) -> list[ScaffoldExperience]:
+    from pydantic import ValidationError
 
+    from .config_loader import load_experiences_data
+    from .models import ScaffoldExperience
 
-def _load_scaffold_experiences(path: Path) -> list[ScaffoldExperience]:
-    payload: Any = yaml.safe_load(path.read_text(encoding="utf-8")) or []
+    payload: Any = load_experiences_data(path)
     if not isinstance(payload, list):
         raise SystemExit("experiences.yaml must contain a list of experiences.")
 
@@ -191,6 +156,8 @@ def _load_scaffold_experiences(path: Path) -> list[ScaffoldExperience]:
 
 
 def _handle_validate(args: argparse.Namespace) -> None:
+    from pydantic import ValidationError
+
     experiences_path = Path(args.experiences)
     content_dir = Path(args.content)
 
@@ -545,7 +512,68 @@ def _handle_gen_manifests(args: argparse.Namespace) -> None:
     print(f"Wrote {len(generated)} manifest(s) to {src_root}.")
 
 
+def _handle_compile_templates(args: argparse.Namespace) -> None:
+    from .build import BuildContext
+    from .template_compiler import compile_templates
+
+    experiences_path = Path(args.experiences)
+    src_root = Path(args.src)
+    out_root = Path(args.out)
+
+    experiences = _load_experiences(experiences_path)
+    generated = [exp for exp in experiences if exp.kind == "generated"]
+    if not generated:
+        print("No generated experiences found; nothing to compile.")
+        return
+
+    ctx = BuildContext(src_root=src_root, out_root=out_root)
+    for exp in generated:
+        compile_templates(ctx.template_search_path(exp), out_root / exp.key)
+
+    print(f"Compiled templates for {len(generated)} experience(s) into {out_root}.")
+
+
+def _handle_migrate_block_ids(args: argparse.Namespace) -> None:
+    from .micro_store import migrate_block_ids
+
+    mapping = migrate_block_ids(Path(args.store), args.scheme, dry_run=args.dry_run)
+    verb = "Would rewrite" if args.dry_run else "Rewrote"
+    print(f"{verb} {len(mapping)} block id(s) in {args.store} to scheme {args.scheme}.")
+
+
+def _handle_verify_micro_store(args: argparse.Namespace) -> None:
+    from .micro_store import MicroStore
+
+    try:
+        store = MicroStore.load(Path(args.store), verify=True)
+    except (FileNotFoundError, KeyError, ValueError) as exc:
+        raise SystemExit(f"{args.store}: {exc}") from exc
+    print(f"{args.store}: {len(store.entities_by_id)} entity(ies) match index.json (root_hash {store.root_hash}).")
+
+
+def _handle_merge(args: argparse.Namespace) -> None:
+    from .sharding import merge_shards
+
+    written = merge_shards([Path(part) for part in args.parts], Path(args.out))
+    print(f"Merged {len(args.parts)} shard(s) into {args.out} ({len(written)} file(s)).")
+
+
 def _handle_build(args: argparse.Namespace) -> None:
+    from .build import (
+        BuildContext,
+        _content_for_experience,
+        build_detail,
+        build_home,
+        build_list,
+        load_content_items,
+        write_generated_root_index,
+        write_link_index,
+    )
+    from .patch_legacy import patch_legacy_pages
+    from .routes_gen import write_routes_payload
+    from .routing import SiteRouter
+    from .shared_gen import generate_init_features_js, generate_switcher_assets
+
     experiences_path = Path(args.experiences)
     src_root = Path(args.src)
     out_root = Path(args.out)
@@ -565,6 +593,7 @@ def _handle_build(args: argparse.Namespace) -> None:
         shared_init_features=shared_init_features,
         shared_assets_dir=shared_assets_dir,
         build_label=build_label,
+        compiled_templates_dir=Path(args.compiled_templates) if args.compiled_templates else None,
     )
 
     items = load_content_items(content_dir)
@@ -636,9 +665,11 @@ def _handle_build(args: argparse.Namespace) -> None:
                 routes_href=str(Path(out_root.name) / args.routes_filename),
                 css_href=str(Path(out_root.name) / "shared" / "switcher.css"),
                 js_href=str(Path(out_root.name) / "shared" / "switcher.js"),
+                experiences=experiences,
             )
         )
 
+    written.append(write_link_index(ctx, written))
     build_info_path = out_root / "_buildinfo.json"
     ctx.build_info["writtenFiles"] = [
         str(path.relative_to(out_root))
@@ -872,8 +903,84 @@ def build_parser() -> argparse.ArgumentParser:
         default="nagi-s1",
         help="Base directory for patching legacy HTML when --all is set (defaults to the season1 root).",
     )
+    build_parser.add_argument(
+        "--compiled-templates",
+        dest="compiled_templates",
+        default=None,
+        help="Directory written by compile-templates; stale experiences fall back to sources.",
+    )
     build_parser.set_defaults(func=_handle_build)
 
+    compile_templates_parser = subparsers.add_parser(
+        "compile-templates",
+        help="Precompile experience templates into Python modules.",
+        description=(
+            "Compile each generated experience's templates (plus shared templates) "
+            "into importable modules loaded via --compiled-templates."
+        ),
+    )
+    compile_templates_parser.add_argument(
+        "--experiences",
+        default="config/experiences.yaml",
+        help="Path to experiences.yaml.",
+    )
+    compile_templates_parser.add_argument(
+        "--src",
+        default="experience_src",
+        help="Base directory containing experience source templates.",
+    )
+    compile_templates_parser.add_argument(
+        "--out",
+        default="build/templates",
+        help="Directory to write compiled template modules (one subdirectory per experience).",
+    )
+    compile_templates_parser.set_defaults(func=_handle_compile_templates)
+
+    merge_parser = subparsers.add_parser(
+        "merge",
+        help="Merge sharded build outputs into one site.",
+        description=(
+            "Combine outputs written by 'python -m sitegen.cli_build_site --shard I/N' "
+            "into one directory, writing routes.json, the root index and _buildinfo.json."
+        ),
+    )
+    merge_parser.add_argument("parts", nargs="+", help="Shard output directories (any order).")
+    merge_parser.add_argument("--out", required=True, help="Directory for the merged site.")
+    merge_parser.set_defaults(func=_handle_merge)
+
+    migrate_ids_parser = subparsers.add_parser(
+        "migrate-block-ids",
+        help="Rewrite a micro store's block ids to another fingerprint scheme.",
+        description=(
+            "Re-identify every block with the given scheme (v1: blk_<sha1>, v2: blk2_<sha1>, "
+            "v2-blake2: blk2b_<blake2b>) and update blockRefs, Section children and index.json."
+        ),
+    )
+    migrate_ids_parser.add_argument("--store", required=True, help="Micro store directory.")
+    migrate_ids_parser.add_argument(
+        "--scheme",
+        default="v2",
+        choices=sorted(BLOCK_ID_SCHEMES),
+        help="Target block id scheme (default: v2).",
+    )
+    migrate_ids_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report how many ids would change without writing.",
+    )
+    migrate_ids_parser.set_defaults(func=_handle_migrate_block_ids)
+
+    verify_store_parser = subparsers.add_parser(
+        "verify-micro-store",
+        help="Check a micro store's recorded digests against its contents.",
+        description=(
+            "Load the store and recompute entity_digests and root_hash; fail when "
+            "index.json is stale (e.g. after hand-editing entity or block files)."
+        ),
+    )
+    verify_store_parser.add_argument("--store", required=True, help="Micro store directory.")
+    verify_store_parser.set_defaults(func=_handle_verify_micro_store)
+
     return parser
 
 
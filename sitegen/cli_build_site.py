@@ -11,9 +11,11 @@ from pathlib import Path
 from typing import Iterable
 
 from .build import BuildContext, build_site_from_micro_v2
-from .cli import _build_label, _load_experiences, _safe_git_sha, _timestamp_for_build
-from .compile_pipeline import compile_store_v2
-from .micro_store import MicroStore
+from .cli_common import build_label as _build_label
+from .cli_common import load_experiences as _load_experiences
+from .cli_common import safe_git_sha as _safe_git_sha
+from .cli_common import timestamp_for_build as _timestamp_for_build
+from .sharding import SHARD_MODES, ShardSpec
 
 
 def _hash_dir(root: Path) -> dict[str, str]:
@@ -92,6 +94,36 @@ def _parse_args() -> argparse.Namespace:
         default="nagi-s1",
         help="Base directory for patching legacy HTML when --all is set.",
     )
+    parser.add_argument(
+        "--compiled-templates",
+        dest="compiled_templates",
+        type=Path,
+        default=None,
+        help="Directory written by 'sitegen compile-templates'; stale experiences fall back to sources.",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Validate every compiled post with pydantic instead of the zero-copy adapter.",
+    )
+    parser.add_argument(
+        "--shard",
+        default=None,
+        metavar="I/N",
+        help="Render only shard I of N (1-based) and write a partial manifest for 'sitegen merge'.",
+    )
+    parser.add_argument(
+        "--shard-by",
+        dest="shard_by",
+        choices=SHARD_MODES,
+        default="experience",
+        help="Split shards by experience (default) or by content id across experiences.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild even when the output's input fingerprint matches the current inputs.",
+    )
     parser.add_argument(
         "--check",
         action="store_true",
@@ -101,9 +133,6 @@ def _parse_args() -> argparse.Namespace:
 
 
 def _build_once(args: argparse.Namespace, out_root: Path, *, href_root: Path | None = None) -> None:
-    micro_store = MicroStore.load(args.micro_store)
-    compiled = compile_store_v2(micro_store)
-
     timestamp = _timestamp_for_build(deterministic=args.deterministic)
     git_sha = _safe_git_sha()
     build_label = _build_label(timestamp, git_sha, override=args.build_label)
@@ -114,20 +143,28 @@ def _build_once(args: argparse.Namespace, out_root: Path, *, href_root: Path | N
         href_root=href_root,
         routes_filename=args.routes_filename,
         build_label=build_label,
+        compiled_templates_dir=args.compiled_templates,
     )
 
     experiences = _load_experiences(args.experiences)
     experiences = _filter_experiences(experiences, args.experience_keys)
+    shard = ShardSpec.parse(args.shard, by=args.shard_by) if args.shard else None
     written = build_site_from_micro_v2(
         micro_store_dir=args.micro_store,
         experiences=experiences,
         ctx=ctx,
-        compiled_store=compiled,
+        strict=args.strict,
         generate_shared=args.shared or args.all,
         generate_all=args.all,
         legacy_base=Path(args.legacy_base),
+        shard=shard,
+        force=args.force,
     )
-    print(f"Built {len(written)} file(s) into {out_root}")
+    if ctx.up_to_date:
+        print(f"Inputs unchanged; {out_root} is up to date ({len(written)} file(s)). Use --force to rebuild.")
+        return
+    suffix = f" (shard {shard.label})" if shard else ""
+    print(f"Built {len(written)} file(s) into {out_root}{suffix}")
 
 
 def main() -> None:
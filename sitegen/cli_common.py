@@ -0,0 +1,50 @@
+"""Helpers shared by the sitegen command-line entry points.
+
+Kept free of heavy imports (pydantic, PyYAML, Jinja2, BeautifulSoup) so any CLI
+can import it before argument parsing without paying for dependencies it may not
+need.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+from datetime import datetime, timezone
+
+from .config_loader import load_experiences
+
+
+def safe_git_sha() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (subprocess.SubprocessError, FileNotFoundError):
+        return None
+
+
+def timestamp_for_build(*, deterministic: bool) -> str:
+    if not deterministic:
+        return datetime.now(timezone.utc).isoformat()
+
+    source_date_epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    try:
+        epoch = int(source_date_epoch) if source_date_epoch is not None else 0
+    except ValueError:
+        epoch = 0
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def build_label(timestamp: str | None, git_sha: str | None, *, override: str | None) -> str | None:
+    if override is not None:
+        return override
+
+    label_parts = []
+    if timestamp:
+        label_parts.append(f"ts={timestamp}")
+    if git_sha:
+        label_parts.append(f"sha={git_sha}")
+    return " ".join(label_parts) if label_parts else None
+
+
+__all__ = ["build_label", "load_experiences", "safe_git_sha", "timestamp_for_build"]
@@ -5,6 +5,7 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
+from .micro_ids import BLOCK_ID_SCHEMES
 from .migrate_legacy import migrate_legacy_dir
 
 
@@ -12,9 +13,24 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Migrate legacy posts to micro world format")
     parser.add_argument("--posts", type=Path, required=True, help="Path to legacy posts directory")
     parser.add_argument("--out", type=Path, required=True, help="Output directory for micro files")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for converting posts (default: CPU count for large inputs, else 1)",
+    )
+    parser.add_argument("--progress", action="store_true", help="Print progress and a timing report to stderr")
+    parser.add_argument(
+        "--id-scheme",
+        choices=sorted(BLOCK_ID_SCHEMES),
+        default=None,
+        help="Block id scheme (default: the scheme the --out store already uses, else v1)",
+    )
     args = parser.parse_args()
 
-    migrate_legacy_dir(args.posts, args.out)
+    migrate_legacy_dir(
+        args.posts, args.out, workers=args.workers, progress=args.progress, scheme=args.id_scheme
+    )
 
 
 if __name__ == "__main__":
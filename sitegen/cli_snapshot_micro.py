@@ -7,8 +7,14 @@ import sys
 import tempfile
 from pathlib import Path
 
-from .snapshot_micro import compare_dirs, legacy_dir_to_micro_snapshot, write_micro_snapshot
-from .verify_roundtrip import verify_roundtrip_all
+from .micro_ids import BLOCK_ID_SCHEMES
+from .micro_store import store_block_id_scheme
+from .snapshot_micro import (
+    compare_dirs,
+    legacy_dir_to_micro_snapshot,
+    legacy_dir_to_verified_snapshot,
+    write_micro_snapshot,
+)
 
 
 def _parse_args() -> argparse.Namespace:
@@ -20,31 +26,72 @@ def _parse_args() -> argparse.Namespace:
         action="store_true",
         help="Regenerate snapshot in a temp dir, compare with existing snapshot, and verify round-trip equality",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for converting posts (default: CPU count for large inputs, else 1)",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Print progress and a timing report to stderr",
+    )
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="With --check, list differing files instead of printing unified diffs",
+    )
+    parser.add_argument(
+        "--max-diff-lines",
+        type=int,
+        default=None,
+        help="With --check, truncate diff output after this many lines (default: no limit)",
+    )
+    parser.add_argument(
+        "--id-scheme",
+        choices=sorted(BLOCK_ID_SCHEMES),
+        default=None,
+        help="Block id scheme (default: the scheme the --out store already uses, else v1)",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = _parse_args()
-    entities, blocks, index = legacy_dir_to_micro_snapshot(args.posts, args.out)
 
     if args.check:
+        # One pass converts each post and verifies its round trip inline.
+        entities, blocks, index, errors = legacy_dir_to_verified_snapshot(
+            args.posts,
+            workers=args.workers,
+            progress=args.progress,
+            scheme=store_block_id_scheme(args.out, args.id_scheme),
+        )
         with tempfile.TemporaryDirectory() as tmp_dir:
             tmp_path = Path(tmp_dir)
             write_micro_snapshot(tmp_path, entities, blocks, index)
-            equal, diff = compare_dirs(args.out, tmp_path)
-            ok, errors = verify_roundtrip_all(args.posts)
+            equal, diff = compare_dirs(
+                args.out,
+                tmp_path,
+                max_diff_lines=args.max_diff_lines or None,
+                summary=args.summary,
+            )
 
             exit_code = 0
             if not equal:
                 sys.stderr.write(diff)
                 exit_code = 1
-            if not ok:
+            if errors:
                 sys.stderr.write("\n".join(errors))
                 exit_code = 1
             if exit_code:
                 sys.exit(exit_code)
         return
 
+    entities, blocks, index = legacy_dir_to_micro_snapshot(
+        args.posts, args.out, workers=args.workers, progress=args.progress, scheme=args.id_scheme
+    )
     write_micro_snapshot(args.out, entities, blocks, index)
 
 
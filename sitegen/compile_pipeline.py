@@ -4,13 +4,14 @@ from __future__ import annotations
 
 import importlib.util
 import html
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 from .dom_model import DomNode, dom_to_html
 from .io_utils import write_json
 from .micro_store import MicroStore, load_micro_store
+from .themes import compile_theme_css
 
 
 def resolve_blocks(entity: Dict[str, Any], store: MicroStore) -> List[Dict[str, Any]]:
@@ -110,28 +111,7 @@ def blocks_to_dom(blocks: List[Dict[str, Any]], ctx: Dict[str, Any] | None = Non
 
 
 def apply_theme(dom: List[DomNode], theme: Dict[str, Any] | None = None) -> Tuple[List[DomNode], str]:
-    theme = theme or {}
-    css_lines = [
-        ":root {",
-        "  --mw-font-size-base: 16px;",
-        "  --mw-font-family: sans-serif;",
-        "  --mw-text-color: #222;",
-        "}",
-        ".mw-heading { font-family: var(--mw-font-family); color: var(--mw-text-color); }",
-        ".mw-paragraph { font-family: var(--mw-font-family); color: var(--mw-text-color); line-height: 1.6; }",
-        ".mw-link { color: #0a6cff; text-decoration: underline; }",
-        ".mw-image { margin: 1em 0; }",
-        ".mw-image-img { max-width: 100%; height: auto; display: block; }",
-        ".mw-image-caption { font-size: 0.9em; color: #555; }",
-        ".mw-section { margin: 1.5em 0; }",
-        ".mw-raw { margin: 1em 0; }",
-        ".mw-md { margin: 1em 0; }",
-    ]
-    if theme:
-        for key, value in theme.items():
-            css_lines.append(f":root {{ --{key}: {value}; }}")
-    css_text = "\n".join(css_lines) + "\n"
-    return dom, css_text
+    return dom, compile_theme_css(theme)
 
 
 def emit_legacy(entity: Dict[str, Any], html_text: str) -> Dict[str, Any]:
@@ -180,25 +160,31 @@ class CompiledPost:
 class CompiledStore:
     posts: Dict[str, CompiledPost]
     css_text: str
+    theme: Dict[str, Any] = field(default_factory=dict)
+
+
+def compile_entity(entity: Dict[str, Any], store: MicroStore) -> CompiledPost:
+    """Compile a single micro entity into an HTML fragment."""
+
+    blocks = resolve_blocks(entity, store)
+    dom = blocks_to_dom(blocks, ctx={"entity": entity})
+    return CompiledPost(entity=entity, html=dom_to_html(dom))
+
+
+def iter_compile_store_v2(store: MicroStore, *, variant: str | None = None) -> Iterator[CompiledPost]:
+    """Lazily compile entities in index order, holding one post's HTML at a time."""
+
+    for entity in store.iter_entities(variant=variant):
+        yield compile_entity(entity, store)
 
 
 def compile_store_v2(store: MicroStore, *, theme: dict[str, Any] | None = None) -> CompiledStore:
     """Compile micro store into HTML fragments without emitting legacy JSON."""
 
-    compiled_posts: Dict[str, CompiledPost] = {}
-    css_text: str | None = None
     theme = theme or {}
-
-    for entity in store.iter_posts():
-        blocks = resolve_blocks(entity, store)
-        dom = blocks_to_dom(blocks, ctx={"entity": entity})
-        dom, css_text_candidate = apply_theme(dom, theme=theme)
-        if css_text is None:
-            css_text = css_text_candidate
-        html_text = dom_to_html(dom)
-        compiled_posts[entity["id"]] = CompiledPost(entity=entity, html=html_text)
-
-    return CompiledStore(posts=compiled_posts, css_text=css_text or "")
+    compiled_posts = {post.id: post for post in iter_compile_store_v2(store)}
+    css_text = compile_theme_css(theme) if compiled_posts else ""
+    return CompiledStore(posts=compiled_posts, css_text=css_text, theme=dict(theme))
 
 
 def build_posts(micro_dir: Path, dist_dir: Path) -> None:
@@ -207,16 +193,10 @@ def build_posts(micro_dir: Path, dist_dir: Path) -> None:
     dist_dir.mkdir(parents=True, exist_ok=True)
     css_path = dist_dir / "micro.css"
 
-    generated_css = None
-
-    for entity in store.iter_posts():
-        blocks = resolve_blocks(entity, store)
-        dom = blocks_to_dom(blocks, ctx={"entity": entity})
-        dom, css_text = apply_theme(dom, theme={})
-        if generated_css is None:
-            css_path.write_text(css_text, encoding="utf-8")
-            generated_css = css_text
-        html_text = dom_to_html(dom)
-        legacy = emit_legacy(entity, html_text)
+    if store.index.get("entity_ids"):
+        css_path.write_text(compile_theme_css(), encoding="utf-8")
+
+    for post in iter_compile_store_v2(store):
+        legacy = emit_legacy(post.entity, post.html)
         blocks_dir.mkdir(parents=True, exist_ok=True)
-        write_json(blocks_dir / f"{entity['id']}.json", legacy)
+        write_json(blocks_dir / f"{post.id}.json", legacy)
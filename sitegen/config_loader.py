@@ -0,0 +1,112 @@
+"""Cached loading of experiences.yaml shared by the CLIs and audit scripts.
+
+Parsed YAML is cached as JSON, one file per config path holding the SHA-256
+of the contents it was parsed from, so repeated invocations skip PyYAML
+entirely and an edited config overwrites its cache entry instead of adding one. When a parse is needed the libyaml
+``CSafeLoader`` is used if PyYAML was built with it. Validation into
+``ExperienceSpec`` runs on the cached payload; it is cheap compared to parsing.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .models import ExperienceSpec
+
+CACHE_VERSION = 1
+CACHE_DIR_ENV = "SITEGEN_CACHE_DIR"
+
+_parsed_by_digest: dict[str, Any] = {}
+
+
+def cache_dir() -> Path | None:
+    """Return the on-disk cache directory, or None when disabled via an empty env value."""
+
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured is not None:
+        return Path(configured) if configured else None
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "sitegen"
+
+
+def _parse_yaml(text: str) -> Any:
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(text, Loader=loader)
+
+
+def _read_cache(path: Path, digest: str) -> Any | None:
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if payload.get("version") != CACHE_VERSION or payload.get("sha256") != digest:
+        return None
+    return payload.get("data")
+
+
+def _write_cache(path: Path, digest: str, data: Any) -> None:
+    payload = {"version": CACHE_VERSION, "sha256": digest, "data": data}
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError):
+        # The cache is an optimization only; unwritable dirs or non-JSON YAML
+        # values (dates, etc.) simply fall back to parsing next time.
+        tmp_path.unlink(missing_ok=True)
+
+
+def _cache_name(path: Path) -> str:
+    key = hashlib.sha256(str(Path(path).resolve()).encode("utf-8")).hexdigest()[:16]
+    return f"experiences-{key}.json"
+
+
+def load_experiences_data(path: Path) -> Any:
+    """Return the parsed experiences.yaml payload (plain dicts/lists)."""
+
+    raw = Path(path).read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+
+    data = _parsed_by_digest.get(digest)
+    if data is None:
+        directory = cache_dir()
+        cache_path = directory / _cache_name(path) if directory else None
+        if cache_path is not None:
+            data = _read_cache(cache_path, digest)
+        if data is None:
+            data = _parse_yaml(raw.decode("utf-8"))
+            if data is None:
+                data = []
+            if cache_path is not None:
+                _write_cache(cache_path, digest, data)
+        _parsed_by_digest[digest] = data
+
+    return copy.deepcopy(data)
+
+
+def load_experiences(path: Path) -> list["ExperienceSpec"]:
+    """Load and validate experiences.yaml into ExperienceSpec models."""
+
+    from pydantic import ValidationError
+
+    from .models import ExperienceSpec
+
+    data = load_experiences_data(path)
+    if not isinstance(data, list):
+        raise SystemExit("experiences.yaml must contain a list of experiences.")
+    try:
+        return [ExperienceSpec.model_validate(item) for item in data]
+    except ValidationError as exc:
+        raise SystemExit(f"Invalid experience spec in {path}: {exc}") from exc
+
+
+__all__ = ["CACHE_DIR_ENV", "cache_dir", "load_experiences", "load_experiences_data"]
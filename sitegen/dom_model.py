@@ -3,8 +3,10 @@
 from __future__ import annotations
 
 import html
+import re
 from dataclasses import dataclass, field
-from typing import Dict, List, Sequence
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
 
 
 @dataclass
@@ -19,12 +21,29 @@ class DomNode:
 
 DomContent = DomNode | str
 
+# Characters rewritten by html.escape(..., quote=True).
+_NEEDS_ESCAPE = re.compile(r"[&<>\"']")
+
+
+def escape_html(text: str) -> str:
+    """html.escape with quote=True, returning the input untouched when nothing needs escaping."""
+
+    if _NEEDS_ESCAPE.search(text) is None:
+        return text
+    return html.escape(text, quote=True)
+
+
+@lru_cache(maxsize=1024)
+def _render_attr_items(items: Tuple[Tuple[str, str], ...]) -> str:
+    # Constant sets such as {"class": "mw-paragraph"} are rendered once per process.
+    parts = [f'{name}="{escape_html(value)}"' for name, value in items]
+    return " " + " ".join(parts)
+
 
 def _render_attrs(attrs: Dict[str, str]) -> str:
     if not attrs:
         return ""
-    parts = [f'{name}="{html.escape(value, quote=True)}"' for name, value in attrs.items()]
-    return " " + " ".join(parts)
+    return _render_attr_items(tuple(attrs.items()))
 
 
 def _render_children(children: Sequence[DomContent]) -> str:
@@ -33,7 +52,7 @@ def _render_children(children: Sequence[DomContent]) -> str:
         if isinstance(child, DomNode):
             html_parts.append(dom_to_html([child]))
         else:
-            html_parts.append(html.escape(str(child)))
+            html_parts.append(escape_html(str(child)))
     return "".join(html_parts)
 
 
@@ -49,7 +68,7 @@ def dom_to_html(dom: List[DomNode]) -> str:
             # Raw HTML insertion assumes content is trusted.
             parts.append(node.raw_html)
         elif node.text is not None:
-            parts.append(html.escape(node.text))
+            parts.append(escape_html(node.text))
         if node.children:
             parts.append(_render_children(node.children))
         parts.append(f"</{node.tag}>")
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import json
+import os
 import sys
 from pathlib import Path
 from typing import Any
@@ -28,5 +29,16 @@ def write_json_stable(path: Path, data: Any) -> None:
     path.write_text(stable_json_dumps(data), encoding="utf-8")
 
 
+def write_text_atomic(path: Path, text: str) -> None:
+    """Write via a temp file and ``os.replace`` so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
 def warn(msg: str) -> None:
     print(msg, file=sys.stderr)
@@ -0,0 +1,104 @@
+"""Worker-pool helpers for converting many legacy post files.
+
+Each file is read and converted in a worker process; results come back in input
+order so callers merge blocks exactly as a serial loop would. Small inputs run
+in-process because starting a pool costs more than it saves.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, List, Sequence, Tuple, TypeVar
+
+from .io_utils import warn
+
+T = TypeVar("T")
+
+SERIAL_THRESHOLD = 32
+
+
+@dataclass
+class PipelineReport:
+    """Timing summary for one ``map_paths`` run."""
+
+    label: str
+    files: int = 0
+    workers: int = 1
+    elapsed: float = 0.0
+    work_seconds: float = 0.0
+
+    def format(self) -> str:
+        rate = self.files / self.elapsed if self.elapsed else 0.0
+        return (
+            f"[{self.label}] {self.files} file(s) in {self.elapsed:.2f}s "
+            f"with {self.workers} worker(s) ({rate:.0f} files/s, {self.work_seconds:.2f}s of work)"
+        )
+
+
+def resolve_workers(workers: int | None, total: int) -> int:
+    """Pick a worker count: explicit values win, otherwise serial for small inputs."""
+
+    if workers is not None:
+        return max(1, min(workers, max(total, 1)))
+    if total < SERIAL_THRESHOLD:
+        return 1
+    return max(1, min(os.cpu_count() or 1, total))
+
+
+def _timed_call(func: Callable[[Path], T], path: Path) -> Tuple[T, float]:
+    start = time.perf_counter()
+    result = func(path)
+    return result, time.perf_counter() - start
+
+
+def map_paths(
+    func: Callable[[Path], T],
+    paths: Iterable[Path],
+    *,
+    label: str,
+    workers: int | None = None,
+    progress: bool = False,
+) -> Tuple[List[T], PipelineReport]:
+    """Apply ``func`` to every path, in parallel when worthwhile, preserving order.
+
+    ``func`` must be a module-level function so it can be sent to worker
+    processes. With ``progress`` a running count and the final timing line are
+    written to stderr.
+    """
+
+    ordered: Sequence[Path] = list(paths)
+    report = PipelineReport(label=label, files=len(ordered), workers=resolve_workers(workers, len(ordered)))
+    step = max(1, len(ordered) // 10)
+    start = time.perf_counter()
+
+    results: List[T] = []
+    call = partial(_timed_call, func)
+    if report.workers == 1:
+        timed = map(call, ordered)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=report.workers)
+        chunksize = max(1, len(ordered) // (report.workers * 4))
+        timed = executor.map(call, ordered, chunksize=chunksize)
+    try:
+        for done, (result, seconds) in enumerate(timed, start=1):
+            results.append(result)
+            report.work_seconds += seconds
+            if progress and (done % step == 0 or done == len(ordered)):
+                warn(f"[{label}] {done}/{len(ordered)}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    report.elapsed = time.perf_counter() - start
+    if progress:
+        warn(report.format())
+    return results, report
+
+
+__all__ = ["PipelineReport", "SERIAL_THRESHOLD", "map_paths", "resolve_workers"]
@@ -0,0 +1,158 @@
+"""Link graph recorded while rendering, written as ``links.json``.
+
+Every page the build renders reports the hrefs it computed (navigation, episode
+and CTA links from the view model, the switcher and stylesheet hrefs, alias
+redirects). When the build finishes, each href is resolved against the files
+the build produced, so a broken link can be found from ``links.json`` alone,
+without parsing HTML or touching the output tree again.
+
+``links.json`` has the shape::
+
+    {"version": 1, "hrefPrefix": "", "files": [...],
+     "pages": {"hina/index.html": [{"href": "/hina/list/", "target": "hina/list/index.html"}]}}
+
+Paths are POSIX and relative to the output root. ``target`` is None for
+external URLs and starts with ``../`` for files outside the output root.
+"""
+
+from __future__ import annotations
+
+import json
+import posixpath
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import unquote, urlparse
+
+LINK_INDEX_NAME = "links.json"
+LINK_INDEX_VERSION = 1
+
+
+def _relative_to_root(path: Path, out_root: Path) -> Optional[str]:
+    try:
+        return path.relative_to(out_root).as_posix()
+    except ValueError:
+        return None
+
+
+def link_candidates(href: str, page: str, *, href_prefix: str = "") -> Optional[list[str]]:
+    """Output-root paths ``href`` on ``page`` may point at, most specific first.
+
+    Mirrors how a static server maps URLs: a directory means its
+    ``index.html``, and an extensionless path may also be ``<path>.html``.
+    Returns None for external URLs.
+    """
+
+    parsed = urlparse(href)
+    if parsed.scheme or parsed.netloc:
+        return None
+    path = unquote(parsed.path)
+    if not path:
+        return [page]
+    if path.startswith("/"):
+        root = href_prefix or "/"
+        path = posixpath.relpath(posixpath.normpath(path), root)
+    else:
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(page), path))
+    if path == ".":
+        return ["index.html"]
+    if parsed.path.endswith("/"):
+        return [f"{path}/index.html"]
+    if posixpath.splitext(path)[1]:
+        return [path]
+    return [path, f"{path}/index.html", f"{path}.html"]
+
+
+@dataclass
+class LinkIndex:
+    """Outgoing hrefs per rendered page, keyed by output-root-relative path."""
+
+    out_root: Path
+    href_prefix: str = ""
+    pages: dict[str, list[str]] = field(default_factory=dict)
+    files: set[str] = field(default_factory=set)
+
+    def add_page(self, page_file: Path, hrefs: Iterable[Optional[str]]) -> None:
+        page = _relative_to_root(page_file, self.out_root)
+        if page is None:
+            return
+        known = self.pages.setdefault(page, [])
+        for href in hrefs:
+            if href and href not in known:
+                known.append(href)
+
+    def add_files(self, paths: Iterable[Path]) -> None:
+        for path in paths:
+            relative = _relative_to_root(path, self.out_root)
+            if relative is not None:
+                self.files.add(relative)
+
+    def to_json(self) -> dict:
+        """Resolve every recorded href against the known files."""
+
+        files = self.files | set(self.pages)
+        pages: dict[str, list[dict]] = {}
+        for page in sorted(self.pages):
+            links = []
+            for href in self.pages[page]:
+                candidates = link_candidates(href, page, href_prefix=self.href_prefix)
+                target = None
+                if candidates is not None:
+                    target = next((path for path in candidates if path in files), candidates[0])
+                links.append({"href": href, "target": target})
+            pages[page] = links
+        return {
+            "version": LINK_INDEX_VERSION,
+            "hrefPrefix": self.href_prefix,
+            "files": sorted(files),
+            "pages": pages,
+        }
+
+    def write(self) -> Path:
+        path = self.out_root / LINK_INDEX_NAME
+        path.write_text(json.dumps(self.to_json(), ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        return path
+
+
+def view_model_hrefs(view_model: dict) -> list[str]:
+    """Hrefs a page's view model hands to its template."""
+
+    hrefs = [link["href"] for link in view_model["nav"]["links"]]
+    hrefs.extend(action["href"] for action in view_model["nav"]["actions"])
+    hrefs.extend(episode["href"] for episode in view_model["episodes"])
+    hrefs.append(view_model["switcher"]["routes_href"])
+    return hrefs
+
+
+def verify_link_index(payload: dict) -> list[str]:
+    """Broken links in a ``links.json`` payload; links leaving the output root are not checked."""
+
+    if payload.get("version") != LINK_INDEX_VERSION:
+        return [f"Unsupported {LINK_INDEX_NAME} version: {payload.get('version')}"]
+    files = set(payload["files"])
+    errors: list[str] = []
+    for page, links in payload["pages"].items():
+        for link in links:
+            target = link["target"]
+            if target is None or target.startswith("../"):
+                continue
+            if target not in files:
+                errors.append(f"Broken link in {page}: {link['href']} -> {target}")
+    return errors
+
+
+def load_link_index(out_root: Path) -> Optional[dict]:
+    path = out_root / LINK_INDEX_NAME
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+__all__ = [
+    "LINK_INDEX_NAME",
+    "LinkIndex",
+    "link_candidates",
+    "load_link_index",
+    "verify_link_index",
+    "view_model_hrefs",
+]
@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import hashlib
-from typing import Any, Dict
+import json
+from typing import Any, Callable, Dict, Iterable, Mapping, Tuple
 
 from .io_utils import stable_json_dumps
 
@@ -30,7 +31,124 @@ def block_fingerprint(block: Dict[str, Any]) -> str:
     return stable_json_dumps(normalized)
 
 
-def block_id_from_block(block: Dict[str, Any]) -> str:
-    fingerprint = block_fingerprint(block)
-    digest = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
-    return f"blk_{digest}"
+def _strip_for_fingerprint(obj: Any) -> Any:
+    """Drop nulls and ids in one pass; key order is left to ``sort_keys``."""
+    if isinstance(obj, dict):
+        return {
+            key: _strip_for_fingerprint(value)
+            for key, value in obj.items()
+            if value is not None and key != "id"
+        }
+    if isinstance(obj, list):
+        return [_strip_for_fingerprint(item) for item in obj]
+    return obj
+
+
+def canonical_block_fingerprint(block: Dict[str, Any]) -> str:
+    """Compact canonical JSON used by the v2 id schemes.
+
+    Same normalization as ``block_fingerprint`` but without indentation, which
+    also lets ``json`` use its C encoder.
+    """
+    return json.dumps(
+        _strip_for_fingerprint(block),
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def _sha1_hex(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _blake2b_hex(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=20).hexdigest()
+
+
+# scheme name -> (id prefix, fingerprint function, digest function)
+BLOCK_ID_SCHEMES: Dict[str, Tuple[str, Callable[[Dict[str, Any]], str], Callable[[str], str]]] = {
+    "v1": ("blk_", block_fingerprint, _sha1_hex),
+    "v2": ("blk2_", canonical_block_fingerprint, _sha1_hex),
+    "v2-blake2": ("blk2b_", canonical_block_fingerprint, _blake2b_hex),
+}
+DEFAULT_BLOCK_ID_SCHEME = "v1"
+
+
+def block_id_scheme(block_id: str) -> str:
+    """Return the scheme that produced ``block_id`` (ids are self-describing by prefix)."""
+    for name, (prefix, _, _) in sorted(
+        BLOCK_ID_SCHEMES.items(), key=lambda item: len(item[1][0]), reverse=True
+    ):
+        if block_id.startswith(prefix):
+            return name
+    raise ValueError(f"Unknown block id scheme for {block_id!r}")
+
+
+def block_id_from_block(block: Dict[str, Any], *, scheme: str = DEFAULT_BLOCK_ID_SCHEME) -> str:
+    try:
+        prefix, fingerprint, digest = BLOCK_ID_SCHEMES[scheme]
+    except KeyError as exc:
+        raise ValueError(f"Unknown block id scheme: {scheme}") from exc
+    return f"{prefix}{digest(fingerprint(block))}"
+
+
+INDEX_DIGEST_VERSION = 1
+
+
+def transitive_block_ids(entity: Dict[str, Any], blocks_by_id: Mapping[str, Dict[str, Any]]) -> list[str]:
+    """Return block ids reachable from the entity body, depth-first and de-duplicated."""
+
+    ordered: list[str] = []
+    seen: set[str] = set()
+    stack = list(reversed(entity.get("body", {}).get("blockRefs", [])))
+    while stack:
+        block_id = stack.pop()
+        if block_id in seen:
+            continue
+        seen.add(block_id)
+        ordered.append(block_id)
+        children = blocks_by_id.get(block_id, {}).get("children") or []
+        stack.extend(reversed(children))
+    return ordered
+
+
+def entity_digest(entity: Dict[str, Any], blocks_by_id: Mapping[str, Dict[str, Any]]) -> str:
+    """Digest of the entity JSON plus its transitive block ids.
+
+    Block ids are content hashes, so a change in any referenced block (or in a
+    Section's children) changes the entity digest.
+    """
+
+    payload = {"entity": entity, "blocks": transitive_block_ids(entity, blocks_by_id)}
+    return hashlib.sha256(stable_json_dumps(payload).encode("utf-8")).hexdigest()
+
+
+def store_root_hash(entity_digests: Mapping[str, str], block_ids: Iterable[str]) -> str:
+    payload = {"entities": dict(sorted(entity_digests.items())), "block_ids": sorted(block_ids)}
+    return hashlib.sha256(stable_json_dumps(payload).encode("utf-8")).hexdigest()
+
+
+def index_with_digests(
+    index: Dict[str, Any],
+    entities: Iterable[Dict[str, Any]],
+    blocks_by_id: Mapping[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Return ``index`` extended with per-entity digests and the store root hash.
+
+    ``entity_ids``/``block_ids`` are kept as-is so older readers keep working.
+    """
+
+    digests = {entity["id"]: entity_digest(entity, blocks_by_id) for entity in entities}
+    return index_from_entity_digests(index, digests)
+
+
+def index_from_entity_digests(index: Dict[str, Any], digests: Mapping[str, str]) -> Dict[str, Any]:
+    """Like ``index_with_digests`` for callers that already computed each entity digest."""
+
+    return {
+        **index,
+        "digest_version": INDEX_DIGEST_VERSION,
+        "entity_digests": dict(digests),
+        "root_hash": store_root_hash(digests, index.get("block_ids", [])),
+    }
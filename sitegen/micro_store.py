@@ -2,12 +2,67 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, List
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Mapping
 
-from .io_utils import read_json
-from .micro_ids import block_fingerprint, block_id_from_block
+from .io_utils import read_json, stable_json_dumps, write_text_atomic
+from .micro_ids import (
+    BLOCK_ID_SCHEMES,
+    DEFAULT_BLOCK_ID_SCHEME,
+    block_fingerprint,
+    block_id_from_block,
+    block_id_scheme,
+    entity_digest,
+    index_from_entity_digests,
+    index_with_digests,
+    store_root_hash,
+)
+
+
+@dataclass(frozen=True)
+class MicroStoreDiff:
+    """Entity ids that differ between two micro stores, each sorted."""
+
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def diff_entity_digests(old: Dict[str, str], new: Dict[str, str]) -> MicroStoreDiff:
+    return MicroStoreDiff(
+        added=sorted(new.keys() - old.keys()),
+        removed=sorted(old.keys() - new.keys()),
+        changed=sorted(key for key in old.keys() & new.keys() if old[key] != new[key]),
+    )
+
+
+def _read_block(path: Path, block_id: str) -> Dict[str, Any]:
+    block = read_json(path)
+    if block.get("id") != block_id:
+        raise ValueError(f"Block id mismatch for {path}: expected {block_id}")
+    expected_id = block_id_from_block(block, scheme=block_id_scheme(block_id))
+    if expected_id != block_id:
+        raise ValueError(f"Block fingerprint mismatch for {block_id}: expected {expected_id}")
+    return block
+
+
+def _read_pending_block(blocks_dir: Path, block_id: str, blocks_by_id: Dict[str, Dict[str, Any]]) -> bool:
+    """Add a block (and its children) that is on disk but not yet in index.json."""
+
+    path = blocks_dir / f"{block_id}.json"
+    if not path.is_file():
+        return False
+    block = _read_block(path, block_id)
+    blocks_by_id[block_id] = block
+    return all(
+        child in blocks_by_id or _read_pending_block(blocks_dir, child, blocks_by_id)
+        for child in block.get("children") or []
+    )
 
 
 @dataclass
@@ -20,13 +75,20 @@ class MicroStore:
     index: dict
 
     @classmethod
-    def load(cls, micro_dir: Path) -> "MicroStore":
+    def load(cls, micro_dir: Path, *, verify: bool = False, allow_pending: bool = False) -> "MicroStore":
         """Load and validate a micro store directory.
 
         Required layout:
         - index.json: lists entity_ids and block_ids
         - entities/: one JSON file per entity_id
         - blocks/: one JSON file per block_id
+
+        Block/entity files that index.json does not list are rejected.
+        ``allow_pending=True`` instead accepts the state in the middle of a
+        ``sync_micro_store`` (unlisted files are ignored and a block written
+        ahead of the index is read on demand); only the sync's own tests need
+        it. Digests are not computed here; pass ``verify=True`` to also check
+        the recorded ``entity_digests``/``root_hash`` (see ``verify_digests``).
         """
 
         if not micro_dir.exists():
@@ -50,13 +112,7 @@ class MicroStore:
             path = blocks_dir / f"{block_id}.json"
             if not path.exists():
                 raise FileNotFoundError(f"Block listed in index missing: {path}")
-            block = read_json(path)
-            if block.get("id") != block_id:
-                raise ValueError(f"Block id mismatch for {path}: expected {block_id}")
-            expected_id = block_id_from_block(block)
-            if expected_id != block_id:
-                raise ValueError(f"Block fingerprint mismatch for {block_id}: expected {expected_id}")
-            blocks_by_id[block_id] = block
+            blocks_by_id[block_id] = _read_block(path, block_id)
 
         entities_by_id: Dict[str, Dict[str, Any]] = {}
         for entity_id in entity_ids:
@@ -67,26 +123,45 @@ class MicroStore:
             if entity.get("id") != entity_id:
                 raise ValueError(f"Entity id mismatch for {path}: expected {entity_id}")
             required_fields = ("variant", "type", "meta", "body", "relations")
-            for field in required_fields:
-                if field not in entity:
-                    raise ValueError(f"Entity {entity_id} missing required field '{field}'")
+            for field_name in required_fields:
+                if field_name not in entity:
+                    raise ValueError(f"Entity {entity_id} missing required field '{field_name}'")
             block_refs = entity.get("body", {}).get("blockRefs", [])
             if not isinstance(block_refs, list):
                 raise ValueError(f"Entity {entity_id} body.blockRefs must be a list")
             for ref in block_refs:
-                if ref not in blocks_by_id:
+                if ref in blocks_by_id:
+                    continue
+                if not (allow_pending and _read_pending_block(blocks_dir, ref, blocks_by_id)):
                     raise KeyError(f"Entity {entity_id} references missing block {ref}")
             entities_by_id[entity_id] = entity
 
-        # Ensure on-disk files do not introduce extra blocks/entities unexpectedly.
-        extra_blocks = {path.stem for path in blocks_dir.glob("*.json")} - set(block_ids)
-        if extra_blocks:
-            raise ValueError(f"Blocks present but absent from index: {sorted(extra_blocks)}")
-        extra_entities = {path.stem for path in entities_dir.glob("*.json")} - set(entity_ids)
-        if extra_entities:
-            raise ValueError(f"Entities present but absent from index: {sorted(extra_entities)}")
+        if not allow_pending:
+            # Ensure on-disk files do not introduce extra blocks/entities unexpectedly.
+            extra_blocks = {path.stem for path in blocks_dir.glob("*.json")} - set(block_ids)
+            if extra_blocks:
+                raise ValueError(f"Blocks present but absent from index: {sorted(extra_blocks)}")
+            extra_entities = {path.stem for path in entities_dir.glob("*.json")} - set(entity_ids)
+            if extra_entities:
+                raise ValueError(f"Entities present but absent from index: {sorted(extra_entities)}")
 
-        return cls(root=micro_dir, blocks_by_id=blocks_by_id, entities_by_id=entities_by_id, index=index)
+        store = cls(root=micro_dir, blocks_by_id=blocks_by_id, entities_by_id=entities_by_id, index=index)
+        if verify:
+            store.verify_digests()
+        return store
+
+    def verify_digests(self) -> None:
+        """Raise ValueError when index.json digests do not match the loaded contents."""
+
+        recorded = self.index.get("entity_digests")
+        if recorded is not None and recorded != self.entity_digests:
+            stale = diff_entity_digests(recorded, self.entity_digests)
+            raise ValueError(
+                "index.json entity_digests are stale for: "
+                + ", ".join(stale.added + stale.removed + stale.changed)
+            )
+        if "root_hash" in self.index and self.index["root_hash"] != self.root_hash:
+            raise ValueError("index.json root_hash does not match the store contents")
 
     def resolve_block(self, block_id: str) -> Dict[str, Any]:
         return self.blocks_by_id[block_id]
@@ -100,6 +175,26 @@ class MicroStore:
 
         return list(self.entities_by_id.values())
 
+    @cached_property
+    def entity_digests(self) -> Dict[str, str]:
+        """Per-entity digests covering the entity JSON and its transitive block ids."""
+
+        return {
+            entity_id: entity_digest(entity, self.blocks_by_id)
+            for entity_id, entity in self.entities_by_id.items()
+        }
+
+    @cached_property
+    def root_hash(self) -> str:
+        return store_root_hash(self.entity_digests, self.blocks_by_id.keys())
+
+    def diff(self, other: "MicroStore") -> MicroStoreDiff:
+        """Compare entity digests; ``other`` is treated as the newer store."""
+
+        if self.root_hash == other.root_hash:
+            return MicroStoreDiff()
+        return diff_entity_digests(self.entity_digests, other.entity_digests)
+
     def iter_entities(self, *, variant: str | None = None) -> Iterator[Dict[str, Any]]:
         ids = self.index.get("entity_ids", [])
         for entity_id in ids:
@@ -117,6 +212,236 @@ class MicroStore:
         return self.iter_posts(variant=variant)
 
 
+def store_block_id_scheme(micro_dir: Path, scheme: str | None = None) -> str:
+    """Block id scheme to write into ``micro_dir``.
+
+    An explicit ``scheme`` wins; otherwise the scheme of the ids already listed
+    in the store's index.json is kept, so re-importing into a migrated store
+    does not rewrite every block id. New or empty stores use the default.
+    """
+
+    if scheme is not None:
+        if scheme not in BLOCK_ID_SCHEMES:
+            raise ValueError(f"Unknown block id scheme: {scheme}")
+        return scheme
+    index_path = micro_dir / "index.json"
+    if index_path.is_file():
+        index = read_json(index_path)
+        # Stores written by migrate_legacy list their ids under "blocks".
+        block_ids = index.get("block_ids") or index.get("blocks") or []
+        if block_ids:
+            return block_id_scheme(block_ids[0])
+    return DEFAULT_BLOCK_ID_SCHEME
+
+
+def read_entity_digests(micro_dir: Path) -> Dict[str, str]:
+    """Return entity digests from index.json, loading the store only for old indexes."""
+
+    index = read_json(micro_dir / "index.json")
+    digests = index.get("entity_digests")
+    if isinstance(digests, dict):
+        return digests
+    return MicroStore.load(micro_dir).entity_digests
+
+
+def diff_micro_store_dirs(old_dir: Path, new_dir: Path) -> MicroStoreDiff:
+    """Diff two store directories, reading only index.json when both carry digests."""
+
+    return diff_entity_digests(read_entity_digests(old_dir), read_entity_digests(new_dir))
+
+
+@dataclass(frozen=True)
+class SyncReport:
+    """Files touched by ``sync_micro_store``, as paths relative to the store root."""
+
+    written: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+
+def _sync_file(path: Path, text: str) -> bool:
+    encoded = text.encode("utf-8")
+    try:
+        if path.stat().st_size == len(encoded) and path.read_bytes() == encoded:
+            return False
+    except FileNotFoundError:
+        pass
+    write_text_atomic(path, text)
+    return True
+
+
+def sync_micro_store(
+    micro_dir: Path,
+    entities: Iterable[Dict[str, Any]],
+    blocks: Mapping[str, Dict[str, Any]],
+    index: dict,
+    *,
+    trusted: Collection[str] = (),
+) -> SyncReport:
+    """Bring ``micro_dir`` in line with the given store contents in place.
+
+    New or changed block files are written first, then entity files, then
+    ``index.json`` is replaced atomically, and only then are files no longer
+    listed removed, so a reader never needs a file index.json does not list
+    (``MicroStore.load(..., allow_pending=True)`` loads every intermediate
+    state). Anything else in ``micro_dir`` (e.g. nested
+    stores) is left alone.
+
+    Relative paths in ``trusted`` are known to be current (for example by entity
+    digest, or because block files are content-addressed) and are only checked
+    for existence instead of being read back and compared.
+    """
+
+    targets: Dict[str, Dict[str, Any]] = {}
+    for entity in entities:
+        targets[f"entities/{entity['id']}.json"] = entity
+    for block_id, block in blocks.items():
+        targets[f"blocks/{block_id}.json"] = block
+
+    written: List[str] = []
+    unchanged = 0
+    # "blocks/" sorts before "entities/": entities never reference unwritten blocks.
+    for rel, data in sorted(targets.items()):
+        if rel in trusted and (micro_dir / rel).is_file():
+            unchanged += 1
+        elif _sync_file(micro_dir / rel, stable_json_dumps(data)):
+            written.append(rel)
+        else:
+            unchanged += 1
+
+    if _sync_file(micro_dir / "index.json", stable_json_dumps(index)):
+        written.append("index.json")
+    else:
+        unchanged += 1
+
+    removed = _remove_unlisted(micro_dir, targets.keys())
+    return SyncReport(written=written, removed=removed, unchanged=unchanged)
+
+
+def _remove_unlisted(micro_dir: Path, listed: Collection[str]) -> List[str]:
+    removed: List[str] = []
+    for subdir in ("entities", "blocks"):
+        for path in sorted((micro_dir / subdir).glob("*.json")):
+            rel = f"{subdir}/{path.name}"
+            if rel not in listed:
+                path.unlink()
+                removed.append(rel)
+    return removed
+
+
+def stream_micro_store(
+    micro_dir: Path,
+    items: Iterable[tuple[Dict[str, Any], Iterable[Dict[str, Any]]]],
+    *,
+    previous_digests: Mapping[str, str] | None = None,
+) -> tuple[dict, SyncReport]:
+    """Write ``(entity, blocks)`` pairs into ``micro_dir`` as they are produced.
+
+    Each pair's blocks and then its entity are on disk before the next pair is
+    requested, and only ids and digests are kept, so memory does not grow with
+    the store. Then, as in ``sync_micro_store``, ``index.json`` is replaced and
+    files it no longer lists are removed. Returns the new index and a report.
+
+    Unchanged files are not rewritten. With ``previous_digests`` (the entity
+    digests of the current index.json), existing block files and entities
+    whose digest is unchanged are not even read back, like ``trusted`` in
+    ``sync_micro_store``.
+    """
+
+    trust = previous_digests is not None
+    entity_ids: List[str] = []
+    block_ids: List[str] = []
+    seen_blocks: set[str] = set()
+    digests: Dict[str, str] = {}
+    written: List[str] = []
+    unchanged = 0
+    for entity, blocks in items:
+        entity_blocks: Dict[str, Dict[str, Any]] = {}
+        for block in blocks:
+            block_id = block["id"]
+            entity_blocks[block_id] = block
+            if block_id in seen_blocks:
+                continue
+            seen_blocks.add(block_id)
+            block_ids.append(block_id)
+            rel = f"blocks/{block_id}.json"
+            if trust and (micro_dir / rel).is_file():
+                unchanged += 1
+            elif _sync_file(micro_dir / rel, stable_json_dumps(block)):
+                written.append(rel)
+            else:
+                unchanged += 1
+
+        entity_id = entity["id"]
+        entity_ids.append(entity_id)
+        digests[entity_id] = entity_digest(entity, entity_blocks)
+        rel = f"entities/{entity_id}.json"
+        if trust and previous_digests.get(entity_id) == digests[entity_id] and (micro_dir / rel).is_file():
+            unchanged += 1
+        elif _sync_file(micro_dir / rel, stable_json_dumps(entity)):
+            written.append(rel)
+        else:
+            unchanged += 1
+
+    index = index_from_entity_digests({"entity_ids": entity_ids, "block_ids": block_ids}, digests)
+    if _sync_file(micro_dir / "index.json", stable_json_dumps(index)):
+        written.append("index.json")
+    else:
+        unchanged += 1
+
+    listed = {f"entities/{entity_id}.json" for entity_id in entity_ids}
+    listed.update(f"blocks/{block_id}.json" for block_id in block_ids)
+    removed = _remove_unlisted(micro_dir, listed)
+    return index, SyncReport(written=written, removed=removed, unchanged=unchanged)
+
+
+def migrate_block_ids(micro_dir: Path, scheme: str, *, dry_run: bool = False) -> Dict[str, str]:
+    """Rewrite a store's block ids (and blockRefs/Section children) to ``scheme``.
+
+    Returns the ``old -> new`` mapping for ids that changed. Children are
+    re-identified before their parents because a Section's id covers its
+    children's ids.
+    """
+
+    store = MicroStore.load(micro_dir)
+    new_ids: Dict[str, str] = {}
+    new_blocks: Dict[str, Dict[str, Any]] = {}
+
+    def _migrate(block_id: str) -> str:
+        if block_id in new_ids:
+            return new_ids[block_id]
+        block = dict(store.blocks_by_id[block_id])
+        if block.get("children"):
+            block["children"] = [_migrate(child) for child in block["children"]]
+        new_id = block_id_from_block(block, scheme=scheme)
+        block["id"] = new_id
+        new_ids[block_id] = new_id
+        new_blocks[new_id] = block
+        return new_id
+
+    for block_id in store.index["block_ids"]:
+        _migrate(block_id)
+
+    entities = []
+    for entity_id in store.index["entity_ids"]:
+        entity = dict(store.entities_by_id[entity_id])
+        body = dict(entity["body"])
+        body["blockRefs"] = [new_ids[ref] for ref in body.get("blockRefs", [])]
+        entity["body"] = body
+        entities.append(entity)
+
+    index = {
+        key: value
+        for key, value in store.index.items()
+        if key not in ("digest_version", "entity_digests", "root_hash")
+    }
+    index["block_ids"] = [new_ids[block_id] for block_id in store.index["block_ids"]]
+    index = index_with_digests(index, entities, new_blocks)
+    if not dry_run:
+        sync_micro_store(micro_dir, entities, new_blocks, index)
+    return {old: new for old, new in new_ids.items() if old != new}
+
+
 def load_micro_store(micro_dir: Path) -> MicroStore:
     """Deprecated v1 loader retained for backward compatibility."""
 
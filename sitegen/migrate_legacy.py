@@ -3,11 +3,14 @@
 from __future__ import annotations
 
 import json
+from functools import partial
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
 from .io_utils import read_json, warn, write_json
-from .micro_store import block_id_from_block
+from .legacy_pipeline import map_paths
+from .micro_ids import DEFAULT_BLOCK_ID_SCHEME
+from .micro_store import block_id_from_block, store_block_id_scheme
 from .types_legacy import LegacyPost
 from .types_micro import MicroBlock, MicroEntity
 
@@ -21,33 +24,45 @@ def _to_pascal(name: str) -> str:
     return "".join(part.capitalize() for part in name.replace("-", " ").split())
 
 
+def _read_legacy_post(path: Path) -> Tuple[LegacyPost | None, str | None]:
+    """Return ``(post, None)`` or ``(None, warning)`` for one legacy file."""
+
+    try:
+        data = read_json(path)
+    except json.JSONDecodeError:
+        return None, f"[legacy] failed to parse JSON: {path}"
+    if not all(key in data for key in REQUIRED_FIELDS):
+        return None, f"[legacy] missing required fields in {path}"
+    return data, None
+
+
 def load_legacy_posts(posts_dir: Path) -> List[LegacyPost]:
     posts: List[LegacyPost] = []
     for path in sorted(posts_dir.glob("*.json")):
-        try:
-            data = read_json(path)
-        except json.JSONDecodeError:
-            warn(f"[legacy] failed to parse JSON: {path}")
-            continue
-        if not all(key in data for key in REQUIRED_FIELDS):
-            warn(f"[legacy] missing required fields in {path}")
+        data, problem = _read_legacy_post(path)
+        if problem:
+            warn(problem)
             continue
         posts.append(data)
     return posts
 
 
-def _dedupe_blocks(blocks: List[Dict[str, Any]]) -> Tuple[List[str], Dict[str, MicroBlock]]:
+def _dedupe_blocks(
+    blocks: List[Dict[str, Any]], *, scheme: str = DEFAULT_BLOCK_ID_SCHEME
+) -> Tuple[List[str], Dict[str, MicroBlock]]:
     ids: List[str] = []
     unique: Dict[str, MicroBlock] = {}
     for block in blocks:
-        block_id = block_id_from_block(block)
+        block_id = block_id_from_block(block, scheme=scheme)
         block_with_id: MicroBlock = {"id": block_id, **block}
         ids.append(block_id)
         unique.setdefault(block_id, block_with_id)
     return ids, unique
 
 
-def legacy_to_micro(legacy: LegacyPost) -> Tuple[MicroEntity, List[MicroBlock]]:
+def legacy_to_micro(
+    legacy: LegacyPost, *, scheme: str = DEFAULT_BLOCK_ID_SCHEME
+) -> Tuple[MicroEntity, List[MicroBlock]]:
     blocks: List[Dict[str, Any]] = []
     render = legacy["render"]
     if render["kind"] == "html":
@@ -60,7 +75,7 @@ def legacy_to_micro(legacy: LegacyPost) -> Tuple[MicroEntity, List[MicroBlock]]:
     if cta_label and cta_href:
         blocks.append({"type": "Link", "label": cta_label, "href": cta_href})
 
-    block_refs, unique_blocks = _dedupe_blocks(blocks)
+    block_refs, unique_blocks = _dedupe_blocks(blocks, scheme=scheme)
 
     meta: Dict[str, Any] = {
         "title": legacy.get("title"),
@@ -82,8 +97,33 @@ def legacy_to_micro(legacy: LegacyPost) -> Tuple[MicroEntity, List[MicroBlock]]:
     return entity, list(unique_blocks.values())
 
 
-def migrate_legacy_dir(posts_dir: Path, micro_dir: Path) -> None:
-    posts = load_legacy_posts(posts_dir)
+def _migrate_post_file(
+    path: Path, *, scheme: str = DEFAULT_BLOCK_ID_SCHEME
+) -> Tuple[MicroEntity | None, List[MicroBlock], str | None]:
+    post, problem = _read_legacy_post(path)
+    if post is None:
+        return None, [], problem
+    entity, blocks = legacy_to_micro(post, scheme=scheme)
+    return entity, blocks, None
+
+
+def migrate_legacy_dir(
+    posts_dir: Path,
+    micro_dir: Path,
+    *,
+    workers: int | None = None,
+    progress: bool = False,
+    scheme: str | None = None,
+) -> None:
+    """Write one entity per legacy post; block ids keep the scheme ``micro_dir`` already uses."""
+
+    converted, _ = map_paths(
+        partial(_migrate_post_file, scheme=store_block_id_scheme(micro_dir, scheme)),
+        sorted(posts_dir.glob("*.json")),
+        label="migrate",
+        workers=workers,
+        progress=progress,
+    )
     blocks_dir = micro_dir / "blocks"
     entities_dir = micro_dir / "entities"
     blocks_dir.mkdir(parents=True, exist_ok=True)
@@ -92,8 +132,10 @@ def migrate_legacy_dir(posts_dir: Path, micro_dir: Path) -> None:
     all_blocks: Dict[str, MicroBlock] = {}
     index_entities: List[Dict[str, Any]] = []
 
-    for post in posts:
-        entity, blocks = legacy_to_micro(post)
+    for entity, blocks, problem in converted:
+        if entity is None:
+            warn(problem)
+            continue
         for block in blocks:
             all_blocks.setdefault(block["id"], block)
         write_json(entities_dir / f"{entity['id']}.json", entity)
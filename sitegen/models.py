@@ -170,6 +170,22 @@ class ExperienceSpec(BaseModel):
     route_patterns: RoutePatterns = Field(
         ..., alias="routePatterns", description="Patterns used to generate routes.json."
     )
+    theme: dict[str, str] = Field(
+        default_factory=dict,
+        description="Optional micro.css custom properties applied to this experience.",
+    )
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class ScaffoldExperience(BaseModel):
+    """Lightweight experience spec used for scaffolding."""
+
+    key: str
+    kind: Literal["legacy", "generated"]
+    output_dir: Optional[str] = Field(default=None, alias="output_dir")
+    home: Optional[str] = None
+    content: dict[str, str] = Field(default_factory=dict)
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -295,6 +311,7 @@ __all__ = [
     "Route",
     "RouteMap",
     "RoutePatterns",
+    "ScaffoldExperience",
     "SiteConfig",
     "Supports",
     "TemplateExperiment",
@@ -1,90 +1,251 @@
-"""Patch legacy HTML pages to support the experience switcher."""
+"""Patch legacy HTML pages to support the experience switcher.
+
+Pages are not re-serialized: a small tokenizer (``html.parser.HTMLParser``)
+finds the ``<body>`` and ``<head>`` tags and the nav, and only the switcher
+attributes and tags are spliced into the original text. The body carries a
+``data-switcher-patch`` digest of the patch inputs, so a page that was already
+patched with the same inputs is recognized from its text and left unwritten.
+"""
 
 from __future__ import annotations
 
+import hashlib
+import html
+from dataclasses import dataclass
+from functools import partial
+from html.parser import HTMLParser
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, Mapping, Optional
 
-from bs4 import BeautifulSoup
+from .legacy_pipeline import map_paths
+from .models import ExperienceSpec
 
+PATCH_VERSION = 1
+MARKER_ATTR = "data-switcher-patch"
+SWITCHER_LABEL = "体験を切り替える"
+_DATASET_ATTRS = ("data-experience", "data-template", "data-routes-href", "data-content-id", MARKER_ATTR)
 
-def _ensure_dataset(
-    body, *, routes_href: str, template: str, content_id: Optional[str]
-) -> None:
-    body["data-experience"] = "ruri"
-    body["data-template"] = template
-    body["data-routes-href"] = routes_href
-    if content_id:
-        body["data-content-id"] = content_id
-    elif "data-content-id" in body.attrs:
-        del body["data-content-id"]
 
+@dataclass(frozen=True)
+class LegacyPage:
+    """One legacy page to patch and the dataset it should carry."""
 
-def _ensure_assets(soup: BeautifulSoup, css_href: str, js_href: str) -> None:
-    head = soup.head
-    if not head:
-        head = soup.new_tag("head")
-        soup.html.insert(0, head)
+    path: Path
+    template: str
+    experience: str = "ruri"
+    content_id: Optional[str] = None
 
-    for tag in head.find_all("link", href=True):
-        if "switcher" in tag.get("href", "") and tag.get("href") != css_href:
-            tag.decompose()
 
-    if not head.find("link", attrs={"href": css_href}):
-        link_tag = soup.new_tag(
-            "link", rel="stylesheet", href=css_href, type="text/css"
-        )
-        head.append(link_tag)
+@dataclass(frozen=True)
+class _Tag:
+    name: str
+    attrs: dict[str, Optional[str]]
+    start: int
+    end: int
+
+
+@dataclass
+class _Nav:
+    tag: _Tag
+    end_tag: Optional[int] = None
+    has_switcher: bool = False
+
+
+class _PageScanner(HTMLParser):
+    """Record the offsets of the few tags the patcher touches."""
+
+    def __init__(self, text: str) -> None:
+        super().__init__(convert_charrefs=True)
+        self._text = text
+        # getpos() counts lines by "\n" only, so split the same way.
+        self._line_offsets = [0]
+        for line in text.split("\n")[:-1]:
+            self._line_offsets.append(self._line_offsets[-1] + len(line) + 1)
+        self.html_tag: Optional[_Tag] = None
+        self.head: Optional[_Tag] = None
+        self.head_end: Optional[int] = None
+        self.body: Optional[_Tag] = None
+        # (tag, end of the element) for <link href> and <script src> inside <head>.
+        self.head_assets: list[tuple[_Tag, int]] = []
+        self.navs: list[_Nav] = []
+        self._open_navs: list[_Nav] = []
+        self._open_script: Optional[_Tag] = None
+        self.feed(text)
+        self.close()
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self._line_offsets[line - 1] + column
 
-    for script in head.find_all("script", src=True):
-        if "switcher" in script.get("src", "") and script.get("src") != js_href:
-            script.decompose()
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        self._start(tag, attrs, self_closing=False)
 
-    script_tag = head.find("script", attrs={"src": js_href})
-    if not script_tag:
-        script_tag = soup.new_tag("script", src=js_href)
-        head.append(script_tag)
-    script_tag["defer"] = "defer"
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        self._start(tag, attrs, self_closing=True)
 
+    def _start(self, tag: str, attrs: list[tuple[str, Optional[str]]], *, self_closing: bool) -> None:
+        start = self._offset()
+        found = _Tag(tag, dict(attrs), start, start + len(self.get_starttag_text() or ""))
+        if tag == "html" and self.html_tag is None:
+            self.html_tag = found
+        elif tag == "head" and self.head is None:
+            self.head = found
+        elif tag == "body" and self.body is None:
+            self.body = found
+        elif tag == "nav":
+            nav = _Nav(found)
+            self.navs.append(nav)
+            self._open_navs.append(nav)
+        elif tag == "button" and found.attrs.get("data-action") == "switch-experience":
+            for nav in self._open_navs:
+                nav.has_switcher = True
+        elif self.head is not None and self.head_end is None:
+            if tag == "link" and "href" in found.attrs:
+                self.head_assets.append((found, found.end))
+            elif tag == "script" and "src" in found.attrs:
+                if self_closing:
+                    self.head_assets.append((found, found.end))
+                else:
+                    self._open_script = found
 
-def _insert_switcher_button(soup: BeautifulSoup) -> None:
-    nav = soup.find("nav", class_="nav") or soup.find("nav")
-    if not nav:
-        return
+    def handle_endtag(self, tag: str) -> None:
+        start = self._offset()
+        if tag == "head" and self.head is not None and self.head_end is None:
+            self.head_end = start
+        elif tag == "script" and self._open_script is not None:
+            self.head_assets.append((self._open_script, self._text.index(">", start) + 1))
+            self._open_script = None
+        elif tag == "nav" and self._open_navs:
+            self._open_navs.pop().end_tag = start
 
-    existing = nav.find("button", attrs={"data-action": "switch-experience"})
-    if existing:
-        return
 
-    button = soup.new_tag(
-        "button",
-        type="button",
-        attrs={"class": "view-switcher", "data-action": "switch-experience"},
+def _render_start_tag(name: str, attrs: Mapping[str, Optional[str]], *, self_closing: bool = False) -> str:
+    parts = [name]
+    for key, value in attrs.items():
+        parts.append(key if value is None else f'{key}="{html.escape(value, quote=True)}"')
+    return "<" + " ".join(parts) + ("/>" if self_closing else ">")
+
+
+def _patch_marker(page: LegacyPage, *, routes_href: str, css_href: str, js_href: str) -> str:
+    payload = "\0".join(
+        [str(PATCH_VERSION), page.experience, page.template, page.content_id or "", routes_href, css_href, js_href]
     )
-    button.string = "体験を切り替える"
-    nav.append(button)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def patch_legacy_html(
+    text: str,
+    page: LegacyPage,
+    *,
+    routes_href: str,
+    css_href: str,
+    js_href: str,
+) -> Optional[str]:
+    """Return ``text`` with the switcher patch applied, or None if it already has it."""
+
+    marker = _patch_marker(page, routes_href=routes_href, css_href=css_href, js_href=js_href)
+    if f'{MARKER_ATTR}="{marker}"' in text:
+        return None
+
+    scan = _PageScanner(text)
+    if scan.body is None:
+        raise ValueError(f"<body> not found in {page.path}")
+
+    edits: list[tuple[int, int, str]] = []
+
+    body_attrs = {key: value for key, value in scan.body.attrs.items() if key not in _DATASET_ATTRS}
+    body_attrs["data-experience"] = page.experience
+    body_attrs["data-template"] = page.template
+    body_attrs["data-routes-href"] = routes_href
+    if page.content_id:
+        body_attrs["data-content-id"] = page.content_id
+    body_attrs[MARKER_ATTR] = marker
+    edits.append((scan.body.start, scan.body.end, _render_start_tag("body", body_attrs)))
+
+    has_css = has_js = False
+    for tag, end in scan.head_assets:
+        url = tag.attrs.get("href" if tag.name == "link" else "src") or ""
+        if url == (css_href if tag.name == "link" else js_href):
+            if tag.name == "link":
+                has_css = True
+            else:
+                has_js = True
+                if tag.attrs.get("defer") != "defer":
+                    edits.append(
+                        (tag.start, tag.end, _render_start_tag("script", {**tag.attrs, "defer": "defer"}))
+                    )
+        elif "switcher" in url:
+            edits.append((tag.start, end, ""))
+    assets = ""
+    if not has_css:
+        assets += f'<link href="{html.escape(css_href)}" rel="stylesheet" type="text/css"/>'
+    if not has_js:
+        assets += f'<script defer="defer" src="{html.escape(js_href)}"></script>'
+    if assets:
+        if scan.head is not None and scan.head_end is not None:
+            edits.append((scan.head_end, scan.head_end, assets))
+        else:
+            at = scan.html_tag.end if scan.html_tag is not None else scan.body.start
+            edits.append((at, at, f"<head>{assets}</head>"))
+
+    navs = [nav for nav in scan.navs if "nav" in (nav.tag.attrs.get("class") or "").split()] or scan.navs
+    if navs and not navs[0].has_switcher and navs[0].end_tag is not None:
+        button = (
+            '<button class="view-switcher" data-action="switch-experience" type="button">'
+            f"{SWITCHER_LABEL}</button>"
+        )
+        edits.append((navs[0].end_tag, navs[0].end_tag, button))
+
+    for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1]), reverse=True):
+        text = text[:start] + replacement + text[end:]
+    return text
 
 
 def _patch_file(
     path: Path,
     *,
-    template: str,
+    pages: Mapping[Path, LegacyPage],
     routes_href: str,
     css_href: str,
     js_href: str,
-    content_id: Optional[str] = None,
-) -> Path:
-    soup = BeautifulSoup(path.read_text(encoding="utf-8"), "html.parser")
-    body = soup.body
-    if not body:
-        raise ValueError(f"<body> not found in {path}")
+) -> bool:
+    patched = patch_legacy_html(
+        path.read_text(encoding="utf-8"),
+        pages[path],
+        routes_href=routes_href,
+        css_href=css_href,
+        js_href=js_href,
+    )
+    if patched is None:
+        return False
+    path.write_text(patched, encoding="utf-8")
+    return True
+
 
-    _ensure_dataset(body, routes_href=routes_href, template=template, content_id=content_id)
-    _ensure_assets(soup, css_href=css_href, js_href=js_href)
-    _insert_switcher_button(soup)
+def legacy_pages(base_dir: Path, experiences: Iterable[ExperienceSpec] = ()) -> list[LegacyPage]:
+    """Pages under ``base_dir`` to patch, taken from legacy experiences' home and content map.
 
-    path.write_text(str(soup), encoding="utf-8")
-    return path
+    A legacy experience owns ``base_dir`` when its home page lives directly in
+    it; content hrefs are relative to the working directory like in
+    experiences.yaml. Without such an experience the historical defaults
+    (``index.html`` and ``story1.html`` as ep01) are used.
+    """
+
+    base = base_dir.resolve()
+    pages: list[LegacyPage] = []
+    for exp in experiences:
+        if exp.kind != "legacy" or not exp.home or Path(exp.home).resolve().parent != base:
+            continue
+        pages.append(LegacyPage(Path(exp.home), "home", exp.key))
+        for content_id, href in exp.content.items():
+            if Path(href).resolve().is_relative_to(base):
+                pages.append(LegacyPage(Path(href), "detail", exp.key, content_id))
+    if not pages:
+        pages = [
+            LegacyPage(base_dir / "index.html", "home"),
+            LegacyPage(base_dir / "story1.html", "detail", content_id="ep01"),
+        ]
+    return [page for page in pages if page.path.exists()]
 
 
 def patch_legacy_pages(
@@ -93,37 +254,19 @@ def patch_legacy_pages(
     routes_href: str,
     css_href: str,
     js_href: str,
+    experiences: Iterable[ExperienceSpec] = (),
+    workers: int | None = None,
 ) -> list[Path]:
-    """Apply switcher-friendly patches to legacy HTML pages."""
-
-    targets: list[Path] = []
-    index_path = base_dir / "index.html"
-    story1_path = base_dir / "story1.html"
-
-    if index_path.exists():
-        targets.append(
-            _patch_file(
-                index_path,
-                template="home",
-                routes_href=routes_href,
-                css_href=css_href,
-                js_href=js_href,
-            )
-        )
+    """Apply switcher-friendly patches to legacy HTML pages.
 
-    if story1_path.exists():
-        targets.append(
-            _patch_file(
-                story1_path,
-                template="detail",
-                routes_href=routes_href,
-                css_href=css_href,
-                js_href=js_href,
-                content_id="ep01",
-            )
-        )
+    Returns every target page; pages whose patch marker already matches are
+    not rewritten. Large page sets are patched in worker processes.
+    """
 
-    return targets
+    pages = {page.path: page for page in legacy_pages(base_dir, experiences)}
+    patch = partial(_patch_file, pages=pages, routes_href=routes_href, css_href=css_href, js_href=js_href)
+    map_paths(patch, list(pages), label="patch-legacy", workers=workers)
+    return list(pages)
 
 
-__all__ = ["patch_legacy_pages"]
+__all__ = ["LegacyPage", "legacy_pages", "patch_legacy_html", "patch_legacy_pages"]
@@ -58,6 +58,19 @@ class PageSpec:
         return relative_route(self.out_file, base, collapse_index=collapse_index)
 
 
+def out_href_prefix(ctx: "BuildContext") -> str:
+    """Absolute href prefix for the output root (empty outside the working tree)."""
+
+    href_root = ctx.href_root or ctx.out_root
+    if href_root.is_absolute():
+        try:
+            href_root = href_root.relative_to(Path.cwd())
+        except ValueError:
+            return ""
+    prefix = "/" + href_root.as_posix().lstrip("./")
+    return prefix.rstrip("/")
+
+
 class SiteRouter:
     """Single source of truth for page specs and route payloads."""
 
@@ -80,14 +93,7 @@ class SiteRouter:
         self._build()
 
     def _compute_out_href_prefix(self) -> str:
-        href_root = self.ctx.href_root or self.ctx.out_root
-        if href_root.is_absolute():
-            try:
-                href_root = href_root.relative_to(Path.cwd())
-            except ValueError:
-                return ""
-        prefix = "/" + href_root.as_posix().lstrip("./")
-        return prefix.rstrip("/")
+        return out_href_prefix(self.ctx)
 
     def _absolute_from_url_path(self, url_path: str) -> str:
         cleaned = url_path.lstrip("./")
@@ -274,11 +280,11 @@ class SiteRouter:
             routes[exp.key] = payload
         return {"order": order, "routes": routes}
 
-    def render_aliases(self) -> list[Path]:
-        """Render redirect stubs for alias routes."""
+    def render_aliases(self, pages: Iterable[PageSpec] | None = None) -> list[Path]:
+        """Render redirect stubs for alias routes (of ``pages`` when given)."""
 
         written: list[Path] = []
-        for spec in self.pages:
+        for spec in self.pages if pages is None else pages:
             for alias in spec.aliases:
                 ensure_dir(alias.out_file.parent)
                 redirect_href = relative_route(spec.out_file, alias.out_file.parent)
@@ -299,6 +305,7 @@ class SiteRouter:
                     ]
                 )
                 alias.out_file.write_text(html, encoding="utf-8")
+                self.ctx.link_index.add_page(alias.out_file, [redirect_href])
                 written.append(alias.out_file)
         return written
 
@@ -306,4 +313,11 @@ class SiteRouter:
         return [page for page in self.pages if page.experience.key == experience_key]
 
 
-__all__ = ["PageAlias", "PageSpec", "SiteRouter", "relative_href", "relative_route"]
+__all__ = [
+    "PageAlias",
+    "PageSpec",
+    "SiteRouter",
+    "out_href_prefix",
+    "relative_href",
+    "relative_route",
+]
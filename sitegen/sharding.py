@@ -0,0 +1,236 @@
+"""Split a micro-store build across workers and merge the partial outputs.
+
+Every shard sees the full experience list and content set, so routing and
+relative hrefs are identical on all workers; a shard only decides which pages it
+renders. Instead of routes.json, the root index and ``_buildinfo.json`` each shard
+writes a partial manifest (``_shard.json``) that ``merge_shards`` combines.
+"""
+
+from __future__ import annotations
+
+import filecmp
+import json
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Mapping, Sequence
+
+from .util_fs import ensure_dir
+
+SHARD_MANIFEST_NAME = "_shard.json"
+SHARD_MODES = ("experience", "content")
+
+
+def key_positions(keys: Iterable[str]) -> dict[str, int]:
+    """Position of each distinct key in sorted order; build once, look up per page."""
+
+    return {key: position for position, key in enumerate(sorted(set(keys)))}
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """One worker's slice of a build: ``index`` is 1-based, as in ``--shard 2/4``."""
+
+    index: int
+    count: int
+    by: str = "experience"
+
+    @classmethod
+    def parse(cls, value: str, *, by: str = "experience") -> "ShardSpec":
+        try:
+            index_text, count_text = value.split("/", 1)
+            index, count = int(index_text), int(count_text)
+        except ValueError as exc:
+            raise SystemExit(f"Invalid shard '{value}'; expected I/N, e.g. 1/4") from exc
+        if count < 1 or not 1 <= index <= count:
+            raise SystemExit(f"Invalid shard '{value}'; I must be between 1 and N")
+        if by not in SHARD_MODES:
+            raise SystemExit(f"Invalid shard mode '{by}'; expected one of {', '.join(SHARD_MODES)}")
+        return cls(index=index, count=count, by=by)
+
+    @property
+    def label(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def _owns(self, key: str, positions: Mapping[str, int]) -> bool:
+        return positions[key] % self.count == self.index - 1
+
+    def owns_experience(self, key: str, positions: Mapping[str, int]) -> bool:
+        """Experience mode assigns experiences round-robin by sorted key (see ``key_positions``)."""
+
+        return self.by != "experience" or self._owns(key, positions)
+
+    def owns_listing(self) -> bool:
+        """Content mode renders home/list pages on the first shard only."""
+
+        return self.by != "content" or self.index == 1
+
+    def owns_content(self, content_id: str, positions: Mapping[str, int]) -> bool:
+        """Content mode assigns content ids round-robin by sorted id, across experiences."""
+
+        return self.by != "content" or self._owns(content_id, positions)
+
+    def to_json(self) -> dict:
+        return {"index": self.index, "count": self.count, "by": self.by}
+
+
+def write_shard_manifest(
+    out_root: Path,
+    shard: ShardSpec,
+    *,
+    order: Sequence[str],
+    routes: dict | None,
+    routes_href: str | None,
+    root_index: list[dict],
+    build_info: dict,
+    links: dict | None = None,
+) -> Path:
+    manifest = {
+        "shard": shard.to_json(),
+        "order": list(order),
+        "routes": routes,
+        "routesHref": routes_href,
+        "rootIndex": root_index,
+        "buildInfo": build_info,
+        "links": links,
+    }
+    path = out_root / SHARD_MANIFEST_NAME
+    path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def _load_manifests(part_dirs: Sequence[Path]) -> list[tuple[Path, dict]]:
+    manifests: list[tuple[Path, dict]] = []
+    for part in part_dirs:
+        path = part / SHARD_MANIFEST_NAME
+        if not path.exists():
+            raise SystemExit(f"{part} is not a shard output (missing {SHARD_MANIFEST_NAME})")
+        manifests.append((part, json.loads(path.read_text(encoding="utf-8"))))
+
+    shapes = {(m["shard"]["count"], m["shard"]["by"]) for _, m in manifests}
+    if len(shapes) != 1:
+        raise SystemExit("Shard outputs were built with different --shard counts or modes")
+    (count, _), = shapes
+    indexes = sorted(m["shard"]["index"] for _, m in manifests)
+    if indexes != list(range(1, count + 1)):
+        raise SystemExit(f"Expected shards 1..{count} exactly once, got {indexes}")
+    if len({tuple(m["order"]) for _, m in manifests}) != 1:
+        raise SystemExit("Shard outputs disagree on the experience list")
+    return sorted(manifests, key=lambda pair: pair[1]["shard"]["index"])
+
+
+def _copy_part(part: Path, out_root: Path, origins: dict[str, Path]) -> None:
+    for path in sorted(part.rglob("*")):
+        if not path.is_file() or path.name == SHARD_MANIFEST_NAME and path.parent == part:
+            continue
+        rel = path.relative_to(part).as_posix()
+        target = out_root / rel
+        if rel in origins:
+            if not filecmp.cmp(path, target, shallow=False):
+                raise SystemExit(f"Conflicting file {rel} in {origins[rel]} and {part}")
+            continue
+        ensure_dir(target.parent)
+        shutil.copy2(path, target)
+        origins[rel] = part
+
+
+def _merge_routes(order: Sequence[str], parts: Iterable[dict | None]) -> dict | None:
+    present = [routes for routes in parts if routes is not None]
+    if not present:
+        return None
+    merged: dict[str, dict] = {}
+    for routes in present:
+        for key, payload in routes["routes"].items():
+            target = merged.setdefault(key, {})
+            for field, value in payload.items():
+                if isinstance(value, dict):
+                    target.setdefault(field, {}).update(value)
+                else:
+                    target[field] = value
+    for payload in merged.values():
+        for field in ("content", "contentAliases"):
+            if field in payload:
+                payload[field] = dict(sorted(payload[field].items()))
+    return {"order": list(order), "routes": {key: merged[key] for key in order if key in merged}}
+
+
+def _merge_build_info(order: Sequence[str], infos: list[dict], written: set[str]) -> dict:
+    experiences: dict[str, dict] = {}
+    for info in infos:
+        for entry in info.get("experiences", []):
+            experiences.setdefault(entry["key"], entry)
+        written.update(info.get("writtenFiles", []))
+
+    # Same key order and path sort as a single-process build, so merged output
+    # is byte-identical to it.
+    merged = dict(infos[0])
+    merged["experiences"] = [experiences[key] for key in order if key in experiences]
+    merged["writtenFiles"] = [str(path) for path in sorted({Path(p) for p in written})]
+    return merged
+
+
+def merge_shards(part_dirs: Sequence[Path], out_root: Path) -> list[Path]:
+    """Combine shard outputs into ``out_root``; shard order on the command line is irrelevant."""
+
+    from .build import render_root_index_html
+    from .link_index import LinkIndex
+    from .routes_gen import write_routes_payload
+
+    resolved_out = out_root.resolve()
+    if any(Path(part).resolve() == resolved_out for part in part_dirs):
+        raise SystemExit("merge --out must differ from the shard directories")
+    manifests = _load_manifests([Path(part) for part in part_dirs])
+    order = manifests[0][1]["order"]
+
+    ensure_dir(out_root)
+    origins: dict[str, Path] = {}
+    for part, _ in manifests:
+        _copy_part(part, out_root, origins)
+
+    written: list[Path] = []
+    manifest_values = [manifest for _, manifest in manifests]
+    routes = _merge_routes(order, (m["routes"] for m in manifest_values))
+    routes_filename = manifest_values[0]["buildInfo"].get("routesFilename", "routes.json")
+    routes_href = ""
+    if routes is not None:
+        written.extend(write_routes_payload(routes, [out_root / routes_filename]))
+        routes_href = next((m["routesHref"] for m in manifest_values if m["routesHref"]), "")
+
+    entries_by_key: dict[str, tuple[str, str]] = {}
+    for manifest in manifest_values:
+        for entry in manifest["rootIndex"]:
+            entries_by_key.setdefault(entry["key"], (entry["label"], entry["href"]))
+    entries = [entries_by_key[key] for key in order if key in entries_by_key]
+    index_path = out_root / "index.html"
+    index_path.write_text(render_root_index_html(entries, routes_href), encoding="utf-8")
+    written.append(index_path)
+
+    links = LinkIndex(out_root)
+    for manifest in manifest_values:
+        if manifest.get("links"):
+            links.href_prefix = manifest["links"]["hrefPrefix"]
+            links.pages.update(manifest["links"]["pages"])
+    if links.pages:
+        links.add_files(written)
+        links.add_files(out_root / rel for rel in origins)
+        written.append(links.write())
+
+    merged_written = {str(path.relative_to(out_root)) for path in written}
+    build_info = _merge_build_info(order, [m["buildInfo"] for m in manifest_values], merged_written)
+    written.extend(out_root / rel for rel in sorted(origins))
+    build_info_path = out_root / "_buildinfo.json"
+    build_info_path.write_text(
+        json.dumps(build_info, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+    )
+    written.append(build_info_path)
+    return written
+
+
+__all__ = [
+    "SHARD_MANIFEST_NAME",
+    "SHARD_MODES",
+    "ShardSpec",
+    "key_positions",
+    "merge_shards",
+    "write_shard_manifest",
+]
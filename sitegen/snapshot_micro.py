@@ -3,28 +3,38 @@
 from __future__ import annotations
 
 import difflib
-import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
-from .io_utils import read_json, write_json_stable
+from .io_utils import read_json
+from .legacy_pipeline import map_paths
+from .micro_ids import DEFAULT_BLOCK_ID_SCHEME, index_with_digests
+from .micro_store import SyncReport, store_block_id_scheme, sync_micro_store
 from .types_micro import MicroBlock, MicroEntity
-from .verify_roundtrip import legacy_to_micro
+from .util_fs import file_digest
+from .verify_roundtrip import legacy_to_micro, roundtrip_diff
 
 
-def _load_posts(posts_dir: Path) -> Iterable[Tuple[str, dict]]:
-    for path in sorted(posts_dir.glob("*.json")):
-        yield path.name, read_json(path)
+def _convert_post_file(path: Path, *, scheme: str = DEFAULT_BLOCK_ID_SCHEME) -> Tuple[MicroEntity, List[MicroBlock]]:
+    return legacy_to_micro(read_json(path), scheme=scheme)
 
 
-def legacy_dir_to_micro_snapshot(
-    posts_dir: Path, micro_dir: Path
+def _convert_and_verify_post_file(
+    path: Path, *, scheme: str = DEFAULT_BLOCK_ID_SCHEME
+) -> Tuple[MicroEntity, List[MicroBlock], str | None]:
+    legacy = read_json(path)
+    entity, blocks = legacy_to_micro(legacy, scheme=scheme)
+    return entity, blocks, roundtrip_diff(legacy, entity, blocks, path.name)
+
+
+def _snapshot_from_converted(
+    converted: Iterable[Tuple[MicroEntity, List[MicroBlock]]]
 ) -> Tuple[List[MicroEntity], Dict[str, MicroBlock], dict]:
     entities: List[MicroEntity] = []
     blocks_by_id: Dict[str, MicroBlock] = {}
-
-    for _, legacy in _load_posts(posts_dir):
-        entity, blocks = legacy_to_micro(legacy)
+    for entity, blocks in converted:
         entities.append(entity)
         for block in blocks:
             blocks_by_id.setdefault(block["id"], block)
@@ -36,26 +46,63 @@ def legacy_dir_to_micro_snapshot(
         "entity_ids": [entity["id"] for entity in entities_sorted],
         "block_ids": list(blocks_sorted.keys()),
     }
+    index = index_with_digests(index, entities_sorted, blocks_sorted)
     return entities_sorted, blocks_sorted, index
 
 
+def legacy_dir_to_micro_snapshot(
+    posts_dir: Path,
+    micro_dir: Path,
+    *,
+    workers: int | None = None,
+    progress: bool = False,
+    scheme: str | None = None,
+) -> Tuple[List[MicroEntity], Dict[str, MicroBlock], dict]:
+    """Convert every post; block ids default to the scheme ``micro_dir`` already uses."""
+
+    converted, _ = map_paths(
+        partial(_convert_post_file, scheme=store_block_id_scheme(micro_dir, scheme)),
+        sorted(posts_dir.glob("*.json")),
+        label="snapshot",
+        workers=workers,
+        progress=progress,
+    )
+    return _snapshot_from_converted(converted)
+
+
+def legacy_dir_to_verified_snapshot(
+    posts_dir: Path,
+    *,
+    workers: int | None = None,
+    progress: bool = False,
+    scheme: str = DEFAULT_BLOCK_ID_SCHEME,
+) -> Tuple[List[MicroEntity], Dict[str, MicroBlock], dict, List[str]]:
+    """Convert each post once and check its round trip in the same pass.
+
+    Returns the snapshot like ``legacy_dir_to_micro_snapshot`` plus the
+    round-trip diffs reported by ``verify_roundtrip_all``.
+    """
+
+    converted, _ = map_paths(
+        partial(_convert_and_verify_post_file, scheme=scheme),
+        sorted(posts_dir.glob("*.json")),
+        label="snapshot+roundtrip",
+        workers=workers,
+        progress=progress,
+    )
+    entities, blocks, index = _snapshot_from_converted(
+        (entity, blocks) for entity, blocks, _ in converted
+    )
+    errors = [error for _, _, error in converted if error is not None]
+    return entities, blocks, index, errors
+
+
 def write_micro_snapshot(
     micro_dir: Path, entities: List[MicroEntity], blocks: Dict[str, MicroBlock], index: dict
-) -> None:
-    if micro_dir.exists():
-        shutil.rmtree(micro_dir)
-    micro_dir.mkdir(parents=True, exist_ok=True)
+) -> SyncReport:
+    """Sync the snapshot into ``micro_dir`` without clearing it first."""
 
-    entities_dir = micro_dir / "entities"
-    blocks_dir = micro_dir / "blocks"
-    entities_dir.mkdir(parents=True, exist_ok=True)
-    blocks_dir.mkdir(parents=True, exist_ok=True)
-
-    for entity in entities:
-        write_json_stable(entities_dir / f"{entity['id']}.json", entity)
-    for block_id, block in blocks.items():
-        write_json_stable(blocks_dir / f"{block_id}.json", block)
-    write_json_stable(micro_dir / "index.json", index)
+    return sync_micro_store(micro_dir, entities, blocks, index)
 
 
 def generate_micro_snapshot_to_dir(posts_dir: Path, out_dir: Path) -> None:
@@ -63,32 +110,78 @@ def generate_micro_snapshot_to_dir(posts_dir: Path, out_dir: Path) -> None:
     write_micro_snapshot(out_dir, entities, blocks, index)
 
 
-def _collect_json_files(directory: Path) -> Dict[str, List[str]]:
-    contents: Dict[str, List[str]] = {}
+def _collect_json_files(directory: Path) -> Dict[str, Path]:
     if not directory.exists():
-        return contents
-    for path in sorted(directory.rglob("*.json")):
-        rel = str(path.relative_to(directory))
-        contents[rel] = path.read_text(encoding="utf-8").splitlines(keepends=True)
-    return contents
+        return {}
+    return {str(path.relative_to(directory)): path for path in sorted(directory.rglob("*.json"))}
+
+
+def _same_file(path_a: Path, path_b: Path) -> bool:
+    if path_a.stat().st_size != path_b.stat().st_size:
+        return False
+    return file_digest(path_a) == file_digest(path_b)
+
+
+def _read_lines(path: Path | None) -> List[str]:
+    if path is None:
+        return []
+    return path.read_text(encoding="utf-8").splitlines(keepends=True)
+
+
+def compare_dirs(
+    dir_a: Path,
+    dir_b: Path,
+    *,
+    max_diff_lines: int | None = None,
+    summary: bool = False,
+    workers: int | None = None,
+) -> Tuple[bool, str]:
+    """Compare the JSON files of two snapshot trees.
 
+    Common files are compared by size, then by streamed SHA-256 in a thread
+    pool; only files that differ are read and diffed. ``summary`` reports one
+    ``A``/``D``/``M`` line per file instead of diffs, and ``max_diff_lines``
+    truncates the unified diff output.
+    """
 
-def compare_dirs(dir_a: Path, dir_b: Path) -> Tuple[bool, str]:
     files_a = _collect_json_files(dir_a)
     files_b = _collect_json_files(dir_b)
-    all_paths = sorted(set(files_a.keys()) | set(files_b.keys()))
+    common = sorted(files_a.keys() & files_b.keys())
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        same = dict(zip(common, pool.map(lambda rel: _same_file(files_a[rel], files_b[rel]), common)))
+
+    changed = sorted(
+        rel for rel in files_a.keys() | files_b.keys() if not same.get(rel, False)
+    )
+    if not changed:
+        return True, ""
+
+    if summary:
+        lines = []
+        for rel in changed:
+            status = "D" if rel not in files_b else "A" if rel not in files_a else "M"
+            lines.append(f"{status} {rel}\n")
+        lines.append(f"{len(changed)} file(s) differ between {dir_a} and {dir_b}\n")
+        return False, "".join(lines)
 
     diffs: List[str] = []
-    for rel in all_paths:
-        content_a = files_a.get(rel, [])
-        content_b = files_b.get(rel, [])
-        if content_a == content_b:
-            continue
-        diff = difflib.unified_diff(
-            content_a,
-            content_b,
-            fromfile=f"{dir_a.name}/{rel}",
-            tofile=f"{dir_b.name}/{rel}",
+    emitted = 0
+    for position, rel in enumerate(changed):
+        diff = list(
+            difflib.unified_diff(
+                _read_lines(files_a.get(rel)),
+                _read_lines(files_b.get(rel)),
+                fromfile=f"{dir_a.name}/{rel}",
+                tofile=f"{dir_b.name}/{rel}",
+            )
         )
-        diffs.append("".join(diff))
-    return (not diffs, "".join(diffs))
+        if max_diff_lines is not None and emitted + len(diff) > max_diff_lines:
+            diffs.extend(diff[: max(max_diff_lines - emitted, 0)])
+            diffs.append(
+                f"\n... diff truncated after {max_diff_lines} line(s); "
+                f"{len(changed) - position} file(s) not fully shown ...\n"
+            )
+            break
+        diffs.extend(diff)
+        emitted += len(diff)
+    return False, "".join(diffs)
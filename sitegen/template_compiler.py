@@ -0,0 +1,100 @@
+"""Precompile experience templates into importable Jinja modules."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import Sequence
+
+import jinja2
+from jinja2 import (
+    BaseLoader,
+    Environment,
+    FileSystemLoader,
+    ModuleLoader,
+    StrictUndefined,
+    select_autoescape,
+)
+
+from .io_utils import warn
+from .util_fs import ensure_dir
+
+MANIFEST_NAME = "templates.json"
+
+
+def create_environment(loader: BaseLoader) -> Environment:
+    """Create a Jinja environment with the options used by every sitegen build.
+
+    Compiled modules bake these options in, so source and compiled loaders must
+    share this factory.
+    """
+
+    return Environment(
+        loader=loader,
+        autoescape=select_autoescape(["html", "jinja"]),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        undefined=StrictUndefined,
+    )
+
+
+def source_digests(template_dirs: Sequence[Path]) -> dict[str, str]:
+    """Hash each template visible through the search path, honoring precedence."""
+
+    digests: dict[str, str] = {}
+    for name in FileSystemLoader(template_dirs).list_templates():
+        for template_dir in template_dirs:
+            path = template_dir / name
+            if path.is_file():
+                digests[name] = hashlib.sha256(path.read_bytes()).hexdigest()
+                break
+    return digests
+
+
+def compile_templates(template_dirs: Sequence[Path], target_dir: Path) -> Path:
+    """Compile all templates on the search path into ``target_dir``."""
+
+    if target_dir.exists():
+        shutil.rmtree(target_dir)
+    ensure_dir(target_dir)
+
+    env = create_environment(FileSystemLoader(template_dirs))
+    env.compile_templates(str(target_dir), zip=None, ignore_errors=False)
+
+    manifest = {"jinja2": jinja2.__version__, "sources": source_digests(template_dirs)}
+    (target_dir / MANIFEST_NAME).write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+        encoding="utf-8",
+    )
+    return target_dir
+
+
+def compiled_loader(target_dir: Path, template_dirs: Sequence[Path]) -> ModuleLoader | None:
+    """Return a ModuleLoader for ``target_dir`` if it matches the current sources."""
+
+    manifest_path = target_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return None
+
+    if manifest.get("jinja2") != jinja2.__version__:
+        warn(f"[templates] {target_dir} was compiled with another Jinja2; using sources")
+        return None
+    if manifest.get("sources") != source_digests(template_dirs):
+        warn(f"[templates] {target_dir} is stale; using sources")
+        return None
+    return ModuleLoader(str(target_dir))
+
+
+__all__ = [
+    "MANIFEST_NAME",
+    "compile_templates",
+    "compiled_loader",
+    "create_environment",
+    "source_digests",
+]
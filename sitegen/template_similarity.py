@@ -0,0 +1,99 @@
+"""Find structurally near-identical pages from their DOM tag sequences.
+
+A tag sequence is cut into overlapping ``SHINGLE_SIZE``-tag shingles. A MinHash
+sketch of the shingle set estimates Jaccard similarity, and banding the sketch
+into LSH buckets yields candidate pairs without comparing every page with every
+other. Candidates are confirmed with the exact Jaccard similarity of their
+shingle sets, so reported values do not depend on the sketch.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Sequence
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+BANDS = 16
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x7E3A)
+# Fixed seed: sketches computed in different worker processes must agree.
+_PERMUTATIONS = tuple((_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM))
+
+
+@dataclass(frozen=True)
+class TagSketch:
+    """Shingle set and MinHash signature of one tag sequence."""
+
+    shingles: frozenset[int]
+    minhash: tuple[int, ...]
+
+
+def _shingle_hash(shingle: Sequence[str]) -> int:
+    digest = hashlib.blake2b("\0".join(shingle).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def shingles(tags: Sequence[str], size: int = SHINGLE_SIZE) -> frozenset[int]:
+    """Hashed ``size``-tag shingles; a shorter sequence is a single shingle."""
+
+    if len(tags) <= size:
+        return frozenset([_shingle_hash(tags)]) if tags else frozenset()
+    return frozenset(_shingle_hash(tags[start : start + size]) for start in range(len(tags) - size + 1))
+
+
+def sketch_tags(tags: Sequence[str]) -> TagSketch:
+    shingle_set = shingles(tags)
+    if not shingle_set:
+        return TagSketch(shingle_set, (_PRIME,) * NUM_PERM)
+    minhash = tuple(min((a * value + b) % _PRIME for value in shingle_set) for a, b in _PERMUTATIONS)
+    return TagSketch(shingle_set, minhash)
+
+
+def jaccard(a: frozenset[int], b: frozenset[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def candidate_pairs(sketches: Sequence[TagSketch], *, bands: int = BANDS) -> set[tuple[int, int]]:
+    """Index pairs ``(i, j)`` with ``i < j`` that share at least one LSH band."""
+
+    rows = NUM_PERM // bands
+    pairs: set[tuple[int, int]] = set()
+    for band in range(bands):
+        buckets: dict[tuple[int, ...], list[int]] = defaultdict(list)
+        for index, sketch in enumerate(sketches):
+            buckets[sketch.minhash[band * rows : (band + 1) * rows]].append(index)
+        for members in buckets.values():
+            for position, first in enumerate(members):
+                pairs.update((first, second) for second in members[position + 1 :])
+    return pairs
+
+
+def near_duplicates(sketches: Sequence[TagSketch], threshold: float) -> list[tuple[int, int, float]]:
+    """Sorted ``(i, j, similarity)`` for candidate pairs at or above ``threshold``."""
+
+    found = []
+    for first, second in sorted(candidate_pairs(sketches)):
+        similarity = jaccard(sketches[first].shingles, sketches[second].shingles)
+        if similarity >= threshold:
+            found.append((first, second, similarity))
+    return found
+
+
+__all__ = [
+    "BANDS",
+    "NUM_PERM",
+    "SHINGLE_SIZE",
+    "TagSketch",
+    "candidate_pairs",
+    "jaccard",
+    "near_duplicates",
+    "shingles",
+    "sketch_tags",
+]
@@ -0,0 +1,98 @@
+"""Theme compilation stage producing micro.css once per theme."""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, Tuple
+
+from .util_fs import ensure_dir
+
+BASE_CSS_LINES: Tuple[str, ...] = (
+    ":root {",
+    "  --mw-font-size-base: 16px;",
+    "  --mw-font-family: sans-serif;",
+    "  --mw-text-color: #222;",
+    "}",
+    ".mw-heading { font-family: var(--mw-font-family); color: var(--mw-text-color); }",
+    ".mw-paragraph { font-family: var(--mw-font-family); color: var(--mw-text-color); line-height: 1.6; }",
+    ".mw-link { color: #0a6cff; text-decoration: underline; }",
+    ".mw-image { margin: 1em 0; }",
+    ".mw-image-img { max-width: 100%; height: auto; display: block; }",
+    ".mw-image-caption { font-size: 0.9em; color: #555; }",
+    ".mw-section { margin: 1.5em 0; }",
+    ".mw-raw { margin: 1em 0; }",
+    ".mw-md { margin: 1em 0; }",
+)
+
+
+def _theme_key(theme: Mapping[str, Any] | None) -> Tuple[Tuple[str, str], ...]:
+    # Declaration order is significant in the emitted CSS, so keep it in the key.
+    return tuple((str(key), str(value)) for key, value in (theme or {}).items())
+
+
+@lru_cache(maxsize=None)
+def _compile_css(theme_key: Tuple[Tuple[str, str], ...]) -> str:
+    css_lines = list(BASE_CSS_LINES)
+    for key, value in theme_key:
+        css_lines.append(f":root {{ --{key}: {value}; }}")
+    return "\n".join(css_lines) + "\n"
+
+
+def compile_theme_css(theme: Mapping[str, Any] | None = None) -> str:
+    """Return micro.css text for a theme dict, compiling each distinct theme once."""
+
+    return _compile_css(_theme_key(theme))
+
+
+@dataclass(frozen=True)
+class CompiledTheme:
+    """CSS compiled for a named theme."""
+
+    name: str
+    css_text: str
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.css_text.encode("utf-8")).hexdigest()[:12]
+
+    @property
+    def filename(self) -> str:
+        return f"micro.{self.digest}.css"
+
+
+class ThemeStage:
+    """Collect named themes for a build and emit hashed ``micro.<hash>.css`` files."""
+
+    def __init__(self) -> None:
+        self._themes: Dict[str, CompiledTheme] = {}
+
+    def add(self, name: str, theme: Mapping[str, Any] | None = None) -> CompiledTheme:
+        compiled = CompiledTheme(name=name, css_text=compile_theme_css(theme))
+        self._themes[name] = compiled
+        return compiled
+
+    def write(self, out_dir: Path) -> Dict[str, Path]:
+        """Write one CSS file per distinct theme and return paths by theme name."""
+
+        ensure_dir(out_dir)
+        paths: Dict[str, Path] = {}
+        written: Dict[str, Path] = {}
+        for name, compiled in self._themes.items():
+            path = written.get(compiled.filename)
+            if path is None:
+                path = out_dir / compiled.filename
+                path.write_text(compiled.css_text, encoding="utf-8")
+                written[compiled.filename] = path
+            paths[name] = path
+        return paths
+
+
+__all__ = [
+    "BASE_CSS_LINES",
+    "CompiledTheme",
+    "ThemeStage",
+    "compile_theme_css",
+]
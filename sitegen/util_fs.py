@@ -1,5 +1,7 @@
 """Filesystem utilities for sitegen."""
 
+import hashlib
+import os
 from pathlib import Path
 from typing import Union
 
@@ -24,4 +26,64 @@ def write_text(path: PathLike, content: str, *, encoding: str = "utf-8") -> Path
     return file_path
 
 
-__all__ = ["ensure_dir", "write_text"]
+def file_digest(path: PathLike) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TreeSnapshot:
+    """Files and directories under ``root``, listed once with ``os.scandir``.
+
+    Lookups normalize paths lexically (``..`` is collapsed, symlinks are not
+    followed); paths outside ``root`` are checked on the filesystem instead.
+    Symlinked directories are recorded but not walked, so a link loop cannot
+    recurse forever; paths below them are also checked on the filesystem.
+    """
+
+    def __init__(self, root: PathLike) -> None:
+        self.root = os.path.normpath(os.path.abspath(root))
+        self.files: set[str] = set()
+        self.dirs: set[str] = set()
+        self.linked_dirs: set[str] = set()
+        pending = [self.root] if os.path.isdir(self.root) else []
+        while pending:
+            directory = pending.pop()
+            self.dirs.add(directory)
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_dir():
+                        self.dirs.add(entry.path)
+                        self.linked_dirs.add(entry.path)
+                    else:
+                        self.files.add(entry.path)
+
+    def _normalize(self, path: PathLike) -> tuple[str, bool]:
+        normalized = os.path.normpath(os.path.abspath(path))
+        inside = normalized == self.root or normalized.startswith(self.root + os.sep)
+        if inside and self.linked_dirs:
+            inside = not any(normalized.startswith(linked + os.sep) for linked in self.linked_dirs)
+        return normalized, inside
+
+    def is_file(self, path: PathLike) -> bool:
+        normalized, inside = self._normalize(path)
+        return normalized in self.files if inside else os.path.isfile(normalized)
+
+    def is_dir(self, path: PathLike) -> bool:
+        normalized, inside = self._normalize(path)
+        return normalized in self.dirs if inside else os.path.isdir(normalized)
+
+    def exists(self, path: PathLike) -> bool:
+        normalized, inside = self._normalize(path)
+        if inside:
+            return normalized in self.files or normalized in self.dirs
+        return os.path.exists(normalized)
+
+
+__all__ = ["TreeSnapshot", "ensure_dir", "file_digest", "write_text"]
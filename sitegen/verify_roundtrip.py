@@ -7,12 +7,15 @@ from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
 from .io_utils import read_json, stable_json_dumps
-from .micro_ids import block_id_from_block
+from .legacy_pipeline import map_paths
+from .micro_ids import DEFAULT_BLOCK_ID_SCHEME, block_id_from_block
 from .types_legacy import LegacyPost, LegacyRender
 from .types_micro import MicroBlock, MicroEntity
 
 
-def legacy_to_micro(legacy: LegacyPost) -> Tuple[MicroEntity, List[MicroBlock]]:
+def legacy_to_micro(
+    legacy: LegacyPost, *, scheme: str = DEFAULT_BLOCK_ID_SCHEME
+) -> Tuple[MicroEntity, List[MicroBlock]]:
     render: LegacyRender | None = legacy.get("render")  # type: ignore[assignment]
     if not render or "kind" not in render:
         raise ValueError("legacy render is required")
@@ -30,7 +33,7 @@ def legacy_to_micro(legacy: LegacyPost) -> Tuple[MicroEntity, List[MicroBlock]]:
     block_refs: List[str] = []
     unique_blocks: Dict[str, MicroBlock] = {}
     for block in blocks:
-        block_id = block_id_from_block(block)
+        block_id = block_id_from_block(block, scheme=scheme)
         block_refs.append(block_id)
         unique_blocks.setdefault(block_id, {"id": block_id, **block})  # type: ignore[misc]
 
@@ -97,18 +100,38 @@ def _pretty_json(obj: Any) -> List[str]:
     return stable_json_dumps(obj).splitlines(keepends=True)
 
 
-def verify_roundtrip_all(posts_dir: Path) -> Tuple[bool, List[str]]:
-    errors: List[str] = []
-    for path in sorted(posts_dir.glob("*.json")):
-        legacy = read_json(path)
-        entity, blocks = legacy_to_micro(legacy)
-        restored = micro_to_legacy(entity, {block["id"]: block for block in blocks})
-        if legacy != restored:
-            diff = difflib.unified_diff(
-                _pretty_json(legacy),
-                _pretty_json(restored),
-                fromfile=f"legacy/{path.name}",
-                tofile=f"roundtrip/{path.name}",
-            )
-            errors.append("".join(diff))
+def roundtrip_diff(
+    legacy: LegacyPost, entity: MicroEntity, blocks: List[MicroBlock], name: str
+) -> str | None:
+    """Diff ``legacy`` against its restored form, or None when they match."""
+
+    restored = micro_to_legacy(entity, {block["id"]: block for block in blocks})
+    if legacy == restored:
+        return None
+    diff = difflib.unified_diff(
+        _pretty_json(legacy),
+        _pretty_json(restored),
+        fromfile=f"legacy/{name}",
+        tofile=f"roundtrip/{name}",
+    )
+    return "".join(diff)
+
+
+def _roundtrip_error(path: Path) -> str | None:
+    legacy = read_json(path)
+    entity, blocks = legacy_to_micro(legacy)
+    return roundtrip_diff(legacy, entity, blocks, path.name)
+
+
+def verify_roundtrip_all(
+    posts_dir: Path, *, workers: int | None = None, progress: bool = False
+) -> Tuple[bool, List[str]]:
+    results, _ = map_paths(
+        _roundtrip_error,
+        sorted(posts_dir.glob("*.json")),
+        label="roundtrip",
+        workers=workers,
+        progress=progress,
+    )
+    errors = [error for error in results if error is not None]
     return not errors, errors
@@ -1,7 +1,16 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_sitegen_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Keep the parsed-config cache out of the developer's home directory."""
+
+    monkeypatch.setenv("SITEGEN_CACHE_DIR", str(tmp_path / "sitegen-cache"))
@@ -0,0 +1,147 @@
+import json
+from pathlib import Path
+
+from scripts.audit_generated_site import Auditor, HrefResolver
+
+SWITCHER_HEAD = (
+    '<link href="../shared/switcher.css" rel="stylesheet"/>'
+    '<script src="../shared/switcher.js"></script>'
+)
+
+
+def _page(title: str, body: str, *, routes_href: str = "../routes.json") -> str:
+    return (
+        f"<html><head><title>{title}</title>{SWITCHER_HEAD}</head>"
+        f'<body data-routes-href="{routes_href}"><button data-action="switch-experience">x</button>'
+        f"{body}</body></html>"
+    )
+
+
+def _write_site(out_dir: Path, posts: int) -> None:
+    (out_dir / "shared").mkdir(parents=True)
+    for name in ("switcher.css", "switcher.js"):
+        (out_dir / "shared" / name).write_text("", encoding="utf-8")
+    (out_dir / "routes.json").write_text('{"routes": {}}', encoding="utf-8")
+    site = out_dir / "demo"
+    (site / "list").mkdir(parents=True)
+    (site / "index.html").write_text(
+        _page("Demo", '<section id="about"></section><a href="list/">list</a>'), encoding="utf-8"
+    )
+    (site / "list" / "index.html").write_text(
+        _page("Demo", '<a href="../posts/ep00/">ep00</a>', routes_href="../../routes.json"), encoding="utf-8"
+    )
+    for number in range(posts):
+        post = site / "posts" / f"ep{number:02d}" / "index.html"
+        post.parent.mkdir(parents=True)
+        # Only deep pages link to a missing target, so they must be crawled to be found.
+        post.write_text(
+            _page("Demo", '<a href="../missing/">gone</a><a href="#nowhere">x</a>', routes_href="../../../routes.json"),
+            encoding="utf-8",
+        )
+    # Redirect stubs carry no switcher and are not reported for it.
+    (site / "posts" / "ep00.html").write_text(
+        '<html><head><meta http-equiv="refresh" content="0; url=ep00/"></head>'
+        '<body><a href="ep00/">ep00</a></body></html>',
+        encoding="utf-8",
+    )
+
+
+def _audit(tmp_path: Path, name: str, workers: int) -> dict:
+    auditor = Auditor(
+        out_dir=tmp_path / "out",
+        routes_path=None,
+        experiences_path=None,
+        content_dir=tmp_path / "content",
+        report_dir=tmp_path / name,
+        workers=workers,
+    )
+    auditor.experiences = [{"key": "demo", "name": "Demo", "kind": "generated", "output_dir": "demo"}]
+    json_path, _ = auditor.run(command="test")
+    return json.loads(json_path.read_text(encoding="utf-8"))
+
+
+def test_audit_crawls_every_page_once_with_timings(tmp_path: Path, monkeypatch) -> None:
+    # Legacy candidates are looked up relative to the working directory.
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "content").mkdir()
+    _write_site(tmp_path / "out", posts=3)
+
+    serial = _audit(tmp_path, "serial", workers=1)
+    parallel = _audit(tmp_path, "parallel", workers=2)
+
+    assert serial["findings"] == parallel["findings"]
+    assert serial["meta"]["crawl"] == {"pages": 6, "workers": 1}
+    assert parallel["meta"]["crawl"]["workers"] == 2
+    broken = [f for f in serial["findings"] if f["title"] == "Broken internal link"]
+    assert len(broken) == 3
+    missing_anchor = [f for f in serial["findings"] if f["title"] == "Anchor target missing"]
+    assert len(missing_anchor) == 3
+    assert not [f for f in serial["findings"] if f["type"].startswith("SWITCHER")]
+    assert {"parse_pages", "crawl_links", "check_assets", "check_branding"} <= set(serial["timings"])
+
+
+def test_template_similarity_compares_all_pages_across_experiences(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    out_dir = tmp_path / "out"
+    homes = {
+        "alpha": "<header><nav><a>x</a></nav></header><main><section><h2>a</h2></section></main>",
+        "beta": "<div><ol><li>1</li><li>2</li></ol><table><tr><td>x</td></tr></table></div>",
+    }
+    for key, home in homes.items():
+        (out_dir / key / "list").mkdir(parents=True)
+        (out_dir / key / "index.html").write_text(_page(key, home), encoding="utf-8")
+        # The list pages share one template: only they should be reported.
+        (out_dir / key / "list" / "index.html").write_text(
+            _page(key, "<ul>" + "<li><a>x</a><p>y</p></li>" * 8 + "</ul>"), encoding="utf-8"
+        )
+    auditor = Auditor(
+        out_dir=out_dir,
+        routes_path=None,
+        experiences_path=None,
+        content_dir=tmp_path,
+        report_dir=tmp_path / "report",
+    )
+    auditor.experiences = [
+        {"key": key, "name": key, "kind": "generated", "output_dir": key} for key in homes
+    ]
+    # Called on its own, the check parses the pages it needs.
+    auditor.check_template_similarity()
+
+    [finding] = auditor.findings
+    assert finding.type == "TEMPLATES_NOT_DIFFERENT_ENOUGH"
+    assert finding.evidence["similarity"] == 1.0
+    assert finding.evidence["pages"] == ["alpha/list/index.html", "beta/list/index.html"]
+
+
+def test_href_resolver_uses_one_snapshot_and_caches_per_directory(tmp_path: Path) -> None:
+    _write_site(tmp_path / "out", posts=2)
+    out_dir = tmp_path / "out"
+    resolver = HrefResolver(out_dir)
+    post = out_dir / "demo" / "posts" / "ep00" / "index.html"
+
+    assert resolver.resolve(post, "/demo/#about") == (out_dir / "demo" / "index.html", "about")
+    assert resolver.resolve(post, "../ep01")[0] == out_dir / "demo" / "posts" / "ep01" / "index.html"
+    assert resolver.resolve(post, "../../../shared/switcher.js")[0] == out_dir / "shared" / "switcher.js"
+    assert resolver.resolve(post, "#top") == (post, "top")
+    assert resolver.resolve(post, "https://example.com/") == (None, None)
+
+    # Files created after the snapshot are not seen.
+    (out_dir / "late.html").write_text("", encoding="utf-8")
+    assert resolver.resolve(post, "/late.html")[0] is None
+    # Root-relative hrefs are shared by all pages, relative ones by a directory.
+    resolver.resolve(out_dir / "demo" / "list" / "index.html", "/demo/#episodes")
+    resolver.resolve(post.with_name("print.html"), "../ep01")
+    assert resolver._resolve_path.cache_info().hits == 2
+
+
+def test_href_resolver_does_not_walk_into_symlinked_directories(tmp_path: Path) -> None:
+    _write_site(tmp_path / "out", posts=1)
+    out_dir = tmp_path / "out"
+    (out_dir / "demo" / "loop").symlink_to(out_dir, target_is_directory=True)
+    # A directory named like a page must not satisfy the "<path>.html" fallback.
+    (out_dir / "demo" / "about.html").mkdir()
+
+    resolver = HrefResolver(out_dir)
+    home = out_dir / "demo" / "index.html"
+    assert resolver.resolve(home, "loop/demo/")[0] == out_dir / "demo" / "loop" / "demo" / "index.html"
+    assert resolver.resolve(home, "about")[0] is None
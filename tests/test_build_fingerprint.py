@@ -0,0 +1,82 @@
+import json
+import shutil
+from pathlib import Path
+
+from sitegen.build import BuildContext, build_site_from_micro_v2
+from sitegen.build_fingerprint import micro_store_digest, tree_digest
+from sitegen.cli_common import load_experiences
+from sitegen.micro_store import MicroStore
+
+
+def _build(micro_dir: Path, out_root: Path, *, force: bool = False) -> BuildContext:
+    ctx = BuildContext(src_root=Path("experience_src"), out_root=out_root, build_label="test")
+    build_site_from_micro_v2(
+        micro_store_dir=micro_dir,
+        experiences=load_experiences(Path("config/experiences.yaml")),
+        ctx=ctx,
+        generate_shared=True,
+        force=force,
+    )
+    return ctx
+
+
+def test_unchanged_inputs_skip_the_build(tmp_path: Path) -> None:
+    micro_dir = tmp_path / "micro"
+    shutil.copytree("content/micro", micro_dir)
+    out_root = tmp_path / "out"
+
+    assert not _build(micro_dir, out_root).up_to_date
+    build_info = json.loads((out_root / "_buildinfo.json").read_text(encoding="utf-8"))
+    assert build_info["inputFingerprint"]["inputs"]["microStore"] == micro_store_digest(
+        MicroStore.load(micro_dir)
+    )
+
+    assert _build(micro_dir, out_root).up_to_date
+    assert not _build(micro_dir, out_root, force=True).up_to_date
+
+
+def test_changed_store_or_missing_output_rebuilds(tmp_path: Path) -> None:
+    micro_dir = tmp_path / "micro"
+    shutil.copytree("content/micro", micro_dir)
+    out_root = tmp_path / "out"
+    _build(micro_dir, out_root)
+
+    (out_root / "index.html").unlink()
+    assert not _build(micro_dir, out_root).up_to_date
+    assert (out_root / "index.html").exists()
+
+    entity_path = next((micro_dir / "entities").glob("*.json"))
+    entity = json.loads(entity_path.read_text(encoding="utf-8"))
+    entity["meta"]["title"] = "changed title"
+    entity_path.write_text(json.dumps(entity, ensure_ascii=False), encoding="utf-8")
+    assert not _build(micro_dir, out_root).up_to_date
+
+
+def test_legacy_input_covers_only_the_patched_pages(tmp_path: Path) -> None:
+    micro_dir = tmp_path / "micro"
+    shutil.copytree("content/micro", micro_dir)
+    legacy_dir = tmp_path / "legacy"
+    legacy_dir.mkdir()
+    for name in ("index.html", "story1.html"):
+        shutil.copy(Path("nagi-s1") / name, legacy_dir / name)
+    out_root = legacy_dir / "gen"
+
+    def _build_all() -> BuildContext:
+        ctx = BuildContext(src_root=Path("experience_src"), out_root=out_root, build_label="test")
+        build_site_from_micro_v2(
+            micro_store_dir=micro_dir,
+            experiences=load_experiences(Path("config/experiences.yaml")),
+            ctx=ctx,
+            generate_all=True,
+            legacy_base=legacy_dir,
+        )
+        return ctx
+
+    assert not _build_all().up_to_date
+    # Files beside the patched pages (including the output inside the base) do not count.
+    (legacy_dir / "notes.md").write_text("unrelated", encoding="utf-8")
+    assert _build_all().up_to_date
+
+    story = legacy_dir / "story1.html"
+    story.write_text(story.read_text(encoding="utf-8") + "<!-- edited -->", encoding="utf-8")
+    assert not _build_all().up_to_date
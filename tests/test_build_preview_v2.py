@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pytest
+
+from scripts.build_preview_v2 import SeasonSpec, build_previews
+from sitegen.build_fingerprint import tree_digest
+from sitegen.micro_store import MicroStore
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _season(tmp_path: Path, key: str) -> SeasonSpec:
+    markdown = tmp_path / key / f"{key}.md"
+    markdown.parent.mkdir(parents=True)
+    markdown.write_text(
+        "".join(f"```text\n{key} title {n}\n\nBody {n}.\n```\n\n" for n in (1, 2)), encoding="utf-8"
+    )
+    return SeasonSpec(
+        key=key,
+        markdown=markdown,
+        micro_out=tmp_path / "micro" / key,
+        html_out=tmp_path / key / "generated_v2",
+    )
+
+
+def _options(**overrides):
+    options = dict(
+        variant="hina",
+        expected_blocks=2,
+        extra_tags=[],
+        force=False,
+        clean_html=True,
+        alias_out="generated",
+        experiences_path=REPO_ROOT / "config" / "experiences.yaml",
+        src_root=REPO_ROOT / "experience_src",
+        git_sha=None,
+    )
+    options.update(overrides)
+    return options
+
+
+def test_seasons_build_concurrently_in_process(tmp_path: Path) -> None:
+    specs = [_season(tmp_path, "demo-s2"), _season(tmp_path, "demo-s3")]
+
+    results = build_previews(specs, workers=2, **_options())
+
+    assert [result.key for result in results] == ["demo-s2", "demo-s3"]
+    assert [result.episodes for result in results] == [2, 2]
+    for spec in specs:
+        assert MicroStore.load(spec.micro_out).index["entity_ids"] == [f"{spec.key}-ep01", f"{spec.key}-ep02"]
+        assert tree_digest(spec.html_out) == tree_digest(spec.html_out.parent / "generated")
+        assert [path.name for path in spec.html_out.parent.iterdir() if path.name.startswith(".")] == []
+
+
+def test_existing_micro_store_requires_force(tmp_path: Path) -> None:
+    spec = _season(tmp_path, "demo-s2")
+    build_previews([spec], **_options(alias_out=None))
+    first = tree_digest(spec.html_out)
+
+    with pytest.raises(SystemExit):
+        build_previews([spec], **_options(alias_out=None))
+
+    build_previews([spec], **_options(alias_out=None, force=True))
+    assert tree_digest(spec.html_out) == first
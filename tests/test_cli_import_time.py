@@ -0,0 +1,36 @@
+import subprocess
+import sys
+from pathlib import Path
+
+HEAVY_MODULES = ("bs4", "jinja2", "pydantic", "yaml", "sitegen.build")
+
+
+def _run_python(code: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args, "-c", code], check=True, capture_output=True, text=True
+    )
+
+
+def test_cli_import_skips_heavy_dependencies() -> None:
+    code = (
+        "import sys, sitegen.cli; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert _run_python(code).stdout.strip() == ""
+
+
+def test_ia_export_docs_does_not_load_build_pipeline(tmp_path: Path) -> None:
+    code = (
+        "import sys; from sitegen.cli import main; "
+        f"main(['ia', 'export-docs', '--in', 'config/ia.yaml', '--out-dir', {str(tmp_path)!r}]); "
+        "print(','.join(m for m in ('bs4', 'jinja2', 'sitegen.build') if m in sys.modules))"
+    )
+    assert _run_python(code).stdout.strip() == ""
+    assert list(tmp_path.glob("*.md"))
+
+
+def test_scaffold_experience_is_still_importable_from_cli() -> None:
+    from sitegen.cli import ScaffoldExperience
+    from sitegen.models import ScaffoldExperience as model
+
+    assert ScaffoldExperience is model
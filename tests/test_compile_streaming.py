@@ -0,0 +1,50 @@
+import inspect
+from pathlib import Path
+
+from sitegen.build import BuildContext, _compiled_post_to_content_item, build_site_from_micro_v2
+from sitegen.cli_common import load_experiences
+from sitegen.compile_pipeline import compile_store_v2, iter_compile_store_v2
+from sitegen.micro_store import MicroStore
+
+
+def test_iter_compile_store_v2_matches_materialized_store() -> None:
+    store = MicroStore.load(Path("content/micro"))
+    stream = iter_compile_store_v2(store)
+    assert inspect.isgenerator(stream)
+
+    compiled = compile_store_v2(store)
+    assert [(post.id, post.html) for post in stream] == [
+        (post.id, post.html) for post in compiled.posts.values()
+    ]
+
+
+def test_streaming_build_matches_precompiled_build(tmp_path: Path) -> None:
+    store = MicroStore.load(Path("content/micro"))
+    experiences = load_experiences(Path("config/experiences.yaml"))
+
+    def _build(out_root: Path, **kwargs) -> dict[str, str]:
+        ctx = BuildContext(src_root=Path("experience_src"), out_root=out_root, build_label="test")
+        build_site_from_micro_v2(
+            micro_store_dir=Path("content/micro"), experiences=experiences, ctx=ctx, **kwargs
+        )
+        return {
+            str(path.relative_to(out_root)): path.read_text(encoding="utf-8")
+            for path in sorted(out_root.rglob("*.html"))
+        }
+
+    streamed = _build(tmp_path / "streamed", micro_store=store)
+    precompiled = _build(tmp_path / "precompiled", compiled_store=compile_store_v2(store))
+
+    assert streamed == precompiled
+
+
+def test_content_item_adapter_shares_html_and_matches_strict_mode() -> None:
+    store = MicroStore.load(Path("content/micro"))
+    post = next(iter_compile_store_v2(store))
+
+    item = _compiled_post_to_content_item(post)
+    assert item.render.html is post.html
+    assert item.body_html is post.html
+
+    strict_item = _compiled_post_to_content_item(post, strict=True)
+    assert item.model_dump() == strict_item.model_dump()
@@ -0,0 +1,37 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from sitegen import config_loader
+
+
+def test_experiences_are_parsed_once_per_content_hash(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(config_loader.CACHE_DIR_ENV, str(tmp_path / "cache"))
+    monkeypatch.setattr(config_loader, "_parsed_by_digest", {})
+    config = tmp_path / "experiences.yaml"
+    shutil.copy("config/experiences.yaml", config)
+
+    specs = config_loader.load_experiences(config)
+    assert [spec.key for spec in specs][:2] == ["ruri", "blog"]
+    assert list((tmp_path / "cache").glob("experiences-*.json"))
+
+    def _fail(text: str):
+        raise AssertionError("experiences.yaml should come from the cache")
+
+    monkeypatch.setattr(config_loader, "_parsed_by_digest", {})
+    monkeypatch.setattr(config_loader, "_parse_yaml", _fail)
+    assert config_loader.load_experiences_data(config)[0]["key"] == "ruri"
+
+    config.write_text("- key: only\n  name: Only\n  routePatterns: {home: a, list: b, detail: c}\n", encoding="utf-8")
+    monkeypatch.undo()
+    monkeypatch.setenv(config_loader.CACHE_DIR_ENV, str(tmp_path / "cache"))
+    assert [spec.key for spec in config_loader.load_experiences(config)] == ["only"]
+    # The edited config replaces its cache entry rather than adding a second one.
+    assert len(list((tmp_path / "cache").glob("experiences-*.json"))) == 1
+
+
+def test_cache_can_be_disabled(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(config_loader.CACHE_DIR_ENV, "")
+    assert config_loader.cache_dir() is None
+    assert config_loader.load_experiences_data(Path("config/experiences.yaml"))
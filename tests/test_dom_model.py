@@ -0,0 +1,25 @@
+import html
+
+from sitegen.dom_model import DomNode, dom_to_html, escape_html
+
+
+def test_escape_html_matches_stdlib() -> None:
+    for text in ["plain", "日本語のみ", "a & b", "<tag>", "\"quoted\"", "it's", ""]:
+        assert escape_html(text) == html.escape(text, quote=True)
+
+
+def test_dom_to_html_escapes_attributes_and_text() -> None:
+    dom = [
+        DomNode(
+            tag="p",
+            attrs={"class": "mw-paragraph"},
+            children=["A & B", DomNode(tag="a", attrs={"class": "mw-link", "href": "?a=1&b=\"2\""}, text="<next>")],
+        ),
+        DomNode(tag="p", attrs={"class": "mw-paragraph"}, children=["plain"]),
+    ]
+
+    assert dom_to_html(dom) == (
+        '<p class="mw-paragraph">A &amp; B'
+        '<a class="mw-link" href="?a=1&amp;b=&quot;2&quot;">&lt;next&gt;</a></p>'
+        '<p class="mw-paragraph">plain</p>'
+    )
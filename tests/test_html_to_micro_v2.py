@@ -3,7 +3,17 @@ from __future__ import annotations
 import hashlib
 from pathlib import Path
 
-from scripts.html_to_micro_v2 import BuildOptions, build_micro_store_from_html
+import pytest
+
+from scripts.html_to_micro_v2 import (
+    BuildOptions,
+    build_micro_store_from_html,
+    build_micro_store_from_html_dir,
+    build_micro_store_from_html_pages,
+    convert_html_page,
+    expand_html_inputs,
+    resolve_parser,
+)
 from sitegen.compile_pipeline import compile_store_v2
 from sitegen.micro_store import MicroStore
 
@@ -59,3 +69,64 @@ def test_html_to_micro_v2_is_deterministic(tmp_path: Path) -> None:
     html1 = compile_store_v2(store1).posts["etc-home"].html
     html2 = compile_store_v2(store2).posts["etc-home"].html
     assert html1 == html2, "compiled HTML should be deterministic"
+
+
+def test_single_pass_walker_matches_get_text_semantics() -> None:
+    html = (
+        "<main><a href='/outer'><div><p>Deep <em>em</em><!-- note --><a>more</a></p></div></a>"
+        "<ul><li><a href='/li'>Item <span class='tag'>tagged</span></a> rest</li></ul>"
+        "<p><rt>ruby</rt>base<script>ignored()</script></p></main>"
+    )
+    entity, blocks = convert_html_page(html, entity_id="page", variant="etc", page_type="page", parser="html.parser")
+    paragraphs = [blocks[block_id]["inlines"] for block_id in entity["body"]["blockRefs"] if "inlines" in blocks[block_id]]
+
+    assert paragraphs[0] == [
+        {"type": "Text", "text": "Deep em note "},
+        {"type": "InlineLink", "label": "more", "href": "/outer"},
+    ]
+    assert paragraphs[1][1] == {"type": "InlineLink", "label": "Item tagged", "href": "/li"}
+    assert paragraphs[-1] == [{"type": "Text", "text": "ruby base"}]
+    assert entity["meta"]["tags"] == ["tagged"]
+
+
+def test_resolve_parser_defaults_to_html_parser() -> None:
+    assert resolve_parser() == "html.parser"
+    with pytest.raises(SystemExit):
+        resolve_parser("auto")
+    with pytest.raises(SystemExit):
+        resolve_parser("regex")
+
+
+def test_directory_batch_is_worker_independent_and_shares_blocks(tmp_path: Path) -> None:
+    pages = tmp_path / "pages"
+    for name in ("a.html", "sub/b.html"):
+        (pages / name).parent.mkdir(parents=True, exist_ok=True)
+        (pages / name).write_text(f"<main><h1>{name}</h1><p>Shared footer</p></main>", encoding="utf-8")
+
+    options = dict(variant="etc", page_type="page", entity_prefix="site", force=True, parser="html.parser")
+    serial, _ = build_micro_store_from_html_dir(pages, tmp_path / "serial", workers=1, **options)
+    parallel, _ = build_micro_store_from_html_dir(pages, tmp_path / "parallel", workers=2, **options)
+
+    assert serial.index["entity_ids"] == ["site-a", "site-sub-b"]
+    assert len(serial.blocks_by_id) == 3
+    assert _hash_dir(tmp_path / "serial") == _hash_dir(tmp_path / "parallel")
+    assert MicroStore.load(tmp_path / "parallel").index == parallel.index
+
+
+def test_glob_batch_reports_cross_page_dedupe(tmp_path: Path) -> None:
+    chrome = "<p>Site footer</p><a href='/home'>Home</a>"
+    for number in range(3):
+        page = tmp_path / "site" / f"p{number}" / "index.html"
+        page.parent.mkdir(parents=True)
+        page.write_text(f"<main><h1>Page {number}</h1>{chrome}</main>", encoding="utf-8")
+
+    paths, root = expand_html_inputs([str(tmp_path / "site" / "**" / "*.html")])
+    store, report = build_micro_store_from_html_pages(
+        paths, tmp_path / "micro", root=root, variant="etc", page_type="page", entity_prefix="", force=False
+    )
+
+    assert root == tmp_path / "site"
+    assert store.index["entity_ids"] == ["p0-index", "p1-index", "p2-index"]
+    assert (report.pages, report.block_refs, report.unique_blocks, report.shared_blocks) == (3, 9, 5, 2)
+    assert report.stored_bytes < report.referenced_bytes
+    assert "44.4% deduplicated" in report.format()
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+from sitegen.io_utils import read_json, write_json_stable
+from sitegen.legacy_pipeline import SERIAL_THRESHOLD, map_paths, resolve_workers
+from sitegen.migrate_legacy import migrate_legacy_dir
+from sitegen.snapshot_micro import legacy_dir_to_micro_snapshot, legacy_dir_to_verified_snapshot
+from sitegen.verify_roundtrip import verify_roundtrip_all
+
+
+def _write_posts(posts_dir: Path, count: int) -> None:
+    for number in range(count):
+        write_json_stable(
+            posts_dir / f"post{number:03d}.json",
+            {
+                "contentId": f"post{number:03d}",
+                "experience": "demo",
+                "pageType": "story",
+                "title": f"Post {number}",
+                "summary": "Summary",
+                # Bodies repeat so blocks are deduplicated across workers.
+                "render": {"kind": "html", "html": f"<p>{number % 5}</p>"},
+            },
+        )
+
+
+def test_parallel_snapshot_matches_serial(tmp_path: Path) -> None:
+    posts_dir = tmp_path / "posts"
+    _write_posts(posts_dir, 40)
+
+    serial = legacy_dir_to_micro_snapshot(posts_dir, tmp_path / "micro", workers=1)
+    parallel = legacy_dir_to_micro_snapshot(posts_dir, tmp_path / "micro", workers=3)
+
+    assert parallel == serial
+    assert list(parallel[1]) == list(serial[1])
+    assert verify_roundtrip_all(posts_dir, workers=3) == (True, [])
+
+
+def test_parallel_migration_matches_serial_and_keeps_warnings(tmp_path: Path, capsys) -> None:
+    posts_dir = tmp_path / "posts"
+    _write_posts(posts_dir, 12)
+    (posts_dir / "broken.json").write_text("{", encoding="utf-8")
+
+    migrate_legacy_dir(posts_dir, tmp_path / "serial", workers=1)
+    migrate_legacy_dir(posts_dir, tmp_path / "parallel", workers=2)
+
+    assert read_json(tmp_path / "parallel" / "index.json") == read_json(tmp_path / "serial" / "index.json")
+    assert capsys.readouterr().err.count("failed to parse JSON") == 2
+
+
+def test_map_paths_preserves_order_and_reports(tmp_path: Path) -> None:
+    paths = [tmp_path / f"{number}.txt" for number in range(5)]
+    results, report = map_paths(Path.as_posix, paths, label="test", workers=2)
+
+    assert results == [path.as_posix() for path in paths]
+    assert report.files == 5 and report.workers == 2
+    assert resolve_workers(None, SERIAL_THRESHOLD - 1) == 1
+
+
+def test_verified_snapshot_converts_once_and_reports_roundtrip_diffs(tmp_path: Path) -> None:
+    posts_dir = tmp_path / "posts"
+    _write_posts(posts_dir, 4)
+    lossy = read_json(posts_dir / "post001.json")
+    lossy["unknownField"] = "dropped by legacy_to_micro"
+    write_json_stable(posts_dir / "post001.json", lossy)
+
+    entities, blocks, index, errors = legacy_dir_to_verified_snapshot(posts_dir)
+
+    assert (entities, blocks, index) == legacy_dir_to_micro_snapshot(posts_dir, tmp_path / "micro")
+    assert errors == verify_roundtrip_all(posts_dir)[1]
+    assert len(errors) == 1 and "legacy/post001.json" in errors[0]
@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+
+from scripts.verify_site import verify_site
+from sitegen.link_index import LinkIndex, link_candidates, load_link_index, verify_link_index
+
+
+def test_link_candidates_follow_static_server_rules() -> None:
+    page = "hina/posts/ep01/index.html"
+
+    assert link_candidates("/hina/list/#top", page) == ["hina/list/index.html"]
+    assert link_candidates("/site/hina/", page, href_prefix="/site") == ["hina/index.html"]
+    assert link_candidates("/nagi-s1/index.html", page, href_prefix="/site") == ["../nagi-s1/index.html"]
+    assert link_candidates("../../../shared/switcher.css", page) == ["shared/switcher.css"]
+    assert link_candidates("../ep02", page) == ["hina/posts/ep02", "hina/posts/ep02/index.html", "hina/posts/ep02.html"]
+    assert link_candidates("#about", page) == [page]
+    assert link_candidates("https://example.com/", page) is None
+
+
+def test_link_index_resolves_against_build_files(tmp_path: Path) -> None:
+    index = LinkIndex(tmp_path)
+    index.add_page(tmp_path / "hina" / "index.html", ["/hina/list/", "/hina/missing/", "https://example.com/", None])
+    index.add_page(tmp_path / "hina" / "list" / "index.html", ["../", "../../shared/switcher.js"])
+    index.add_files([tmp_path / "shared" / "switcher.js"])
+
+    payload = index.to_json()
+
+    assert payload["pages"]["hina/index.html"][2] == {"href": "https://example.com/", "target": None}
+    assert verify_link_index(payload) == ["Broken link in hina/index.html: /hina/missing/ -> hina/missing/index.html"]
+
+
+def test_build_writes_link_index_checked_by_verify_site(tmp_path: Path) -> None:
+    from sitegen.build import BuildContext, build_site_from_micro_v2
+    from sitegen.micro_store import MicroStore
+    from sitegen.models import ExperienceSpec
+
+    repo = Path(__file__).resolve().parents[1]
+    out = tmp_path / "generated"
+    ctx = BuildContext(src_root=repo / "experience_src", out_root=out)
+    experience = ExperienceSpec.model_validate(
+        {
+            "key": "hina",
+            "name": "Hina",
+            "kind": "generated",
+            "output_dir": "hina",
+            "routePatterns": {"home": "hina/", "list": "hina/list/", "detail": "hina/posts/{slug}/"},
+        }
+    )
+    build_site_from_micro_v2(
+        micro_store_dir=repo / "content" / "micro",
+        micro_store=MicroStore.load(repo / "content" / "micro"),
+        experiences=[experience],
+        ctx=ctx,
+        generate_shared=True,
+    )
+
+    payload = load_link_index(out)
+    assert payload is not None and verify_link_index(payload) == []
+    assert "hina/posts/ep01/index.html" in payload["pages"]
+
+    payload["files"].remove("hina/list/index.html")
+    (out / "links.json").write_text(json.dumps(payload), encoding="utf-8")
+    assert any("hina/list/index.html" in error for error in verify_site(out))
@@ -4,7 +4,15 @@ import sys
 
 import pytest
 
-from scripts.markdown_to_micro_v2 import build_micro_store
+from scripts import markdown_to_micro_v2
+from scripts.markdown_to_micro_v2 import (
+    Episode,
+    build_micro_store,
+    extract_text_fences,
+    format_episode_changes,
+    iter_text_fences,
+    update_micro_store,
+)
 from sitegen.micro_store import MicroStore
 
 
@@ -99,3 +107,93 @@ def test_cli_help_command_succeeds() -> None:
     )
 
     assert result.returncode == 0, result.stderr
+
+
+def test_streaming_fences_match_whole_file_split(tmp_path: Path) -> None:
+    markdown = _sample_markdown().replace("\n", "\r\n").replace("Another body.\r\n", "Another body.\r")
+    input_md = tmp_path / "input.md"
+    input_md.write_bytes(markdown.encode("utf-8"))
+
+    with input_md.open(encoding="utf-8") as handle:
+        assert list(iter_text_fences(handle)) == extract_text_fences(markdown)
+
+    assert extract_text_fences(markdown)[1] == Episode(title="Title Two", body="Another body.")
+    with pytest.raises(ValueError, match="Unterminated"):
+        list(iter_text_fences(["```text", "Title", "body"]))
+
+
+def test_expected_blocks_mismatch_counts_every_fence(tmp_path: Path) -> None:
+    input_md = tmp_path / "input.md"
+    input_md.write_text(_sample_markdown() * 3, encoding="utf-8")
+
+    with pytest.raises(SystemExit, match="Expected 2 fenced blocks but found 6"):
+        build_micro_store(
+            input_path=input_md,
+            out_dir=tmp_path / "out",
+            season="nagi-sX",
+            variant="hina",
+            expected_blocks=2,
+            extra_tags=[],
+            force=False,
+        )
+    assert not (tmp_path / "out").exists()
+
+
+def test_incremental_update_rewrites_only_changed_episodes(tmp_path: Path) -> None:
+    input_md = tmp_path / "input.md"
+    input_md.write_text(_sample_markdown(), encoding="utf-8")
+    out_dir = tmp_path / "out"
+    options = dict(input_path=input_md, out_dir=out_dir, season="nagi-sX", variant="hina", expected_blocks=2, extra_tags=[])
+
+    _, changes, _ = update_micro_store(**options)
+    assert changes.added == ["nagi-sX-ep01", "nagi-sX-ep02"]
+    old_block = MicroStore.load(out_dir).entities_by_id["nagi-sX-ep02"]["body"]["blockRefs"][0]
+    unchanged_entity = out_dir / "entities" / "nagi-sX-ep01.json"
+    mtime = unchanged_entity.stat().st_mtime_ns
+
+    input_md.write_text(_sample_markdown().replace("Another body.", "Edited body."), encoding="utf-8")
+    index, changes, report = update_micro_store(**options)
+
+    store = MicroStore.load(out_dir)
+    new_block = store.entities_by_id["nagi-sX-ep02"]["body"]["blockRefs"][0]
+    assert (changes.added, changes.changed, changes.removed) == ([], ["nagi-sX-ep02"], [])
+    assert report.written == [f"blocks/{new_block}.json", "entities/nagi-sX-ep02.json", "index.json"]
+    assert report.removed == [f"blocks/{old_block}.json"]
+    assert unchanged_entity.stat().st_mtime_ns == mtime
+    assert store.index == index
+    assert "M nagi-sX-ep02" in format_episode_changes(changes, report)
+
+
+def test_build_writes_each_episode_before_reading_the_next(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    input_md = tmp_path / "input.md"
+    input_md.write_text(_sample_markdown(), encoding="utf-8")
+    out_dir = tmp_path / "out"
+
+    def _no_store(*args, **kwargs):
+        raise AssertionError("the import must not build a MicroStore")
+
+    monkeypatch.setattr(MicroStore, "__init__", _no_store)
+    on_disk: list[list[str]] = []
+    iter_entities = markdown_to_micro_v2.iter_markdown_entities
+
+    def _spy(**kwargs):
+        for entity, blocks in iter_entities(**kwargs):
+            # Everything yielded before is already written; nothing is listed yet.
+            on_disk.append(sorted(path.name for path in out_dir.rglob("*.json")))
+            yield entity, blocks
+
+    monkeypatch.setattr(markdown_to_micro_v2, "iter_markdown_entities", _spy)
+    index = build_micro_store(
+        input_path=input_md,
+        out_dir=out_dir,
+        season="nagi-sX",
+        variant="hina",
+        expected_blocks=2,
+        extra_tags=[],
+        force=False,
+    )
+    monkeypatch.undo()
+
+    first_block = index["block_ids"][0]
+    assert on_disk == [[], [f"{first_block}.json", "nagi-sX-ep01.json"]]
+    assert MicroStore.load(out_dir, verify=True).index == index
@@ -31,5 +31,6 @@ def test_cli_build_site_runs_deterministically(tmp_path: Path) -> None:
     )
 
     assert (out_dir / "micro.css").exists()
+    assert list(out_dir.glob("micro.*.css")), "hashed theme CSS should be emitted"
     assert (out_dir / "hina" / "index.html").exists()
     assert not (out_dir / "posts").exists()
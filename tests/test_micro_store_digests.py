@@ -0,0 +1,92 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from sitegen.cli import main
+from sitegen.io_utils import read_json, write_json_stable
+from sitegen.micro_ids import block_id_from_block, index_with_digests
+from sitegen.micro_store import MicroStore, diff_micro_store_dirs
+
+
+def _block(content: dict) -> dict:
+    return {"id": block_id_from_block(content), **content}
+
+
+def _entity(entity_id: str, block_refs: list[str], title: str = "Title") -> dict:
+    return {
+        "id": entity_id,
+        "variant": "demo",
+        "type": "story",
+        "meta": {"title": title, "summary": "Summary", "tags": []},
+        "body": {"blockRefs": block_refs},
+        "relations": {},
+    }
+
+
+def _write_store(micro_dir: Path, entities: list[dict], blocks: list[dict], *, digests: bool = True) -> None:
+    if micro_dir.exists():
+        shutil.rmtree(micro_dir)
+    (micro_dir / "blocks").mkdir(parents=True)
+    for entity in entities:
+        write_json_stable(micro_dir / "entities" / f"{entity['id']}.json", entity)
+    for block in blocks:
+        write_json_stable(micro_dir / "blocks" / f"{block['id']}.json", block)
+    index = {
+        "entity_ids": [entity["id"] for entity in entities],
+        "block_ids": sorted(block["id"] for block in blocks),
+    }
+    if digests:
+        index = index_with_digests(index, entities, {block["id"]: block for block in blocks})
+    write_json_stable(micro_dir / "index.json", index)
+
+
+def test_index_digests_round_trip_and_old_indexes_still_load(tmp_path: Path) -> None:
+    para = _block({"type": "Paragraph", "inlines": [{"type": "Text", "text": "a"}]})
+    entities = [_entity("p1", [para["id"]]), _entity("p2", [])]
+
+    _write_store(tmp_path / "new", entities, [para])
+    _write_store(tmp_path / "old", entities, [para], digests=False)
+    new_store = MicroStore.load(tmp_path / "new")
+    old_store = MicroStore.load(tmp_path / "old")
+
+    index = read_json(tmp_path / "new" / "index.json")
+    assert index["entity_digests"] == new_store.entity_digests == old_store.entity_digests
+    assert index["root_hash"] == new_store.root_hash
+    assert not new_store.diff(old_store)
+
+
+def test_diff_reports_added_removed_and_nested_block_changes(tmp_path: Path) -> None:
+    leaf_a = _block({"type": "Paragraph", "inlines": [{"type": "Text", "text": "a"}]})
+    leaf_b = _block({"type": "Paragraph", "inlines": [{"type": "Text", "text": "b"}]})
+    section_a = _block({"type": "Section", "children": [leaf_a["id"]]})
+    section_b = _block({"type": "Section", "children": [leaf_b["id"]]})
+
+    _write_store(
+        tmp_path / "v1",
+        [_entity("keep", []), _entity("nested", [section_a["id"]]), _entity("gone", [])],
+        [leaf_a, section_a],
+    )
+    _write_store(
+        tmp_path / "v2",
+        [_entity("keep", []), _entity("nested", [section_b["id"]]), _entity("new", [])],
+        [leaf_b, section_b],
+    )
+
+    diff = MicroStore.load(tmp_path / "v1").diff(MicroStore.load(tmp_path / "v2"))
+    assert (diff.added, diff.removed, diff.changed) == (["new"], ["gone"], ["nested"])
+    assert diff_micro_store_dirs(tmp_path / "v1", tmp_path / "v2") == diff
+
+
+def test_verify_rejects_stale_entity_digests(tmp_path: Path) -> None:
+    micro_dir = tmp_path / "micro"
+    _write_store(micro_dir, [_entity("p1", [])], [])
+    write_json_stable(micro_dir / "entities" / "p1.json", _entity("p1", [], title="Edited"))
+
+    store = MicroStore.load(micro_dir)
+    assert "entity_digests" not in vars(store)  # computed on first use only
+    assert store.entities_by_id["p1"]["meta"]["title"] == "Edited"
+    with pytest.raises(ValueError, match="stale"):
+        MicroStore.load(micro_dir, verify=True)
+    with pytest.raises(SystemExit, match="stale"):
+        main(["verify-micro-store", "--store", str(micro_dir)])
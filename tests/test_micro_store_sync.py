@@ -0,0 +1,98 @@
+from pathlib import Path
+
+import pytest
+
+from sitegen.io_utils import write_json_stable
+from sitegen.micro_ids import block_id_from_block
+from sitegen import micro_store
+from sitegen.micro_store import MicroStore, sync_micro_store
+
+
+def _store_contents(texts: list[str]) -> tuple[list[dict], dict[str, dict], dict]:
+    blocks: dict[str, dict] = {}
+    entities: list[dict] = []
+    for number, text in enumerate(texts, start=1):
+        content = {"type": "Markdown", "source": text}
+        block = {"id": block_id_from_block(content), **content}
+        blocks[block["id"]] = block
+        entities.append(
+            {
+                "id": f"ep{number:02d}",
+                "variant": "demo",
+                "type": "story",
+                "meta": {"title": f"Episode {number}", "summary": text, "tags": []},
+                "body": {"blockRefs": [block["id"]]},
+                "relations": {},
+            }
+        )
+    index = {"entity_ids": [entity["id"] for entity in entities], "block_ids": sorted(blocks)}
+    return entities, blocks, index
+
+
+def test_sync_writes_only_changes_and_removes_orphans(tmp_path: Path) -> None:
+    micro_dir = tmp_path / "micro"
+    nested = micro_dir / "season2" / "index.json"
+    write_json_stable(nested, {"entity_ids": [], "block_ids": []})
+
+    first = sync_micro_store(micro_dir, *_store_contents(["one", "two"]))
+    assert len(first.written) == 5
+    MicroStore.load(micro_dir)
+
+    unchanged_entity = micro_dir / "entities" / "ep01.json"
+    mtime = unchanged_entity.stat().st_mtime_ns
+
+    entities, blocks, index = _store_contents(["one", "TWO"])
+    second = sync_micro_store(micro_dir, entities, blocks, index)
+
+    old_block = block_id_from_block({"type": "Markdown", "source": "two"})
+    new_block = block_id_from_block({"type": "Markdown", "source": "TWO"})
+    assert second.written == [f"blocks/{new_block}.json", "entities/ep02.json", "index.json"]
+    assert second.removed == [f"blocks/{old_block}.json"]
+    assert second.unchanged == 2
+    assert unchanged_entity.stat().st_mtime_ns == mtime
+    assert nested.exists()
+    assert MicroStore.load(micro_dir).index == index
+
+    third = sync_micro_store(micro_dir, entities, blocks, index)
+    assert third.written == [] and third.removed == []
+
+
+def test_store_loads_at_every_step_of_a_sync(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    micro_dir = tmp_path / "micro"
+    sync_micro_store(micro_dir, *_store_contents(["one", "two", "three"]))
+    entities, blocks, index = _store_contents(["one", "TWO"])
+
+    seen: list[list[str]] = []
+
+    def _load_then(original):
+        def wrapper(*args, **kwargs):
+            store = MicroStore.load(micro_dir, allow_pending=True)
+            for entity in store.iter_entities():
+                store.resolve_blocks(entity["body"]["blockRefs"])
+            seen.append(store.index["entity_ids"])
+            return original(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(micro_store, "_sync_file", _load_then(micro_store._sync_file))
+    monkeypatch.setattr(Path, "unlink", _load_then(Path.unlink))
+    report = sync_micro_store(micro_dir, entities, blocks, index)
+    monkeypatch.undo()
+
+    dropped = sorted(block_id_from_block({"type": "Markdown", "source": text}) for text in ("two", "three"))
+    assert report.removed == ["entities/ep03.json"] + [f"blocks/{block_id}.json" for block_id in dropped]
+    # Old index until index.json is replaced, new index while orphans are removed.
+    assert seen[0] == ["ep01", "ep02", "ep03"] and seen[-1] == ["ep01", "ep02"]
+    assert MicroStore.load(micro_dir, verify=True).index == index
+
+
+def test_load_rejects_files_missing_from_the_index(tmp_path: Path) -> None:
+    micro_dir = tmp_path / "micro"
+    sync_micro_store(micro_dir, *_store_contents(["one"]))
+    content = {"type": "Markdown", "source": "stray"}
+    stray = {"id": block_id_from_block(content), **content}
+    write_json_stable(micro_dir / "blocks" / f"{stray['id']}.json", stray)
+
+    with pytest.raises(ValueError, match="absent from index"):
+        MicroStore.load(micro_dir)
+    assert MicroStore.load(micro_dir, allow_pending=True).index["entity_ids"] == ["ep01"]
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+from sitegen.models import ExperienceSpec
+from sitegen.patch_legacy import MARKER_ATTR, legacy_pages, patch_legacy_pages
+
+PAGE = """<!DOCTYPE html>
+<html lang="ja">
+<head>
+    <meta charset="UTF-8">
+    <link rel="stylesheet" href="old/shared/switcher.css">
+</head>
+<body class="story">
+  <nav class="nav" aria-label="links">
+    <a href="index.html">Home</a>
+  </nav>
+  <p>Unrelated   markup &amp; <br> stays as written.</p>
+</body>
+</html>
+"""
+
+HREFS = dict(routes_href="generated/routes.json", css_href="generated/shared/switcher.css", js_href="generated/shared/switcher.js")
+
+
+def _legacy_site(tmp_path: Path, monkeypatch) -> ExperienceSpec:
+    monkeypatch.chdir(tmp_path)
+    for name in ("index.html", "story1.html", "story2.html", "story3.html"):
+        (tmp_path / "legacy" / name).parent.mkdir(exist_ok=True)
+        (tmp_path / "legacy" / name).write_text(PAGE, encoding="utf-8")
+    return ExperienceSpec(
+        key="ruri",
+        name="Legacy",
+        kind="legacy",
+        home="legacy/index.html",
+        content={"ep01": "legacy/story1.html", "ep02": "legacy/story2.html", "gone": "legacy/missing.html"},
+        routePatterns={"home": "legacy/index.html", "list": "legacy/list.html", "detail": "legacy/story{slug}.html"},
+    )
+
+
+def test_patch_splices_switcher_without_reserializing(tmp_path: Path, monkeypatch) -> None:
+    experience = _legacy_site(tmp_path, monkeypatch)
+
+    patched = patch_legacy_pages(Path("legacy"), experiences=[experience], **HREFS)
+
+    assert patched == [Path("legacy/index.html"), Path("legacy/story1.html"), Path("legacy/story2.html")]
+    text = (tmp_path / "legacy" / "story2.html").read_text(encoding="utf-8")
+    assert '<body class="story" data-experience="ruri" data-template="detail"' in text
+    assert 'data-content-id="ep02"' in text
+    assert "old/shared/switcher.css" not in text
+    assert '<script defer="defer" src="generated/shared/switcher.js"></script></head>' in text
+    assert 'type="button">体験を切り替える</button></nav>' in text
+    assert "<p>Unrelated   markup &amp; <br> stays as written.</p>" in text
+    assert (tmp_path / "legacy" / "story3.html").read_text(encoding="utf-8") == PAGE
+
+
+def test_patch_skips_pages_whose_marker_matches(tmp_path: Path, monkeypatch) -> None:
+    experience = _legacy_site(tmp_path, monkeypatch)
+    patch_legacy_pages(Path("legacy"), experiences=[experience], **HREFS)
+    index = tmp_path / "legacy" / "index.html"
+    first = index.read_text(encoding="utf-8")
+    mtime = index.stat().st_mtime_ns
+
+    patch_legacy_pages(Path("legacy"), experiences=[experience], **HREFS)
+    assert index.stat().st_mtime_ns == mtime
+
+    patch_legacy_pages(Path("legacy"), experiences=[experience], **{**HREFS, "routes_href": "dist/routes.json"})
+    second = index.read_text(encoding="utf-8")
+    assert second != first
+    assert second.count(MARKER_ATTR) == 1 and second.count("view-switcher") == 1
+
+
+def test_legacy_pages_falls_back_to_historical_defaults(tmp_path: Path) -> None:
+    (tmp_path / "index.html").write_text(PAGE, encoding="utf-8")
+    (tmp_path / "story1.html").write_text(PAGE, encoding="utf-8")
+
+    pages = legacy_pages(tmp_path)
+
+    assert [(page.path.name, page.template, page.content_id) for page in pages] == [
+        ("index.html", "home", None),
+        ("story1.html", "detail", "ep01"),
+    ]
@@ -0,0 +1,66 @@
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from sitegen.build import BuildContext, build_site_from_micro_v2
+from sitegen.cli_common import load_experiences
+from sitegen.micro_store import MicroStore
+from sitegen.sharding import SHARD_MANIFEST_NAME, ShardSpec, merge_shards
+
+MICRO_STORE = Path("content/micro")
+
+
+def _build(out_root: Path, shard: ShardSpec | None = None) -> None:
+    ctx = BuildContext(
+        src_root=Path("experience_src"),
+        out_root=out_root,
+        href_root=Path("site"),
+        build_label="test",
+    )
+    build_site_from_micro_v2(
+        micro_store_dir=MICRO_STORE,
+        experiences=load_experiences(Path("config/experiences.yaml")),
+        ctx=ctx,
+        micro_store=MicroStore.load(MICRO_STORE),
+        generate_shared=True,
+        shard=shard,
+    )
+
+
+def _hash_tree(root: Path) -> dict[str, str]:
+    return {
+        path.relative_to(root).as_posix(): hashlib.sha256(path.read_bytes()).hexdigest()
+        for path in sorted(root.rglob("*"))
+        if path.is_file()
+    }
+
+
+@pytest.mark.parametrize("by", ["experience", "content"])
+def test_merged_shards_match_single_build(tmp_path: Path, by: str) -> None:
+    _build(tmp_path / "full")
+    parts = []
+    for index in (3, 1, 2):
+        part = tmp_path / f"shard-{index}"
+        _build(part, ShardSpec(index=index, count=3, by=by))
+        assert (part / SHARD_MANIFEST_NAME).exists()
+        assert not (part / "_buildinfo.json").exists()
+        parts.append(part)
+
+    merge_shards(parts, tmp_path / "merged")
+
+    assert _hash_tree(tmp_path / "merged") == _hash_tree(tmp_path / "full")
+
+
+def test_merge_rejects_missing_shard(tmp_path: Path) -> None:
+    part = tmp_path / "shard-1"
+    _build(part, ShardSpec(index=1, count=2))
+
+    with pytest.raises(SystemExit, match="exactly once"):
+        merge_shards([part], tmp_path / "merged")
+
+
+@pytest.mark.parametrize("value", ["0/2", "3/2", "1", "a/b"])
+def test_shard_spec_rejects_invalid_values(value: str) -> None:
+    with pytest.raises(SystemExit):
+        ShardSpec.parse(value)
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from sitegen.io_utils import write_json_stable
+from sitegen.snapshot_micro import compare_dirs
+
+
+def _write_tree(root: Path, files: dict[str, dict]) -> None:
+    for rel, data in files.items():
+        write_json_stable(root / rel, data)
+
+
+def test_compare_dirs_reports_only_differing_files(tmp_path: Path) -> None:
+    left, right = tmp_path / "left", tmp_path / "right"
+    _write_tree(left, {"index.json": {"ids": [1]}, "entities/a.json": {"t": "a"}, "entities/gone.json": {}})
+    _write_tree(right, {"index.json": {"ids": [1]}, "entities/a.json": {"t": "b"}, "entities/new.json": {}})
+
+    equal, diff = compare_dirs(left, right)
+    assert not equal
+    assert "left/entities/a.json" in diff
+    assert '-  "t": "a"' in diff and '+  "t": "b"' in diff
+    assert "index.json" not in diff
+
+    equal, summary = compare_dirs(left, right, summary=True)
+    assert not equal
+    assert summary.splitlines()[:3] == [
+        "M entities/a.json",
+        "D entities/gone.json",
+        "A entities/new.json",
+    ]
+
+
+def test_compare_dirs_truncates_long_diffs(tmp_path: Path) -> None:
+    left, right = tmp_path / "left", tmp_path / "right"
+    _write_tree(left, {f"blocks/{i}.json": {"n": i} for i in range(20)})
+    _write_tree(right, {f"blocks/{i}.json": {"n": i + 100} for i in range(20)})
+
+    equal, diff = compare_dirs(left, right, max_diff_lines=12)
+    assert not equal
+    assert len(diff.splitlines()) <= 14
+    assert "diff truncated after 12 line(s)" in diff
+
+
+def test_compare_dirs_equal_trees(tmp_path: Path) -> None:
+    files = {"index.json": {"ids": []}, "blocks/x.json": {"k": "v"}}
+    _write_tree(tmp_path / "a", files)
+    _write_tree(tmp_path / "b", files)
+
+    assert compare_dirs(tmp_path / "a", tmp_path / "b") == (True, "")
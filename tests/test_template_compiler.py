@@ -0,0 +1,45 @@
+import shutil
+from pathlib import Path
+
+from jinja2 import FileSystemLoader, ModuleLoader
+
+from sitegen.build import BuildContext
+from sitegen.cli_common import load_experiences
+from sitegen.template_compiler import compile_templates
+
+
+def _hina():
+    experiences = load_experiences(Path("config/experiences.yaml"))
+    return next(exp for exp in experiences if exp.key == "hina")
+
+
+def test_compiled_templates_are_loaded_when_fresh(tmp_path: Path) -> None:
+    src_root = tmp_path / "src"
+    shutil.copytree("experience_src", src_root)
+    compiled_root = tmp_path / "compiled"
+
+    source_ctx = BuildContext(src_root=src_root, out_root=tmp_path / "out")
+    exp = _hina()
+    compile_templates(source_ctx.template_search_path(exp), compiled_root / exp.key)
+
+    ctx = BuildContext(src_root=src_root, out_root=tmp_path / "out", compiled_templates_dir=compiled_root)
+    env = ctx.jinja_env(exp)
+    assert isinstance(env.loader, ModuleLoader)
+    assert ctx.jinja_env(exp) is env
+    assert env.get_template("detail.jinja") is not None
+
+
+def test_stale_compiled_templates_fall_back_to_sources(tmp_path: Path) -> None:
+    src_root = tmp_path / "src"
+    shutil.copytree("experience_src", src_root)
+    compiled_root = tmp_path / "compiled"
+
+    source_ctx = BuildContext(src_root=src_root, out_root=tmp_path / "out")
+    exp = _hina()
+    compile_templates(source_ctx.template_search_path(exp), compiled_root / exp.key)
+
+    home = src_root / "hina" / "templates" / "home.jinja"
+    home.write_text(home.read_text(encoding="utf-8") + "\n{# edited #}\n", encoding="utf-8")
+
+    ctx = BuildContext(src_root=src_root, out_root=tmp_path / "out", compiled_templates_dir=compiled_root)
+    assert isinstance(ctx.jinja_env(exp).loader, FileSystemLoader)
@@ -0,0 +1,30 @@
+from sitegen.template_similarity import candidate_pairs, jaccard, near_duplicates, sketch_tags
+
+
+def _layout(*, extra: tuple[str, ...] = ()) -> list[str]:
+    # Distinct names stand in for a varied page; one extra tag changes ~5 of 58 shingles.
+    tags = [f"tag{number}" for number in range(60)]
+    return tags[:30] + list(extra) + tags[30:]
+
+
+def test_near_duplicates_are_bucketed_and_confirmed_exactly() -> None:
+    sequences = [
+        _layout(),
+        _layout(extra=("aside",)),
+        ["main", "article", "figure", "img", "figcaption"] * 12,
+        _layout(),
+    ]
+    sketches = [sketch_tags(tags) for tags in sequences]
+
+    found = near_duplicates(sketches, 0.9)
+
+    assert [(first, second) for first, second, _ in found] == [(0, 1), (0, 3), (1, 3)]
+    assert found[1][2] == 1.0
+    assert found[0][2] == jaccard(sketches[0].shingles, sketches[1].shingles) < 1.0
+    assert not any(2 in pair for pair in candidate_pairs(sketches))
+
+
+def test_sketches_are_deterministic_and_handle_short_sequences() -> None:
+    assert sketch_tags(["body", "p"]) == sketch_tags(["body", "p"])
+    assert sketch_tags([]).shingles == frozenset()
+    assert jaccard(frozenset(), frozenset()) == 1.0
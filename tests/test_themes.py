@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from sitegen.compile_pipeline import apply_theme
+from sitegen.themes import ThemeStage, compile_theme_css
+
+
+def test_compile_theme_css_is_cached_per_theme() -> None:
+    first = compile_theme_css({"mw-text-color": "#111"})
+    second = compile_theme_css({"mw-text-color": "#111"})
+    assert first is second
+    assert ":root { --mw-text-color: #111; }" in first
+    assert apply_theme([], theme={})[1] == compile_theme_css()
+
+
+def test_theme_stage_writes_hashed_files_once_per_distinct_theme(tmp_path: Path) -> None:
+    stage = ThemeStage()
+    alpha = stage.add("alpha", {"mw-text-color": "#111"})
+    stage.add("beta", {"mw-text-color": "#111"})
+    gamma = stage.add("gamma")
+
+    paths = stage.write(tmp_path)
+
+    assert paths["alpha"] == paths["beta"] == tmp_path / alpha.filename
+    assert paths["gamma"].name == f"micro.{gamma.digest}.css"
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        {alpha.filename, gamma.filename}
+    )
+    assert paths["gamma"].read_text(encoding="utf-8") == gamma.css_text